@@ -0,0 +1,114 @@
+import json
+import math
+import os
+import sys
+
+import streamlit as st
+
+# Prohlížeč jednotlivých nabídek - každá stránka je samostatný dotaz DuckDB,
+# do session se nikdy nenačítá celá job_listings
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCRIPTS_DIR = os.path.join(os.path.dirname(APP_DIR), "scripts")
+if SCRIPTS_DIR not in sys.path:
+    sys.path.insert(0, SCRIPTS_DIR)
+
+from listing_explorer import (  # noqa: E402
+    EXPORT_PARQUET, JOBS_DB_PATH, PAGE_SIZE, connect, count_listings, fetch_page, filter_options,
+)
+
+SORT_LABELS = {
+    "salary_desc": "Plat (nejvyšší)",
+    "salary_asc": "Plat (nejnižší)",
+    "title": "Pozice (A-Z)",
+    "region": "Kraj (A-Z)",
+    "newest": "Nejnovější",
+}
+
+st.set_page_config(
+    page_title="CzechPayGap | Nabídky",
+    layout="wide",
+    initial_sidebar_state="expanded"
+)
+
+def data_version():
+    """Klíč cache: nový export (nebo databáze) otevře nové spojení"""
+    return tuple(os.path.getmtime(p) if os.path.exists(p) else None for p in (EXPORT_PARQUET, JOBS_DB_PATH))
+
+@st.cache_resource(max_entries=1)
+def explorer(version):
+    # Jedno DuckDB spojení na proces; dotazy jednotlivých sessions jdou přes vlastní kurzor
+    return connect()
+
+@st.cache_data
+def options(version):
+    return filter_options(explorer(version))
+
+@st.cache_data(max_entries=256)
+def total(version, filters_json):
+    return count_listings(explorer(version), json.loads(filters_json))
+
+@st.cache_resource
+def load_css():
+    with open(os.path.join(APP_DIR, "style.css"), encoding="utf-8") as f:
+        return f"<style>{f.read()}</style>"
+
+st.markdown(load_css(), unsafe_allow_html=True)
+st.markdown("### 🔎 Pracovní nabídky")
+
+version = data_version()
+if not any(version):
+    st.info("Zatím nejsou stažené žádné nabídky - spusťte pipeline.")
+    st.stop()
+
+con = explorer(version)
+choices = options(version)
+
+# === Filtry (vyhodnocuje DuckDB, ne pandas) ===
+with st.sidebar:
+    regions = st.multiselect("Kraj", choices["regions"])
+    sources = st.multiselect("Portál", choices["sources"])
+    low, high = (int(v) for v in choices["salary_range"])
+    salary = st.slider("Plat (Kč)", low, high, (low, high), step=500) if high > low else (low, high)
+    title = st.text_input("Pozice obsahuje")
+    sort = st.selectbox("Řazení", list(SORT_LABELS), format_func=SORT_LABELS.get)
+    page_size = st.selectbox("Nabídek na stránku", [25, PAGE_SIZE, 100, 200], index=1)
+
+filters = {
+    "regions": regions,
+    "sources": sources,
+    "salary_min": salary[0] if salary[0] > low else None,
+    "salary_max": salary[1] if salary[1] < high else None,
+    "title": title.strip(),
+}
+filters_json = json.dumps(filters, sort_keys=True, ensure_ascii=False)
+
+# Kurzory navštívených stránek; změna filtru nebo řazení začíná od první stránky
+signature = (filters_json, sort, page_size, version)
+if st.session_state.get("explorer_signature") != signature:
+    st.session_state.explorer_signature = signature
+    st.session_state.explorer_cursors = [None]
+cursors = st.session_state.explorer_cursors
+
+page, next_cursor = fetch_page(con, filters, sort, after=cursors[-1], page_size=page_size)
+found = total(version, filters_json)
+
+st.caption(f"{found:,} nabídek · stránka {len(cursors)} z {max(1, math.ceil(found / page_size))}")
+st.dataframe(
+    page.drop(columns=["listing_id"]),
+    use_container_width=True,
+    hide_index=True,
+    column_config={
+        "region": "Kraj",
+        "salary_offer": st.column_config.NumberColumn("Plat (Kč)", format="%d"),
+        "job_title": "Pozice",
+        "source": "Portál",
+        "location": "Lokalita",
+        "salary_text": "Plat (text)",
+        "scraped_at": st.column_config.DatetimeColumn("Staženo", format="D. M. YYYY"),
+        "detail_url": st.column_config.LinkColumn("Detail"),
+    },
+)
+
+prev_col, _, next_col = st.columns([1, 4, 1])
+prev_col.button("← Předchozí", disabled=len(cursors) == 1, on_click=cursors.pop)
+next_col.button("Další →", disabled=next_cursor is None, on_click=cursors.append, args=(next_cursor,))
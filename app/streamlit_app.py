@@ -1,6 +1,21 @@
+import csv
+import os
+import sys
+
 import streamlit as st
-import pandas as pd
-import plotly.express as px
+
+# Těžké moduly (plotly, pandas) se importují až ve funkcích, které je potřebují -
+# studený start procesu tak nečeká na import pandas a plotly.express
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+SCRIPTS_DIR = os.path.join(os.path.dirname(APP_DIR), "scripts")
+if SCRIPTS_DIR not in sys.path:
+    sys.path.insert(0, SCRIPTS_DIR)
+
+from dashboard_views import VIEWS_PATH, build_views, load_views  # noqa: E402
+
+COMPARISON_CSV = "data/wages_comparison.csv"
+TRENDS_CSV = "data/wage_trends.csv"
+SCALE = ["#FF004C", "#FFB800", "#00FF9C"]
 
 st.set_page_config(
     page_title="CzechPayGap | Future of Work Insight",
@@ -9,15 +24,142 @@ st.set_page_config(
 )
 
 # === Load Data ===
-@st.cache_data
-def load_data():
-    return pd.read_csv("data/wages_comparison.csv")
+def data_version():
+    """Klíč cache: změna podkladů z pipeline (nebo CSV) načte data znovu"""
+    return tuple(os.path.getmtime(p) if os.path.exists(p) else None
+                 for p in (VIEWS_PATH, COMPARISON_CSV, TRENDS_CSV))
+
+def csv_run_id(path):
+    """run_id z prvního řádku CSV (jen hlavička a jeden řádek, bez pandas)"""
+    with open(path, encoding="utf-8", newline="") as f:
+        row = next(csv.DictReader(f), None)
+    return row.get("run_id") if row else None
+
+def views_current(views, version):
+    """Podklady platí, jen pokud nejsou starší než CSV a pochází ze stejného běhu
+
+    CSV může přepsat samostatně spuštěný krok pipeline (step2/step3 bez exportu) -
+    podklady pak ukazují předchozí běh.
+    """
+    views_mtime, *csv_mtimes = version
+    if any(m is not None and m > views_mtime for m in csv_mtimes):
+        return False
+    return not os.path.exists(COMPARISON_CSV) or csv_run_id(COMPARISON_CSV) == views.get("run_id")
+
+@st.cache_resource
+def load_dashboard(version):
+    # Předpočítané podklady z pipeline (export_metrics) - jen json, žádné pandas
+    views = load_views()
+    if views is not None and views_current(views, version):
+        return views
+    # Starší běh pipeline bez podkladů nebo novější CSV - dopočítat z CSV
+    import pandas as pd
+
+    comparison = pd.read_csv(COMPARISON_CSV).to_dict("list")
+    trends = pd.read_csv(TRENDS_CSV).to_dict("list") if os.path.exists(TRENDS_CSV) else None
+    return build_views(comparison, trends)
+
+@st.cache_resource
+def load_css():
+    # Jednou za proces, ne při každém rerunu
+    with open(os.path.join(APP_DIR, "style.css"), encoding="utf-8") as f:
+        return f"<style>{f.read()}</style>"
+
+@st.cache_resource
+def region_figures(version):
+    """Statické grafy podle kraje - sestaví se jednou pro danou verzi dat"""
+    import plotly.graph_objects as go
+
+    data = load_dashboard(version)["by_region"]
+    fig = go.Figure([
+        go.Bar(name="ČSÚ Průměr", x=data["region"], y=data["avg_wage"],
+               texttemplate="%{y:.0f}", marker_color="#00C2FF"),
+        go.Bar(name="Nabídky z portálů", x=data["region"], y=data["avg_offer"],
+               texttemplate="%{y:.0f}", marker_color="#FF00C8"),
+    ])
+    fig.update_layout(
+        template="plotly_dark",
+        barmode="group",
+        xaxis_title="Region",
+        yaxis_title="Mzda (Kč)",
+        legend_title="Zdroj dat",
+    )
+
+    offers = [o or 0 for o in data["offers"]]
+    fig2 = go.Figure(go.Scatter(
+        x=data["avg_wage"],
+        y=data["avg_offer"],
+        mode="markers",
+        hovertext=data["region"],
+        marker=dict(
+            color=data["pay_gap"],
+            colorscale=SCALE,
+            colorbar=dict(title="pay_gap"),
+            size=offers,
+            sizemode="area",
+            sizeref=2 * max(offers + [1]) / 20 ** 2,
+        ),
+    ))
+    fig2.update_layout(template="plotly_dark",
+                       xaxis_title="Oficiální mzda (ČSÚ)", yaxis_title="Nabízená mzda")
+    return fig, fig2
+
+@st.cache_resource
+def ci_figure(version):
+    import plotly.graph_objects as go
 
-df = load_data()
+    ci = load_dashboard(version)["ci"]
+    gap = ci["pay_gap_pct"]
+    fig = go.Figure(go.Bar(
+        x=ci["region"],
+        y=gap,
+        error_y=dict(
+            type="data",
+            array=[None if h is None or g is None else h - g for g, h in zip(gap, ci["pay_gap_pct_ci_high"])],
+            arrayminus=[None if lo is None or g is None else g - lo for g, lo in zip(gap, ci["pay_gap_pct_ci_low"])],
+        ),
+        marker=dict(color=ci["offers"], colorscale=SCALE, colorbar=dict(title="Nabídky")),
+        customdata=list(zip(ci["offers"], ci["pay_gap_pct_ci_low"], ci["pay_gap_pct_ci_high"])),
+        hovertemplate="%{x}<br>Pay gap (%): %{y}<br>Nabídky: %{customdata[0]}"
+                      "<br>Interval: %{customdata[1]} - %{customdata[2]}<extra></extra>",
+    ))
+    fig.update_layout(template="plotly_dark", xaxis_title="Region", yaxis_title="Pay gap (%)")
+    return fig
+
+def trend_figure(series, regions, column, title, y_title):
+    import plotly.graph_objects as go
+
+    fig = go.Figure([
+        go.Scatter(x=series[region]["scrape_date"], y=series[region][column], mode="lines", name=region)
+        for region in regions
+    ])
+    fig.update_layout(template="plotly_dark", title=title, xaxis_title="Den",
+                      yaxis_title=y_title, legend_title="Kraj")
+    return fig
+
+@st.cache_resource
+def wow_figure(version):
+    import plotly.graph_objects as go
+
+    latest = load_dashboard(version)["trends"]["latest"]
+    fig = go.Figure(go.Bar(
+        x=latest["wow_change_pct"],
+        y=latest["region"],
+        orientation="h",
+        marker=dict(color=latest["wow_change_pct"], colorscale=SCALE,
+                    colorbar=dict(title="Změna (%)")),
+    ))
+    fig.update_layout(template="plotly_dark", title="Mezitýdenní změna",
+                      xaxis_title="Změna 7denního mediánu (%)", yaxis_title="Kraj")
+    return fig
+
+version = data_version()
+views = load_dashboard(version)
+metrics = views["metrics"]
+trends = views["trends"]
 
 # === Custom CSS ===
-with open("app/style.css") as f:
-    st.markdown(f"<style>{f.read()}</style>", unsafe_allow_html=True)
+st.markdown(load_css(), unsafe_allow_html=True)
 
 # === Header ===
 st.markdown("""
@@ -26,61 +168,64 @@ st.markdown("""
     <p class="subtitle">Explore the real economy of work. Data meets reality.</p>
 </div>
 """, unsafe_allow_html=True)
+if views.get("run_id"):
+    st.caption(f"Data z běhu pipeline {views['run_id']} (podklady z {views['generated_at']})")
 
 # === Key Metrics ===
 col1, col2, col3, col4 = st.columns(4)
-col1.metric("🧭 Regions", len(df))
-col2.metric("� ČSÚ Avg", f"{int(df['avg_wage'].mean()):,} Kč")
-col3.metric("�💰 Avg Pay Gap", f"{int(df['pay_gap'].mean()):,} Kč")
-col4.metric("� Total Offers", int(df['offers'].sum()))
+col1.metric("🧭 Regions", metrics["regions"])
+col2.metric("� ČSÚ Avg", f"{int(metrics['avg_wage_mean']):,} Kč")
+col3.metric("�💰 Avg Pay Gap", f"{int(metrics['pay_gap_mean']):,} Kč")
+col4.metric("� Total Offers", int(metrics["offers_total"]))
 
 st.markdown("<hr class='divider'>", unsafe_allow_html=True)
 
 # === ČSÚ Statistics ===
 st.markdown("### 📊 Statistiky z Českého statistického úřadu")
 csu_col1, csu_col2, csu_col3 = st.columns(3)
-csu_col1.metric("📍 Min. průměrná mzda", f"{int(df['avg_wage'].min()):,} Kč", 
-                delta=df[df['avg_wage'] == df['avg_wage'].min()]['region'].values[0])
-csu_col2.metric("📊 Celkový průměr ČSÚ", f"{int(df['avg_wage'].mean()):,} Kč")
-csu_col3.metric("📍 Max. průměrná mzda", f"{int(df['avg_wage'].max()):,} Kč",
-                delta=df[df['avg_wage'] == df['avg_wage'].max()]['region'].values[0])
+csu_col1.metric("📍 Min. průměrná mzda", f"{int(metrics['avg_wage_min']):,} Kč",
+                delta=metrics["avg_wage_min_region"])
+csu_col2.metric("📊 Celkový průměr ČSÚ", f"{int(metrics['avg_wage_mean']):,} Kč")
+csu_col3.metric("📍 Max. průměrná mzda", f"{int(metrics['avg_wage_max']):,} Kč",
+                delta=metrics["avg_wage_max_region"])
 
 st.markdown("<hr class='divider'>", unsafe_allow_html=True)
 
+fig, fig2 = region_figures(version)
+
 # === Visualization 1 ===
 st.markdown("### ⚙️ Průměrné vs. Nabízené mzdy podle regionu")
-fig = px.bar(
-    df,
-    x="region",
-    y=["avg_wage", "avg_offer"],
-    barmode="group",
-    text_auto=".0f",
-    color_discrete_sequence=["#00C2FF", "#FF00C8"],
-    labels={"avg_wage": "ČSÚ Průměr", "avg_offer": "Nabídky z portálů"}
-)
-fig.update_layout(
-    template="plotly_dark",
-    xaxis_title="Region",
-    yaxis_title="Mzda (Kč)",
-    legend_title="Zdroj dat",
-)
 st.plotly_chart(fig, use_container_width=True)
 
 # === Visualization 2 ===
 st.markdown("### 🔮 Index mzdové reality (PayGap Index)")
-fig2 = px.scatter(
-    df,
-    x="avg_wage",
-    y="avg_offer",
-    color="pay_gap",
-    size="offers",
-    hover_name="region",
-    color_continuous_scale=["#FF004C", "#FFB800", "#00FF9C"],
-    labels={"avg_wage": "Oficiální mzda (ČSÚ)", "avg_offer": "Nabízená mzda"},
-)
-fig2.update_layout(template="plotly_dark")
 st.plotly_chart(fig2, use_container_width=True)
 
+# === Confidence ===
+if views["ci"] is not None:
+    st.markdown("### 🎯 Pay gap s 95% intervalem spolehlivosti")
+    st.plotly_chart(ci_figure(version), use_container_width=True)
+    st.caption("Interval z bootstrapu nabídek (1000 výběrů) - kraje s málo nabídkami mají široký interval.")
+
+# === Trends ===
+if trends is not None:
+    st.markdown("<hr class='divider'>", unsafe_allow_html=True)
+    st.markdown("### 📈 Vývoj nabízených mezd v čase")
+    regions = trends["regions"]
+    selected = st.multiselect("Kraje", regions, default=regions[:3])
+    window = st.radio("Klouzavý medián", ["7 dní", "30 dní"], horizontal=True)
+    column = "median_7d" if window == "7 dní" else "median_30d"
+
+    st.plotly_chart(trend_figure(trends["series"], selected, column, None, "Medián nabídek (Kč)"),
+                    use_container_width=True)
+
+    gap_col, wow_col = st.columns(2)
+    gap_column = "pay_gap_7d_pct" if window == "7 dní" else "pay_gap_30d_pct"
+    gap_col.plotly_chart(trend_figure(trends["series"], selected, gap_column,
+                                      "Pay gap vůči čtvrtletí ČSÚ", "Pay gap vůči ČSÚ (%)"),
+                         use_container_width=True)
+    wow_col.plotly_chart(wow_figure(version), use_container_width=True)
+
 # === Footer ===
 st.markdown("""
 <div class="footer">
@@ -0,0 +1,160 @@
+"""
+Zátěžový test uploadu do Supabase proti lokálnímu PostgREST stand-inu
+Syntetické job_listings (10k - 10M řádků) se generují po částech a posílají
+přes step1_upload.upsert_batches; měří se řádky/s, špičková paměť klienta
+a statistiky serveru (počet a velikost požadavků, latence, throttling).
+Každý případ běží v novém procesu - ru_maxrss je špička za celý proces, ve
+sdíleném procesu by pozdější případy zdědily špičku předchozích.
+
+Použití:
+    python benchmarks/load_test_upload.py --rows 100000
+    python benchmarks/load_test_upload.py --rows 1000000 --batch-sizes 500,1000,5000 --workers 1,4,8
+    python benchmarks/load_test_upload.py --rows 50000 --throttle-rate 0.05 --failure-rate 0.02
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import resource
+import socket
+import sys
+import time
+import urllib.request
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(BENCH_DIR)
+for _path in (os.path.join(ROOT_DIR, "pipeline"), BENCH_DIR):
+    if _path not in sys.path:
+        sys.path.insert(0, _path)
+
+import step1_upload  # noqa: E402
+from mock_postgrest import serve  # noqa: E402
+from run_benchmarks import GENERIC_PORTALS, REGIONS  # noqa: E402
+
+TITLES = ["Účetní", "Skladník", "Developer", "Řidič", "Prodavač", "Zdravotní sestra", "Obchodní zástupce"]
+SOURCES = ["prace.cz", "jobs.cz"] + GENERIC_PORTALS
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def peak_rss_mb():
+    """Špičková RSS procesu od jeho startu (Linux vrací kB, macOS bajty)"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1024 / 1024 if sys.platform == "darwin" else peak / 1024
+
+
+def synthetic_batches(rows, batch_size, seed=42):
+    """Generuje dávky záznamů job_listings - v paměti je vždy jen jedna dávka"""
+    import numpy as np
+
+    rng = np.random.default_rng(seed)
+    for start in range(0, rows, batch_size):
+        n = min(batch_size, rows - start)
+        regions = rng.choice(REGIONS, size=n)
+        salaries = rng.integers(18000, 120000, size=n)
+        titles = rng.choice(TITLES, size=n)
+        sources = rng.choice(SOURCES, size=n)
+        yield [
+            {"region": r, "salary_offer": int(s), "source": src, "job_title": t}
+            for r, s, src, t in zip(regions.tolist(), salaries.tolist(), sources.tolist(), titles.tolist())
+        ]
+
+
+def server_request(url, method="GET"):
+    with urllib.request.urlopen(urllib.request.Request(url, method=method), timeout=10) as resp:
+        body = resp.read()
+    return json.loads(body) if body else None
+
+
+def run_case(server_url, rows, batch_size, workers, on_conflict):
+    """Jeden případ v čerstvém procesu: peak RSS je jen jeho, baseline = interpret s importy"""
+    from supabase import create_client
+
+    client = create_client(server_url, "anon")
+    server_request(f"{server_url}/_stats", method="DELETE")
+    baseline = peak_rss_mb()
+    start = time.perf_counter()
+    uploaded = step1_upload.upsert_batches(client, "job_listings", synthetic_batches(rows, batch_size),
+                                           on_conflict=on_conflict, max_workers=workers)
+    elapsed = time.perf_counter() - start
+    stats = server_request(f"{server_url}/_stats")
+    return {
+        "rows": uploaded,
+        "batch_size": batch_size,
+        "workers": workers,
+        "elapsed_s": elapsed,
+        "rows_per_sec": uploaded / elapsed,
+        "peak_rss_mb": peak_rss_mb(),
+        "baseline_rss_mb": baseline,
+        "requests": stats["requests"],
+        "throttled": stats["throttled"],
+        "failed": stats["failed"],
+        "request_kb_p50": stats["request_kb_p50"],
+        "latency_ms_p50": stats["latency_ms_p50"],
+        "latency_ms_p95": stats["latency_ms_p95"],
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Zátěžový test uploadu proti PostgREST stand-inu")
+    parser.add_argument("--rows", type=int, default=100_000, help="počet řádků (10k - 10M)")
+    parser.add_argument("--batch-sizes", default=str(step1_upload.UPLOAD_BATCH_SIZE),
+                        help="velikosti dávek oddělené čárkou")
+    parser.add_argument("--workers", default=str(step1_upload.UPLOAD_WORKERS),
+                        help="počty vláken oddělené čárkou")
+    parser.add_argument("--on-conflict", default="", help="klíč pro upsert (např. region,job_title)")
+    parser.add_argument("--latency", type=float, default=0.0, help="latence serveru na požadavek (s)")
+    parser.add_argument("--latency-per-kb", type=float, default=0.0, help="latence serveru za kB (s)")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="podíl odpovědí 429")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="podíl odpovědí 503")
+    parser.add_argument("--keep-rows", action="store_true",
+                        help="server drží řádky v paměti (jinak jen počítá)")
+    parser.add_argument("--json", action="store_true", help="výsledky jako JSON řádky")
+    args = parser.parse_args(argv)
+
+    from concurrent.futures import ProcessPoolExecutor
+
+    # Server běží v samostatném procesu, aby jeho paměť a GIL neovlivnily měření klienta
+    port = free_port()
+    ready = multiprocessing.Event()
+    server = multiprocessing.Process(
+        target=serve, args=(port, ready),
+        kwargs={"latency": args.latency, "latency_per_kb": args.latency_per_kb,
+                "throttle_rate": args.throttle_rate, "failure_rate": args.failure_rate,
+                "keep_rows": args.keep_rows},
+        daemon=True)
+    server.start()
+    ready.wait(10)
+    server_url = f"http://127.0.0.1:{port}"
+
+    # spawn: čistý interpret bez paměti rodiče (fork by zdědil jeho RSS)
+    spawn = multiprocessing.get_context("spawn")
+    try:
+        results = []
+        for batch_size in (int(b) for b in args.batch_sizes.split(",")):
+            for workers in (int(w) for w in args.workers.split(",")):
+                with ProcessPoolExecutor(max_workers=1, mp_context=spawn) as case:
+                    result = case.submit(run_case, server_url, args.rows, batch_size, workers,
+                                         args.on_conflict).result()
+                results.append(result)
+                if args.json:
+                    print(json.dumps(result))
+                else:
+                    print(f"[LOAD] {result['rows']} radku, davka {batch_size}, {workers} vlaken: "
+                          f"{result['rows_per_sec']:.0f} radku/s, peak RSS {result['peak_rss_mb']:.0f} MB "
+                          f"(bez uploadu {result['baseline_rss_mb']:.0f} MB), "
+                          f"{result['requests']} pozadavku (p50 {result['request_kb_p50']:.0f} kB, "
+                          f"latence p95 {result['latency_ms_p95'] or 0:.0f} ms), "
+                          f"429: {result['throttled']}, 503: {result['failed']}")
+    finally:
+        server.terminate()
+        server.join()
+    return results
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+"""
+Lokální náhrada pracovních portálů a ČSÚ pro offline benchmarky
+Servíruje nahrané stránky z benchmarks/fixtures s nastavitelnou latencí
+a náhodně vkládanými chybami (503), aby šlo měřit bez živých webů;
+portály v `down` odpovídají vždy 503 (výpadek celého portálu)
+"""
+import hashlib
+import os
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+CONTENT_TYPES = {
+    ".html": "text/html; charset=utf-8",
+    ".csv": "text/csv; charset=utf-8",
+    ".xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+}
+
+# Cesty detailů nabídek (prace.cz, jobs.cz, obecné portály)
+DETAIL_PATHS = ("nabidka", "rpd", "nabidka-prace")
+
+
+class MockPortalServer:
+    """HTTP server s fixtures; URL portálů: <url>/<doména>/..., ČSÚ: <url>/csu/..."""
+
+    def __init__(self, fixtures_dir=FIXTURES_DIR, latency=0.0, jitter=0.0,
+                 error_rate=0.0, pages=3, seed=42, down=()):
+        self.fixtures_dir = fixtures_dir
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.pages = pages
+        self.down = set(down)
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.cache = {}
+        self.reset_stats()
+        self.httpd = None
+        self.thread = None
+
+    def reset_stats(self):
+        self.stats = {"requests": 0, "errors_injected": 0, "bytes_sent": 0}
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def base_url(self, domain):
+        """Základní URL, kterou se nahradí https://www.<domain>"""
+        return f"{self.url}/{domain}"
+
+    def fixture(self, name):
+        if name not in self.cache:
+            with open(os.path.join(self.fixtures_dir, name), "rb") as f:
+                self.cache[name] = f.read()
+        return self.cache[name]
+
+    def route(self, path, query):
+        """Vrátí (status, content-type, tělo) pro požadovanou cestu"""
+        parts = path.strip("/").split("/")
+        domain = parts[0]
+        page = int(query.get("page", ["1"])[0])
+
+        if domain == "csu":
+            return self.route_csu(parts[1:])
+        if len(parts) > 1 and parts[1] in DETAIL_PATHS:
+            return 200, CONTENT_TYPES[".html"], self.fixture("detail_page.html")
+        if page > self.pages:
+            name = "empty_results.html"
+        elif domain == "prace.cz":
+            name = "prace_cz.html"
+        elif domain == "jobs.cz":
+            name = "jobs_cz.html"
+        elif len(parts) > 1 and parts[1] == "prace":
+            name = "generic_portal.html"
+        else:
+            return 404, CONTENT_TYPES[".html"], b"not found"
+        return 200, CONTENT_TYPES[".html"], self.fixture(name)
+
+    def route_csu(self, parts):
+        if parts and parts[0] == "product":
+            # Stránka produktu /csu/product/<soubor> odkazuje na daný soubor z fixtures,
+            # jinak na všechny datové soubory
+            names = sorted(n for n in os.listdir(self.fixtures_dir) if n.endswith((".csv", ".xlsx")))
+            if len(parts) > 1 and parts[1] in names:
+                names = [parts[1]]
+            links = "".join(f'<li><a href="{self.url}/csu/files/{name}">{name}</a></li>' for name in names)
+            html = f'<html><body><a href="/o-nas.html">O nás</a><ul>{links}</ul></body></html>'
+            return 200, CONTENT_TYPES[".html"], html.encode("utf-8")
+        if len(parts) == 2 and parts[0] == "files":
+            name = os.path.basename(parts[1])
+            if os.path.exists(os.path.join(self.fixtures_dir, name)):
+                ext = os.path.splitext(name)[1]
+                return 200, CONTENT_TYPES.get(ext, "application/octet-stream"), self.fixture(name)
+        return 404, CONTENT_TYPES[".html"], b"not found"
+
+    def start(self, host="127.0.0.1", port=0):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def respond(self, send_body):
+                with server.lock:
+                    server.stats["requests"] += 1
+                    delay = server.latency + server.random.uniform(0, server.jitter)
+                    fail = server.random.random() < server.error_rate
+                fail = fail or self.path.strip("/").split("/")[0] in server.down
+                if delay:
+                    time.sleep(delay)
+                if fail:
+                    with server.lock:
+                        server.stats["errors_injected"] += 1
+                    status, content_type, body = 503, CONTENT_TYPES[".html"], b"service unavailable"
+                else:
+                    url = urlsplit(self.path)
+                    status, content_type, body = server.route(url.path, parse_qs(url.query))
+
+                # Soubory ČSÚ mají ETag a umí podmíněný GET (If-None-Match -> 304)
+                etag = None
+                if status == 200 and self.path.startswith("/csu/files/"):
+                    etag = f'"{hashlib.sha1(body).hexdigest()[:16]}"'
+                    if self.headers.get("If-None-Match") == etag:
+                        status, body = 304, b""
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                if etag:
+                    self.send_header("ETag", etag)
+                self.end_headers()
+                if send_body:
+                    self.wfile.write(body)
+                    with server.lock:
+                        server.stats["bytes_sent"] += len(body)
+
+            def do_GET(self):
+                self.respond(send_body=True)
+
+            def do_HEAD(self):
+                self.respond(send_body=False)
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer((host, port), Handler)
+        self.httpd.daemon_threads = True
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        if self.httpd:
+            self.httpd.shutdown()
+            self.httpd.server_close()
+            self.httpd = None
+
+    def __enter__(self):
+        return self.start() if self.httpd is None else self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Lokální mock server portálů a ČSÚ")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0, help="pevná latence v sekundách")
+    parser.add_argument("--jitter", type=float, default=0.0, help="náhodná přidaná latence (max, s)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="podíl odpovědí 503")
+    parser.add_argument("--down", default="", help="čárkou oddělené portály, které vždy vrací 503")
+    parser.add_argument("--pages", type=int, default=3, help="počet stránek s výsledky")
+    args = parser.parse_args()
+
+    server = MockPortalServer(latency=args.latency, jitter=args.jitter,
+                              error_rate=args.error_rate, pages=args.pages,
+                              down=[d for d in args.down.split(",") if d]).start(port=args.port)
+    print(f"[MOCK] Bezi na {server.url} (Ctrl+C pro ukonceni)")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        server.stop()
@@ -0,0 +1,212 @@
+"""
+Lokální náhrada Supabase/PostgREST pro zátěžové testy uploadu
+Implementuje POST /rest/v1/<tabulka> (upsert s on_conflict a hlavičkou Prefer),
+jednoduchý GET a endpoint /_stats s velikostmi a latencemi požadavků.
+Umí simulovat throttling (429 + Retry-After) a výpadky (503).
+"""
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+
+def percentile(values, q):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class MockPostgrest:
+    """PostgREST-kompatibilní stand-in; data drží v paměti (volitelně jen počty)"""
+
+    def __init__(self, latency=0.0, latency_per_kb=0.0, throttle_rate=0.0, failure_rate=0.0,
+                 retry_after=1, keep_rows=True, seed=42):
+        self.latency = latency
+        self.latency_per_kb = latency_per_kb
+        self.throttle_rate = throttle_rate
+        self.failure_rate = failure_rate
+        self.retry_after = retry_after
+        self.keep_rows = keep_rows
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.tables = {}
+        self.reset_stats()
+        self.httpd = None
+
+    def reset_stats(self):
+        with self.lock:
+            self.request_bytes = []
+            self.latencies_ms = []
+            self.stats = {"requests": 0, "rows": 0, "throttled": 0, "failed": 0}
+
+    def summary(self):
+        """Souhrn pro /_stats - počty, velikosti a latence požadavků"""
+        with self.lock:
+            return {
+                **self.stats,
+                "bytes": sum(self.request_bytes),
+                "request_kb_p50": (percentile(self.request_bytes, 0.5) or 0) / 1024,
+                "request_kb_max": max(self.request_bytes, default=0) / 1024,
+                "latency_ms_p50": percentile(self.latencies_ms, 0.5),
+                "latency_ms_p95": percentile(self.latencies_ms, 0.95),
+                "table_rows": {name: len(rows) if isinstance(rows, dict) else rows
+                               for name, rows in self.tables.items()},
+            }
+
+    def upsert(self, table, rows, on_conflict, resolution):
+        """Uloží řádky; konflikt na klíči on_conflict buď sloučí, nebo ignoruje"""
+        with self.lock:
+            self.stats["rows"] += len(rows)
+            if not self.keep_rows:
+                self.tables[table] = self.tables.get(table, 0) + len(rows)
+                return
+            store = self.tables.setdefault(table, {})
+            keys = on_conflict.split(",") if on_conflict else None
+            for row in rows:
+                if keys:
+                    key = tuple(row.get(k) for k in keys)
+                else:
+                    # Bez on_conflict se řádek chová jako INSERT s novým id
+                    key = ("id", len(store) + 1)
+                if key in store and resolution == "ignore-duplicates":
+                    continue
+                if key in store:
+                    store[key].update(row)
+                else:
+                    store[key] = dict(row)
+
+    def start(self, host="127.0.0.1", port=0):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def send_json(self, status, payload=None, headers=None):
+                body = b"" if payload is None else json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                if body:
+                    self.wfile.write(body)
+
+            def do_GET(self):
+                url = urlsplit(self.path)
+                if url.path == "/_stats":
+                    return self.send_json(200, server.summary())
+                table = url.path.rsplit("/", 1)[-1]
+                rows = server.tables.get(table, {})
+                limit = int(parse_qs(url.query).get("limit", ["1000"])[0])
+                data = list(rows.values())[:limit] if isinstance(rows, dict) else []
+                self.send_json(200, data)
+
+            def do_DELETE(self):
+                if urlsplit(self.path).path == "/_stats":
+                    server.reset_stats()
+                    server.tables.clear()
+                    return self.send_json(204)
+                self.send_json(405, {"message": "not supported"})
+
+            def do_POST(self):
+                start = time.perf_counter()
+                url = urlsplit(self.path)
+                length = int(self.headers.get("Content-Length", 0))
+                body = self.rfile.read(length)
+
+                with server.lock:
+                    server.stats["requests"] += 1
+                    server.request_bytes.append(length)
+                    throttle = server.random.random() < server.throttle_rate
+                    fail = not throttle and server.random.random() < server.failure_rate
+
+                delay = server.latency + server.latency_per_kb * length / 1024
+                if delay:
+                    time.sleep(delay)
+
+                if throttle:
+                    with server.lock:
+                        server.stats["throttled"] += 1
+                    return self.send_json(429, {"message": "Too Many Requests", "code": "429"},
+                                          {"Retry-After": str(server.retry_after)})
+                if fail:
+                    with server.lock:
+                        server.stats["failed"] += 1
+                    return self.send_json(503, {"message": "Service Unavailable", "code": "503"})
+
+                rows = json.loads(body or b"[]")
+                if isinstance(rows, dict):
+                    rows = [rows]
+                table = url.path.rsplit("/", 1)[-1]
+                on_conflict = parse_qs(url.query).get("on_conflict", [""])[0]
+                prefer = self.headers.get("Prefer", "")
+                resolution = "ignore-duplicates" if "ignore-duplicates" in prefer else "merge-duplicates"
+                server.upsert(table, rows, on_conflict, resolution)
+
+                with server.lock:
+                    server.latencies_ms.append((time.perf_counter() - start) * 1000)
+                if "return=representation" in prefer:
+                    return self.send_json(201, rows)
+                self.send_json(201)
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer((host, port), Handler)
+        self.httpd.daemon_threads = True
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+        return self
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def stop(self):
+        if self.httpd:
+            self.httpd.shutdown()
+            self.httpd.server_close()
+            self.httpd = None
+
+    def __enter__(self):
+        return self.start() if self.httpd is None else self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def serve(port, ready=None, **kwargs):
+    """Spustí stand-in v samostatném procesu (aby neovlivňoval paměť klienta)"""
+    server = MockPostgrest(**kwargs).start(port=port)
+    if ready is not None:
+        ready.set()
+    try:
+        while True:
+            time.sleep(1)
+    finally:
+        server.stop()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Lokální PostgREST stand-in")
+    parser.add_argument("--port", type=int, default=54321)
+    parser.add_argument("--latency", type=float, default=0.0, help="pevná latence požadavku (s)")
+    parser.add_argument("--latency-per-kb", type=float, default=0.0, help="latence za kB těla (s)")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="podíl odpovědí 429")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="podíl odpovědí 503")
+    parser.add_argument("--count-only", action="store_true", help="neukládat řádky, jen počítat")
+    args = parser.parse_args()
+
+    print(f"[MOCK] PostgREST stand-in na http://127.0.0.1:{args.port} (Ctrl+C pro ukonceni)")
+    try:
+        serve(args.port, latency=args.latency, latency_per_kb=args.latency_per_kb,
+              throttle_rate=args.throttle_rate, failure_rate=args.failure_rate,
+              keep_rows=not args.count_only)
+    except KeyboardInterrupt:
+        pass
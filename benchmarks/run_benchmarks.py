@@ -0,0 +1,813 @@
+"""
+Offline benchmarky CzechPayGap
+Scraper, ČSÚ fetcher, step2_metrics a upload běží proti lokálnímu mock serveru
+a syntetickým datům. Výsledky se připisují do benchmarks/results/history.jsonl
+a porovnávají s posledním během se stejnou konfigurací.
+
+Použití:
+    python benchmarks/run_benchmarks.py
+    python benchmarks/run_benchmarks.py --only scraper,parse --latency 0.05 --error-rate 0.1
+    python benchmarks/run_benchmarks.py --only scraper --down jobs.cz
+"""
+import argparse
+import contextlib
+import datetime
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(BENCH_DIR)
+for _path in (os.path.join(ROOT_DIR, "scripts"), os.path.join(ROOT_DIR, "pipeline"), BENCH_DIR):
+    if _path not in sys.path:
+        sys.path.insert(0, _path)
+
+from mock_portal import FIXTURES_DIR, MockPortalServer  # noqa: E402
+
+RESULTS_DIR = os.path.join(BENCH_DIR, "results")
+HISTORY_FILE = os.path.join(RESULTS_DIR, "history.jsonl")
+
+# Metriky, kde je vyšší hodnota lepší (ostatní: nižší = lepší)
+HIGHER_IS_BETTER = ("per_sec",)
+# Nejvyšší přípustný podíl nezávislých nabídek označených za duplicitu
+DEDUP_MAX_FALSE_POSITIVES = 0.01
+
+GENERIC_PORTALS = ["profesia.cz", "startupjobs.cz", "dobraprace.cz"]
+REGIONS = ["Praha", "Středočeský kraj", "Jihomoravský kraj", "Moravskoslezský kraj",
+           "Ústecký kraj", "Plzeňský kraj", "Olomoucký kraj", "Zlínský kraj"]
+
+
+@contextlib.contextmanager
+def quiet():
+    """Potlačí výpisy měřeného kódu (včetně vláken)"""
+    with contextlib.redirect_stdout(io.StringIO()):
+        yield
+
+
+@contextlib.contextmanager
+def working_dir():
+    """Dočasný pracovní adresář s podsložkou data/ - benchmark nesahá na data repozitáře"""
+    previous = os.getcwd()
+    with tempfile.TemporaryDirectory(prefix="czpg_bench_") as tmp:
+        os.makedirs(os.path.join(tmp, "data"))
+        os.chdir(tmp)
+        try:
+            yield tmp
+        finally:
+            os.chdir(previous)
+
+
+def measure(fn, memory=True, warmup=False):
+    """Spustí fn dvakrát - jednou na čas, jednou pod tracemalloc na paměť
+
+    warmup=True přidá úvodní neměřený běh (načtení lazy importů apod.).
+    """
+    if warmup:
+        fn()
+    start = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - start
+
+    peak_mb = None
+    if memory:
+        tracemalloc.start()
+        try:
+            fn()
+            peak_mb = tracemalloc.get_traced_memory()[1] / 1024 / 1024
+        finally:
+            tracemalloc.stop()
+    return result, elapsed, peak_mb
+
+
+def synthetic_listings(rows, seed=42):
+    """Jednoduchá syntetická tabulka job_listings pro metriky a upload"""
+    import numpy as np
+    import pandas as pd
+
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "region": rng.choice(REGIONS, size=rows),
+        "salary_offer": rng.integers(18000, 120000, size=rows),
+        "job_title": rng.choice(["Účetní", "Skladník", "Developer", "Řidič", "Prodavač"], size=rows),
+        "source": rng.choice(["prace.cz", "jobs.cz"] + GENERIC_PORTALS, size=rows),
+        "page": rng.integers(1, 10, size=rows),
+    })
+
+
+def bench_parse(args, server):
+    """Čistý čas parsování jedné stránky (bez sítě)"""
+    from portal_adapters import PORTAL_ADAPTERS
+
+    pages = {
+        "prace_cz": lambda html: PORTAL_ADAPTERS["prace.cz"].parse(html, "Praha", 1),
+        "jobs_cz": lambda html: PORTAL_ADAPTERS["jobs.cz"].parse(html, "Praha", 1),
+        "generic": lambda html: PORTAL_ADAPTERS["profesia.cz"].parse(html, "Neznamy", 1),
+        # Stejné karty s JSON-LD - rychlá cesta bez DOM stromu
+        "structured": lambda html: PORTAL_ADAPTERS["profesia.cz"].parse(html, "Neznamy", 1),
+    }
+    fixtures = {"prace_cz": "prace_cz.html", "jobs_cz": "jobs_cz.html", "generic": "generic_portal.html",
+                "structured": "structured_portal.html"}
+
+    results = {}
+    for name, parse in pages.items():
+        with open(os.path.join(FIXTURES_DIR, fixtures[name]), encoding="utf-8") as f:
+            html = f.read()
+        records = 0
+        start = time.perf_counter()
+        for _ in range(args.parse_iterations):
+            records = len(parse(html))
+        elapsed = time.perf_counter() - start
+        results[f"{name}_parse_ms"] = elapsed / args.parse_iterations * 1000
+        results[f"{name}_records_per_page"] = records
+    return results
+
+
+def salary_parity(texts):
+    """Stejné texty přes normalize_salary (per-string) a DuckDB dávku -> seznam neshod"""
+    import salary_extract
+
+    expected = [salary_extract.normalize_salary(t) or {} for t in texts]
+    batch = salary_extract.normalize_salaries(texts).astype(object)
+    batch = batch.where(batch.notna(), None).to_dict("records")
+    return [(text, row) for text, want, row in zip(texts, expected, batch)
+            if any(want.get(c) != row[c] for c in salary_extract.NORMALIZED_COLUMNS)]
+
+
+def cached(fn, texts):
+    """Per-string cesta se stejnou deduplikací jako dávka - každý unikátní text jen jednou"""
+    cache = {}
+    return [cache[t] if t in cache else cache.setdefault(t, fn(t)) for t in texts]
+
+
+def bench_salary(args, server):
+    """Extrakce platů: per-string smyčka vs. dávka v DuckDB nad stejnou gramatikou
+
+    Poměry *_x porovnávají stejnou práci: dávku bez dedupe se smyčkou bez dedupe
+    a dávku s dedupe se smyčkou přes stejnou cache unikátních textů. Nad 1 = dávka
+    je rychlejší. per_string_legacy (extract_salary_from_text ze scraperu, jen první
+    číslo) je jen pro orientaci. Před měřením se ověří, že dávka dává na stejných
+    vstupech (včetně nezlomitelných mezer z HTML) totéž co normalize_salary.
+    """
+    import scrape_job_offers_advanced as scraper
+    import salary_extract
+    from synthetic_data import job_listing_chunks
+
+    texts = next(job_listing_chunks(args.rows, chunk_size=args.rows))["salary_text"].tolist()
+    sample = texts[:2000]
+    edge_cases = ["Stravenky 120 Kč", "příspěvek 500 Kč", "do 45 000 Kč", "210 Kč/hod", "1 200 Kč za den",
+                  "9000 CZK/WEEK", "40000 – 55000 CZK/MONTH", "1 500 EUR/month", "od 35 000 Kč/ měs.", None]
+    # Regrese: slovo hned za měnou není období (dřív "Kč Rokycany" -> rok, "Kč Hodonín" -> hod)
+    expected_periods = {
+        "45 000 Kč Rokycany": ("month", 45000), "35 000 Kč Hodonín": ("month", 35000),
+        "40 000 Kč denní směna": ("month", 40000), "45 000 Kč Dendrologie s.r.o.": ("month", 45000),
+        "45 000 Kč měsíčně": ("month", 45000), "250 Kč za hodinu": ("hour", 43325),
+        "600 000 Kč ročně": ("year", 50000), "30 000 Kč/měsíc": ("month", 30000),
+    }
+    got = {text: salary_extract.normalize_salary(text) or {} for text in expected_periods}
+    wrong = [(text, got[text]) for text, want in expected_periods.items()
+             if (got[text].get("salary_period"), got[text].get("salary_monthly")) != want]
+    if wrong:
+        raise RuntimeError(f"Spatne obdobi platu u {len(wrong)} textu, napr. {wrong[0]}")
+    parity = (sample + [t.replace(" ", "\xa0") for t in sample]
+              + [t.replace(" ", "\u202f") for t in sample] + edge_cases + list(expected_periods))
+    mismatches = salary_parity(parity)
+    if mismatches:
+        raise RuntimeError(f"DuckDB a normalize_salary se neshodnou u {len(mismatches)} textu, "
+                           f"napr. {mismatches[0]}")
+
+    # Stejné pole pro všechny varianty; první průchod DuckDB načte extension/regex cache
+    salary_extract.extract_salaries(texts[:100])
+
+    variants = {
+        "per_string_legacy": lambda: [scraper.extract_salary_from_text(t) for t in texts],
+        "per_string": lambda: [salary_extract.extract_salary(t) for t in texts],
+        "batch_duckdb": lambda: salary_extract.extract_salaries(texts, dedupe=False),
+        "per_string_dedupe": lambda: cached(salary_extract.extract_salary, texts),
+        "batch_dedupe": lambda: salary_extract.extract_salaries(texts),
+        "inline_normalize_dedupe": lambda: cached(salary_extract.normalize_salary, texts),
+        "batch_normalize": lambda: salary_extract.normalize_salaries(texts),
+    }
+    results = {"texts": len(texts), "unique_texts": len(set(texts)), "parity_texts": len(parity)}
+    for name, fn in variants.items():
+        _, elapsed, _ = measure(fn, memory=False)
+        results[f"{name}_ms"] = elapsed * 1000
+    # Dávka proti per-string cestě se stejnou gramatikou a stejnou deduplikací
+    for batch, loop in (("batch_duckdb", "per_string"), ("batch_dedupe", "per_string_dedupe"),
+                        ("batch_normalize", "inline_normalize_dedupe")):
+        results[f"{batch}_vs_{loop}_x"] = results[f"{loop}_ms"] / results[f"{batch}_ms"]
+    return results
+
+
+def bench_dedup(args, server):
+    """Duplicity napříč portály: nezávislé nabídky + vložené kopie na jiném portálu
+
+    Kontroly: nabídky jednoho portálu se navzájem nikdy nevyřadí - v každém shluku
+    zůstane tolik nabídek, kolik jich má jeho nejbohatší portál - a mezi nezávislými
+    nabídkami se za duplicitu označí nejvýš DEDUP_MAX_FALSE_POSITIVES.
+    """
+    import duckdb
+    import numpy as np
+    import pandas as pd
+    from listing_dedup import deduplicate
+    from synthetic_data import SOURCE_WEIGHTS, job_listing_chunks
+
+    rows = min(args.rows, 20_000)
+    listings = next(job_listing_chunks(rows, chunk_size=rows))
+    listings["detail_url"] = [f"https://{s}/nabidka/{i}/" for i, s in enumerate(listings["source"])]
+    rng = np.random.default_rng(7)
+    listings["location"] = rng.choice(["Kladno", "Beroun", "Kolín", "Mělník", "Příbram", "Benešov",
+                                       "Nymburk", "Rakovník", None], size=rows)
+    # Zaměstnavatel zhruba u čtyř pětin nabídek (portály ho ne vždy uvádějí)
+    employers = np.array([f"Firma {i} s.r.o." for i in range(rows // 4)] + [None] * (rows // 16), dtype=object)
+    listings["employer"] = rng.choice(employers, size=rows)
+    # Desetina nabídek visí ještě na jiném portálu (jiný odkaz, stejný obsah)
+    copies = listings.sample(frac=0.1, random_state=7).reset_index(drop=True)
+    portals = list(SOURCE_WEIGHTS)
+    shift = rng.integers(1, len(portals), size=len(copies))
+    copies["source"] = [portals[(portals.index(s) + k) % len(portals)] for s, k in zip(copies["source"], shift)]
+    copies["detail_url"] = [f"https://{s}/kopie/{i}/" for i, s in enumerate(copies["source"])]
+    # Jiný portál píše právní formu jinak
+    copies["employer"] = copies["employer"].str.replace(" s.r.o.", ", spol. s r. o.", regex=False)
+    batch = pd.concat([listings, copies], ignore_index=True)
+
+    with working_dir():
+        con = duckdb.connect("data/jobs.duckdb")
+        start = time.perf_counter()
+        result = deduplicate(batch, con)
+        elapsed = time.perf_counter() - start
+        con.close()
+
+    clustered = result[result["cluster_id"].notna()]
+    kept = clustered[~clustered["is_duplicate"]].groupby("cluster_id").size()
+    richest = clustered.groupby(["cluster_id", "source"]).size().groupby(level=0).max()
+    lost = int((richest - kept.reindex(richest.index, fill_value=0)).clip(lower=0).sum())
+    if lost:
+        raise RuntimeError(f"Deduplikace vyradila {lost} ruznych nabidek tehoz portalu")
+    originals_flagged = int(result["is_duplicate"].iloc[:len(listings)].sum())
+    if originals_flagged > DEDUP_MAX_FALSE_POSITIVES * len(listings):
+        raise RuntimeError(f"Deduplikace oznacila {originals_flagged} z {len(listings)} nezavislych nabidek")
+    copies_flagged = int(result["is_duplicate"].iloc[len(listings):].sum())
+    return {
+        "listings": len(batch),
+        "dedup_s": elapsed,
+        "injected_copies": len(copies),
+        "copies_flagged": copies_flagged,
+        "copies_recall": copies_flagged / len(copies),
+        "copies_with_employer": int(copies["employer"].notna().sum()),
+        "originals_flagged": originals_flagged,
+        "false_positive_rate": originals_flagged / len(listings),
+        "same_portal_lost": lost,
+    }
+
+
+def bench_region(args, server):
+    """Určení kraje z lokality: první vyhodnocení vs. opakované (cache) a dávka"""
+    import numpy as np
+    import region_lookup
+
+    rng = np.random.default_rng(42)
+    towns = [town for obce in region_lookup.MUNICIPALITIES.values() for town in obce]
+    suffixes = ["", " 2", " - centrum", ", okres", " a okolí", ", Česko"]
+    locations = [towns[i] + suffixes[j] for i, j in zip(rng.integers(0, len(towns), size=args.rows),
+                                                         rng.integers(0, len(suffixes), size=args.rows))]
+    unique = list(dict.fromkeys(locations))
+    region_lookup.get_index()
+
+    def cold():
+        region_lookup.resolve_region.cache_clear()
+        return [region_lookup.resolve_region(loc) for loc in unique]
+
+    _, cold_s, _ = measure(cold, memory=False)
+    _, warm_s, _ = measure(lambda: [region_lookup.resolve_region(loc) for loc in locations], memory=False)
+    resolved, batch_s, _ = measure(lambda: region_lookup.resolve_regions(locations), memory=False, warmup=True)
+    return {
+        "locations": len(locations),
+        "unique_locations": len(unique),
+        "cold_us_per_location": cold_s / len(unique) * 1e6,
+        "cached_us_per_location": warm_s / len(locations) * 1e6,
+        "batch_ms": batch_s * 1000,
+        "resolved_pct": float((resolved != region_lookup.UNKNOWN_REGION).mean() * 100),
+    }
+
+
+def bench_scraper(args, server):
+    """End-to-end scraping všech portálů proti mock serveru"""
+    import portal_adapters
+    import scrape_job_offers_advanced as scraper
+    from crawl_runtime import CrawlRuntime
+
+    saved = dict(portal_adapters.PORTAL_BASE_URLS)
+    for domain in portal_adapters.PORTAL_ADAPTERS:
+        portal_adapters.PORTAL_BASE_URLS[domain] = server.base_url(domain)
+    try:
+        server.reset_stats()
+        pages_before = []
+        runtimes = []
+
+        def run():
+            # Počet stránek bereme jen z prvního (časovaného) průchodu
+            runtimes.append(CrawlRuntime(rate_limit=False))
+            records = scraper.parallel_scrape(runtimes[-1], enrich_budget=0)
+            pages_before.append(server.stats["requests"])
+            return records
+
+        # Report běhu (data/crawl_report.json) nesmí přepsat ten v repozitáři
+        with working_dir(), quiet():
+            records, elapsed, peak_mb = measure(run, memory=args.memory)
+        requests_made = pages_before[0]
+        crawl = runtimes[0].metrics.totals()
+        breaker_trips = sum(b.trips for b in runtimes[0].breakers.values())
+    finally:
+        portal_adapters.PORTAL_BASE_URLS.clear()
+        portal_adapters.PORTAL_BASE_URLS.update(saved)
+
+    return {
+        "elapsed_s": elapsed,
+        "pages": requests_made,
+        "records": len(records),
+        "pages_per_sec": requests_made / elapsed,
+        "records_per_sec": len(records) / elapsed,
+        "fetch_retries": crawl["retries"],
+        "fetch_errors": crawl["errors"],
+        "breaker_trips": breaker_trips,
+        "skipped": crawl["skipped"],
+        "peak_mb": peak_mb,
+    }
+
+
+def bench_enrich(args, server):
+    """Doplnění z detailů: první běh stahuje v rámci rozpočtu, druhý jde z cache"""
+    import portal_adapters
+    import scrape_job_offers_advanced as scraper
+    from crawl_runtime import CrawlRuntime
+
+    saved = dict(portal_adapters.PORTAL_BASE_URLS)
+    for domain in portal_adapters.PORTAL_ADAPTERS:
+        portal_adapters.PORTAL_BASE_URLS[domain] = server.base_url(domain)
+    results = {"budget": args.enrich_budget}
+    try:
+        with working_dir():
+            for run in ("cold", "cached"):
+                runtime = CrawlRuntime(rate_limit=False)
+                server.reset_stats()
+                with quiet():
+                    start = time.perf_counter()
+                    records = scraper.parallel_scrape(runtime, enrich_budget=args.enrich_budget)
+                    elapsed = time.perf_counter() - start
+                results[f"{run}_elapsed_s"] = elapsed
+                results[f"{run}_requests"] = server.stats["requests"]
+                results[f"{run}_records"] = len(records)
+    finally:
+        portal_adapters.PORTAL_BASE_URLS.clear()
+        portal_adapters.PORTAL_BASE_URLS.update(saved)
+    return results
+
+
+def bench_csu(args, server):
+    """ČSÚ fetcher: přímé CSV a Excel přes fallback ze stránky produktu (HEAD + odkazy)
+
+    indexed_* = opakovaný běh s indexem odkazů nad nezměněnými soubory - ETag z HEAD
+    sedí s indexem, takže se nic nestahuje (indexed_bytes jsou jen stránky a 304).
+    """
+    import fetch_csu_data
+    from csu_schemas import WAGES_BY_REGION_SCHEMA
+    from csu_sources import CsuSource
+
+    with working_dir():
+        sources = [
+            CsuSource(name="wages_by_sector", description="sector", url=f"{server.url}/csu/product/sector",
+                      output="data/csu_wages_by_sector.csv",
+                      csv_url=f"{server.url}/csu/files/csu_110079.csv"),
+            CsuSource(name="wages_by_region", description="region", url=f"{server.url}/csu/product/csu_wages_by_region.xlsx",
+                      output="data/csu_wages_by_region.csv", schema=WAGES_BY_REGION_SCHEMA),
+        ]
+        with quiet():
+            collected, elapsed, peak_mb = measure(
+                lambda: fetch_csu_data.fetch_all(sources, index_path=None), memory=args.memory, warmup=True)
+            fetch_csu_data.fetch_all(sources, index_path="data/csu_link_index.json")
+            sent = server.stats["bytes_sent"]
+            indexed, indexed_s, _ = measure(
+                lambda: fetch_csu_data.fetch_all(sources, index_path="data/csu_link_index.json"), memory=False)
+            indexed_bytes = server.stats["bytes_sent"] - sent
+        if sorted(indexed) != sorted(collected):
+            raise RuntimeError(f"Beh s indexem nacetl jen {sorted(indexed)}")
+
+    rows = sum(len(df) for df in collected.values())
+    return {
+        "elapsed_s": elapsed,
+        "datasets": len(collected),
+        "rows": rows,
+        "records_per_sec": rows / elapsed,
+        "peak_mb": peak_mb,
+        "indexed_s": indexed_s,
+        "indexed_bytes": indexed_bytes,
+    }
+
+
+def bench_metrics(args, server):
+    """step2_metrics nad syntetickou tabulkou job_listings"""
+    import duckdb
+    import step2_metrics
+
+    with working_dir():
+        jobs = synthetic_listings(args.rows)
+        con = duckdb.connect("data/jobs.duckdb")
+        con.execute("CREATE TABLE job_listings AS SELECT * FROM jobs")
+        con.close()
+        con = duckdb.connect("data/csu_data.duckdb")
+        con.execute("CREATE TABLE wages_timeseries AS SELECT 2024 AS year, 2 AS quarter, 45000.0 AS value")
+        con.close()
+
+        with quiet():
+            _, elapsed, peak_mb = measure(step2_metrics.main, memory=args.memory)
+
+    return {
+        "elapsed_s": elapsed,
+        "rows": args.rows,
+        "records_per_sec": args.rows / elapsed,
+        "peak_mb": peak_mb,
+    }
+
+
+class RecordingClient:
+    """Supabase klient, který payload jen serializuje do JSON (jako skutečný klient) a změří"""
+
+    def __init__(self):
+        self.requests = 0
+        self.bytes = 0
+        self.lock = threading.Lock()
+
+    def table(self, name):
+        return RecordingRequest(self)
+
+
+class RecordingRequest:
+    """Jeden požadavek RecordingClient (upload běží paralelně ve vláknech)"""
+
+    def __init__(self, client):
+        self.client = client
+        self.payload = None
+
+    def upsert(self, records, **kwargs):
+        self.payload = records
+        return self
+
+    def execute(self):
+        size = len(json.dumps(self.payload, default=str))
+        with self.client.lock:
+            self.client.requests += 1
+            self.client.bytes += size
+        return self
+
+
+def bench_upload(args, server):
+    """Upload cesta (načtení CSV, příprava záznamů, serializace) bez sítě"""
+    import step1_upload
+
+    with working_dir():
+        synthetic_listings(args.rows).to_csv("data/job_listings.csv", index=False)
+        client = RecordingClient()
+        columns = ["region", "salary_offer", "source", "job_title"]
+        with quiet():
+            _, elapsed, peak_mb = measure(
+                lambda: step1_upload.upload_csv_to_supabase("data/job_listings.csv", "job_listings",
+                                                            columns=columns, client=client),
+                memory=args.memory)
+
+    return {
+        "elapsed_s": elapsed,
+        "rows": args.rows,
+        "records_per_sec": args.rows / elapsed,
+        "payload_mb": client.bytes / client.requests / 1024 / 1024 if client.requests else None,
+        "peak_mb": peak_mb,
+    }
+
+
+def bench_archive(args, server):
+    """Parquet archiv: velikost proti CSV, kompakce a dotazy s partition pruningem"""
+    import duckdb
+    import listing_archive
+    from synthetic_data import job_listing_chunks
+
+    runs = 3
+    with working_dir():
+        con = duckdb.connect("data/jobs.duckdb")
+        # Tři běhy nad stejnými 90 dny -> až tři malé soubory v každé partition
+        for chunk in job_listing_chunks(args.rows, days=90, chunk_size=-(-args.rows // runs)):
+            con.execute("CREATE OR REPLACE TABLE job_listings AS SELECT * FROM chunk")
+            listing_archive.archive_listings(con)
+            con.execute(f"COPY job_listings TO 'data/run_{runs}.csv' (HEADER)")
+            runs -= 1
+        con.close()
+        csv_bytes = sum(os.path.getsize(os.path.join("data", f)) for f in os.listdir("data") if f.endswith(".csv"))
+
+        with quiet():
+            start = time.perf_counter()
+            stats = listing_archive.compact_archive()
+            compact_s = time.perf_counter() - start
+        archive_bytes = sum(os.path.getsize(f) for _, files in listing_archive.partition_dirs() for f in files)
+
+        con = duckdb.connect()
+        listing_archive.register_views(con)
+        last_day = con.execute("SELECT MAX(scrape_date) FROM job_listings_history").fetchone()[0]
+        queries = {
+            "full": "SELECT region, MEDIAN(salary_offer) FROM job_listings_history GROUP BY region",
+            # Poslední týden jednoho portálu - čte jen 7 složek
+            "pruned": f"""SELECT region, MEDIAN(salary_offer) FROM job_listings_history
+                          WHERE scrape_date > DATE '{last_day}' - INTERVAL 7 DAY AND source = 'jobs.cz'
+                          GROUP BY region""",
+        }
+        timings = {}
+        for name, sql in queries.items():
+            con.execute(sql).fetchall()
+            start = time.perf_counter()
+            for _ in range(5):
+                con.execute(sql).fetchall()
+            timings[name] = (time.perf_counter() - start) / 5
+        con.close()
+
+    return {
+        "rows": args.rows,
+        "csv_mb": csv_bytes / 1024 / 1024,
+        "archive_mb": archive_bytes / 1024 / 1024,
+        "size_vs_csv_pct": archive_bytes / csv_bytes * 100,
+        "files_before": stats["files_before"],
+        "files_after": stats["files_after"],
+        "compact_s": compact_s,
+        "query_full_ms": timings["full"] * 1000,
+        "query_pruned_ms": timings["pruned"] * 1000,
+    }
+
+
+# Měření v čerstvém procesu: import Streamlitu a dva běhy skriptu aplikace přes AppTest
+STARTUP_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+imported = time.perf_counter()
+app = AppTest.from_file(sys.argv[1], default_timeout=120)
+app.run()
+first = time.perf_counter()
+app.run()
+rerun = time.perf_counter()
+print(json.dumps({
+    "import_s": imported - start,
+    "first_render_s": first - imported,
+    "rerun_s": rerun - first,
+    "errors": len(app.exception),
+}))
+"""
+
+
+def startup_probe():
+    """Spustí aplikaci v novém procesu (studený start), vrací naměřené časy"""
+    app_path = os.path.join(ROOT_DIR, "app", "streamlit_app.py")
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, "-c", STARTUP_PROBE, app_path],
+                            capture_output=True, text=True, timeout=300)
+    total = time.perf_counter() - start
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr.strip() else "probe selhal")
+    return {**json.loads(result.stdout.strip().splitlines()[-1]), "process_s": total}
+
+
+def bench_startup(args, server):
+    """Studený start dashboardu: načtení podkladů z pipeline vs. CSV a čas do prvního vykreslení"""
+    import importlib.util
+
+    import pandas as pd
+    from dashboard_views import build_views, load_views
+    from export_metrics import export_all, export_views
+
+    days, regions = 90, REGIONS
+    with working_dir():
+        dates = pd.date_range("2024-01-01", periods=days).repeat(len(regions))
+        pd.DataFrame({
+            "region": regions,
+            "avg_wage": [45000.0 + 1000 * i for i in range(len(regions))],
+            "avg_offer": [47000.0 + 900 * i for i in range(len(regions))],
+            "pay_gap": [2000.0 - 100 * i for i in range(len(regions))],
+            "pay_gap_pct": [4.0 - 0.2 * i for i in range(len(regions))],
+            "pay_gap_pct_ci_low": [2.0 - 0.2 * i for i in range(len(regions))],
+            "pay_gap_pct_ci_high": [6.0 - 0.2 * i for i in range(len(regions))],
+            "offers": [500 + 50 * i for i in range(len(regions))],
+        }).to_csv("data/wages_comparison.csv", index=False)
+        trend_values = [40000.0 + (i % 37) * 100 for i in range(len(dates))]
+        pd.DataFrame({
+            "scrape_date": dates, "region": regions * days,
+            "median_7d": trend_values, "median_30d": trend_values,
+            "wow_change_pct": [0.5] * len(dates),
+            "pay_gap_7d_pct": [3.0] * len(dates), "pay_gap_30d_pct": [3.0] * len(dates),
+        }).to_csv("data/wage_trends.csv", index=False)
+
+        with quiet():
+            export_all()
+            views_path = export_views()
+
+        # Totéž, co aplikace dělá při prvním načtení: podklady z pipeline, nebo CSV přes pandas
+        _, views_s, _ = measure(load_views, memory=False)
+        _, csv_s, _ = measure(lambda: build_views(pd.read_csv("data/wages_comparison.csv").to_dict("list"),
+                                                  pd.read_csv("data/wage_trends.csv").to_dict("list")),
+                              memory=False)
+        results = {
+            "views_kb": os.path.getsize(views_path) / 1024,
+            "views_load_ms": views_s * 1000,
+            "csv_build_ms": csv_s * 1000,
+        }
+
+        if not all(importlib.util.find_spec(m) for m in ("streamlit", "plotly")):
+            print("  [SKIP] streamlit/plotly nejsou nainstalovane - jen nacteni podkladu")
+            return results
+
+        probe = startup_probe()
+        results.update({
+            "import_s": probe["import_s"],
+            "first_render_s": probe["first_render_s"],
+            "rerun_s": probe["rerun_s"],
+            "process_s": probe["process_s"],
+            "errors": probe["errors"],
+        })
+        # Bez podkladů (starší běh pipeline) - aplikace dopočítá z CSV a importuje pandas
+        os.remove(views_path)
+        fallback = startup_probe()
+        results["first_render_csv_s"] = fallback["first_render_s"]
+    return results
+
+
+def bench_explorer(args, server):
+    """Prohlížeč nabídek: keyset stránky nad seřazeným Parquetem proti OFFSET"""
+    import duckdb
+    import listing_explorer
+    from export_metrics import export_all
+    from synthetic_data import job_listing_chunks
+
+    depth = 200
+    with working_dir():
+        con = duckdb.connect("data/jobs.duckdb")
+        for i, chunk in enumerate(job_listing_chunks(args.rows)):
+            if i == 0:
+                con.execute("CREATE OR REPLACE TABLE job_listings AS SELECT * FROM chunk")
+            else:
+                con.execute("INSERT INTO job_listings SELECT * FROM chunk")
+        con.close()
+        with quiet():
+            start = time.perf_counter()
+            export_all()
+            export_s = time.perf_counter() - start
+
+        con = listing_explorer.connect()
+        region = listing_explorer.filter_options(con)["regions"][0]
+        cursor = None
+        for _ in range(depth):
+            _, cursor = listing_explorer.fetch_page(con, after=cursor)
+        band = {"regions": [region], "salary_min": 40000, "salary_max": 50000}
+        page_size = listing_explorer.PAGE_SIZE
+        offset_sql = f"""SELECT * FROM listings ORDER BY COALESCE(salary_offer, 0) DESC, listing_id DESC
+                         LIMIT {page_size} OFFSET {depth * page_size}"""
+        cases = {
+            "first_page": lambda: listing_explorer.fetch_page(con),
+            "deep_page": lambda: listing_explorer.fetch_page(con, after=cursor),
+            "deep_offset": lambda: con.execute(offset_sql).fetchall(),
+            "filtered_page": lambda: listing_explorer.fetch_page(con, band, sort="salary_asc"),
+            "filtered_count": lambda: listing_explorer.count_listings(con, band),
+        }
+        timings = {name: measure(fn, memory=False, warmup=True)[1] for name, fn in cases.items()}
+        con.close()
+
+    return {
+        "rows": args.rows,
+        "export_s": export_s,
+        **{f"{name}_ms": elapsed * 1000 for name, elapsed in timings.items()},
+    }
+
+
+BENCHMARKS = {
+    "parse": bench_parse,
+    "salary": bench_salary,
+    "dedup": bench_dedup,
+    "region": bench_region,
+    "scraper": bench_scraper,
+    "enrich": bench_enrich,
+    "csu": bench_csu,
+    "metrics": bench_metrics,
+    "upload": bench_upload,
+    "archive": bench_archive,
+    "startup": bench_startup,
+    "explorer": bench_explorer,
+}
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT_DIR,
+                              capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def load_previous(config):
+    """Poslední uložený běh se stejnou konfigurací"""
+    if not os.path.exists(HISTORY_FILE):
+        return None
+    previous = None
+    with open(HISTORY_FILE, encoding="utf-8") as f:
+        for line in f:
+            record = json.loads(line)
+            if record.get("config") == config:
+                previous = record
+    return previous
+
+
+def compare(current, previous, threshold):
+    """Vypíše změny proti minulému běhu, vrací seznam regresí"""
+    regressions = []
+    print(f"\n[POROVNANI] proti behu {previous['timestamp']} ({previous.get('commit') or '?'})")
+    for bench, metrics in current["results"].items():
+        old_metrics = previous["results"].get(bench, {})
+        for metric, value in metrics.items():
+            old = old_metrics.get(metric)
+            if not isinstance(value, (int, float)) or not isinstance(old, (int, float)) or not old:
+                continue
+            change = (value - old) / old * 100
+            worse = -change if metric.endswith(HIGHER_IS_BETTER) else change
+            flag = ""
+            if metric.endswith(("_s", "_ms", "_mb", "per_sec")) and worse > threshold:
+                flag = "  <-- REGRESE"
+                regressions.append(f"{bench}.{metric}")
+            print(f"  {bench:8s} {metric:24s} {old:12.3f} -> {value:12.3f} ({change:+6.1f} %){flag}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Offline benchmarky CzechPayGap")
+    parser.add_argument("--only", help="čárkou oddělený seznam: " + ",".join(BENCHMARKS))
+    parser.add_argument("--latency", type=float, default=0.0, help="latence mock serveru (s)")
+    parser.add_argument("--jitter", type=float, default=0.0, help="náhodná přidaná latence (s)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="podíl odpovědí 503")
+    parser.add_argument("--down", default="", help="čárkou oddělené portály, které vždy vrací 503")
+    parser.add_argument("--pages", type=int, default=3, help="stránek výsledků na portál/kraj")
+    parser.add_argument("--rows", type=int, default=100_000, help="řádků pro metrics/upload")
+    parser.add_argument("--parse-iterations", type=int, default=20)
+    parser.add_argument("--enrich-budget", type=int, default=50, help="rozpočet detailů pro enrich")
+    parser.add_argument("--no-memory", dest="memory", action="store_false", help="neměřit paměť")
+    parser.add_argument("--no-save", dest="save", action="store_false", help="neukládat výsledky")
+    parser.add_argument("--threshold", type=float, default=10.0, help="hranice regrese v %%")
+    parser.add_argument("--fail-on-regression", action="store_true")
+    args = parser.parse_args(argv)
+
+    selected = args.only.split(",") if args.only else list(BENCHMARKS)
+    config = {
+        "benchmarks": selected, "latency": args.latency, "jitter": args.jitter,
+        "error_rate": args.error_rate, "down": args.down, "pages": args.pages, "rows": args.rows,
+        "enrich_budget": args.enrich_budget,
+    }
+
+    print("=" * 60)
+    print("CzechPayGap - offline benchmarky")
+    print("=" * 60)
+
+    results = {}
+    with MockPortalServer(latency=args.latency, jitter=args.jitter,
+                          error_rate=args.error_rate, pages=args.pages,
+                          down=[d for d in args.down.split(",") if d]) as server:
+        for name in selected:
+            print(f"\n[BENCH] {name}...")
+            results[name] = BENCHMARKS[name](args, server)
+            for metric, value in results[name].items():
+                shown = f"{value:.3f}" if isinstance(value, float) else value
+                print(f"  {metric:24s} {shown}")
+
+    record = {
+        "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+        "commit": git_commit(),
+        "config": config,
+        "results": results,
+    }
+
+    regressions = []
+    previous = load_previous(config)
+    if previous:
+        regressions = compare(record, previous, args.threshold)
+
+    if args.save:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        with open(HISTORY_FILE, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        print(f"\n[OK] Vysledky ulozeny: {HISTORY_FILE}")
+
+    if regressions:
+        print(f"[VAROVANI] Regrese: {', '.join(regressions)}")
+        if args.fail_on_regression:
+            return False
+    return True
+
+
+if __name__ == "__main__":
+    if not main():
+        sys.exit(1)
@@ -0,0 +1,297 @@
+"""
+Generátor syntetických dat v produkčním měřítku
+Vytvoří job_listings (až miliony řádků) se zešikmeným rozdělením krajů a portálů,
+pozicemi, platovými texty (rozpětí, "od", hodinovky) a daty scrapování,
+plus odpovídající tabulky ČSÚ (časové řady krajů, odvětví, Parquet úložiště).
+
+Výstup je adresář s data/jobs.duckdb, data/job_listings.parquet a data/csu_data.duckdb,
+takže nad ním jde přímo spustit step2_metrics, analyze skripty i dashboard:
+
+    python benchmarks/synthetic_data.py --rows 5000000 --out benchmarks/results/synthetic
+    cd benchmarks/results/synthetic && python ../../../pipeline/step2_metrics.py
+"""
+import argparse
+import contextlib
+import datetime
+import io
+import os
+import sys
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(BENCH_DIR)
+for _path in (os.path.join(ROOT_DIR, "scripts"), os.path.join(ROOT_DIR, "pipeline")):
+    if _path not in sys.path:
+        sys.path.insert(0, _path)
+
+from job_titles import classify_titles  # noqa: E402
+from salary_extract import NORMALIZED_COLUMNS, PERIOD_TO_MONTH, normalize_salaries  # noqa: E402
+
+DEFAULT_OUT_DIR = os.path.join(BENCH_DIR, "results", "synthetic")
+CHUNK_SIZE = 1_000_000
+
+# Podíl nabídek podle kraje (Praha a velká města výrazně převažují) a mzdový koeficient kraje
+REGION_WEIGHTS = {
+    "Praha": (0.29, 1.28),
+    "Jihomoravský kraj": (0.12, 1.03),
+    "Středočeský kraj": (0.10, 1.02),
+    "Moravskoslezský kraj": (0.08, 0.92),
+    "Plzeňský kraj": (0.055, 0.97),
+    "Ústecký kraj": (0.04, 0.90),
+    "Olomoucký kraj": (0.04, 0.90),
+    "Královéhradecký kraj": (0.035, 0.93),
+    "Pardubický kraj": (0.035, 0.92),
+    "Zlínský kraj": (0.035, 0.90),
+    "Jihočeský kraj": (0.035, 0.92),
+    "Kraj Vysočina": (0.03, 0.91),
+    "Liberecký kraj": (0.025, 0.93),
+    "Karlovarský kraj": (0.015, 0.87),
+    "Neznamy": (0.025, 1.00),
+}
+
+# Podíl portálů na všech nabídkách
+SOURCE_WEIGHTS = {
+    "jobs.cz": 0.42,
+    "prace.cz": 0.33,
+    "profesia.cz": 0.10,
+    "dobraprace.cz": 0.09,
+    "startupjobs.cz": 0.06,
+}
+
+# Pozice a typická měsíční mzda (Kč); četnost klesá podle pořadí (Zipf)
+JOB_TITLES = [
+    ("Skladník", 32000), ("Prodavač", 29000), ("Řidič", 38000), ("Obsluha výroby", 31000),
+    ("Účetní", 42000), ("Administrativní pracovník", 33000), ("Zdravotní sestra", 44000),
+    ("Obchodní zástupce", 45000), ("Elektrikář", 43000), ("Svářeč", 42000),
+    ("Kuchař", 32000), ("Číšník", 28000), ("Developer", 75000), ("Java Developer", 85000),
+    ("Projektový manažer", 70000), ("Mzdová účetní", 45000), ("Recepční", 30000),
+    ("Operátor call centra", 31000), ("Mechanik", 40000), ("Učitel", 46000),
+    ("Stavbyvedoucí", 62000), ("Data Analyst", 68000), ("IT Support", 45000),
+    ("Personalista", 48000), ("Uklízeč", 24000), ("Zámečník", 39000),
+    ("Marketing Specialist", 52000), ("Finanční analytik", 72000), ("Lékař", 90000),
+    ("Vedoucí prodejny", 46000),
+]
+
+# Tvary platového textu: rozpětí, "od", přesná částka, hodinová mzda
+SALARY_FORMATS = {
+    "range": 0.55,
+    "from": 0.20,
+    "exact": 0.13,
+    "hourly": 0.12,
+}
+
+
+# Celostátní průměrná mzda ČSÚ v prvním roce řady a meziroční růst
+CSU_BASE_WAGE = 26000
+CSU_YEARLY_GROWTH = 0.055
+CSU_MEASURE = "Průměrná hrubá měsíční mzda"
+# ČSÚ používá u dvou krajů jiné názvy než portály
+CSU_REGION_NAMES = {"Praha": "Hlavní město Praha", "Kraj Vysočina": "Vysočina"}
+CSU_SECTORS = {
+    "Zpracovatelský průmysl": 1.00, "Stavebnictví": 0.93, "Velkoobchod a maloobchod": 0.90,
+    "Doprava a skladování": 0.95, "Ubytování, stravování a pohostinství": 0.62,
+    "Informační a komunikační činnosti": 1.75, "Peněžnictví a pojišťovnictví": 1.68,
+    "Vzdělávání": 0.98, "Zdravotní a sociální péče": 1.05, "Veřejná správa a obrana": 1.12,
+}
+
+
+def weighted(choices):
+    names = list(choices)
+    weights = [choices[n][0] if isinstance(choices[n], tuple) else choices[n] for n in names]
+    total = sum(weights)
+    return names, [w / total for w in weights]
+
+
+def format_thousands(values):
+    """Čísla -> "45 000" (formátujeme jen unikátní hodnoty, mzdy jsou zaokrouhlené)"""
+    import numpy as np
+
+    unique, inverse = np.unique(values, return_inverse=True)
+    formatted = np.array([f"{int(v):,}".replace(",", " ") for v in unique], dtype=object)
+    return formatted[inverse]
+
+
+def job_listing_chunks(rows, seed=42, days=90, chunk_size=CHUNK_SIZE, end_date=None):
+    """Generuje job_listings po DataFrame blocích (paměť je omezená velikostí bloku)"""
+    import numpy as np
+    import pandas as pd
+
+    rng = np.random.default_rng(seed)
+    regions, region_p = weighted(REGION_WEIGHTS)
+    region_factor = np.array([REGION_WEIGHTS[r][1] for r in regions])
+    sources, source_p = weighted(SOURCE_WEIGHTS)
+    titles = np.array([t for t, _ in JOB_TITLES], dtype=object)
+    title_base = np.array([w for _, w in JOB_TITLES], dtype=float)
+    title_p = 1 / np.arange(1, len(JOB_TITLES) + 1) ** 0.9
+    title_p /= title_p.sum()
+    formats, format_p = weighted(SALARY_FORMATS)
+    end = pd.Timestamp(end_date or datetime.date.today()) + pd.Timedelta(days=1)
+    start = end - pd.Timedelta(days=days)
+
+    for offset in range(0, rows, chunk_size):
+        n = min(chunk_size, rows - offset)
+        region_idx = rng.choice(len(regions), size=n, p=region_p)
+        title_idx = rng.choice(len(titles), size=n, p=title_p)
+        fmt = np.array(formats)[rng.choice(len(formats), size=n, p=format_p)]
+
+        # Měsíční mzda: základ pozice x kraj x lognormální rozptyl, zaokrouhleno na 500 Kč
+        monthly = title_base[title_idx] * region_factor[region_idx] * rng.lognormal(0, 0.22, size=n)
+        salary_min = (np.round(monthly / 500) * 500).astype(np.int64)
+        salary_max = (np.round(salary_min * rng.uniform(1.1, 1.5, size=n) / 500) * 500).astype(np.int64)
+        hourly = np.maximum(np.round(monthly / PERIOD_TO_MONTH["hour"] / 5) * 5, 95).astype(np.int64)
+
+        text_min = format_thousands(salary_min)
+        text = np.where(fmt == "range", text_min + " – " + format_thousands(salary_max) + " Kč",
+               np.where(fmt == "from", "od " + text_min + " Kč",
+               np.where(fmt == "exact", text_min + " Kč",
+                        format_thousands(hourly) + " Kč/hod")))
+
+        # Strukturované platové sloupce stejnou normalizací jako v crawleru
+        salary = normalize_salaries(text)
+
+        seconds = rng.integers(0, days * 86400, size=n)
+        chunk = pd.DataFrame({
+            "region": np.array(regions, dtype=object)[region_idx],
+            "salary_offer": salary["salary_monthly"].to_numpy(),
+            "job_title": titles[title_idx],
+            "source": np.array(sources, dtype=object)[rng.choice(len(sources), size=n, p=source_p)],
+            "page": rng.integers(1, 11, size=n),
+            "scraped_at": start + pd.to_timedelta(seconds, unit="s"),
+            "salary_text": text,
+        })
+        for col in NORMALIZED_COLUMNS:
+            chunk[col] = salary[col].to_numpy()
+        chunk[["title_norm", "isco_code"]] = classify_titles(chunk["job_title"]).to_numpy()
+        yield chunk
+
+
+def csu_tables(seed=42, first_year=2015, last_year=None):
+    """Tabulky ČSÚ v normalizovaném tvaru (jako z fetch_csu_data) konzistentní s job_listings"""
+    import numpy as np
+    import pandas as pd
+
+    rng = np.random.default_rng(seed)
+    last_year = last_year or datetime.date.today().year - 1
+    region_factor = {CSU_REGION_NAMES.get(r, r): f for r, (_, f) in REGION_WEIGHTS.items() if r != "Neznamy"}
+    region_factor["Česká republika"] = 1.0
+
+    periods = [(y, q) for y in range(first_year, last_year + 1) for q in range(1, 5)]
+    national = {
+        (y, q): CSU_BASE_WAGE * (1 + CSU_YEARLY_GROWTH) ** (y - first_year + (q - 1) / 4)
+        * (1.06 if q == 4 else 1.0)  # prosincové odměny
+        for y, q in periods
+    }
+
+    timeseries = pd.DataFrame([
+        {"region": region, "year": y, "quarter": q, "measure": CSU_MEASURE,
+         "value": round(national[(y, q)] * factor * (1 if region == "Česká republika" else rng.normal(1, 0.01)))}
+        for region, factor in region_factor.items()
+        for y, q in periods
+    ])
+
+    latest_year = timeseries["year"].max()
+    by_region = timeseries[timeseries["year"] == latest_year].groupby("region", as_index=False).agg(
+        value=("value", "mean"))
+    by_region["year"] = latest_year
+    by_region["measure"] = CSU_MEASURE
+
+    by_sector = pd.DataFrame([
+        {"sector": sector, "year": y, "quarter": q, "measure": CSU_MEASURE,
+         "value": round(national[(y, q)] * factor * rng.normal(1, 0.01))}
+        for sector, factor in CSU_SECTORS.items()
+        for y, q in periods
+    ])
+    return {"wages_by_region": by_region, "wages_timeseries": timeseries, "wages_by_sector": by_sector}
+
+
+@contextlib.contextmanager
+def in_dir(path):
+    """Skripty pipeline pracují s relativními cestami data/... - generujeme přímo v cílovém adresáři"""
+    previous = os.getcwd()
+    os.makedirs(os.path.join(path, "data"), exist_ok=True)
+    os.chdir(path)
+    try:
+        yield path
+    finally:
+        os.chdir(previous)
+
+
+def write_job_listings(rows, seed=42, days=90, chunk_size=CHUNK_SIZE, db_path="data/jobs.duckdb",
+                       parquet_path="data/job_listings.parquet", csv_path=None):
+    """Zapíše job_listings do DuckDB (stejné schéma jako scraper) a do Parquetu/CSV"""
+    import duckdb
+
+    con = duckdb.connect(db_path)
+    try:
+        con.execute("DROP TABLE IF EXISTS job_listings")
+        con.execute("""
+            CREATE TABLE job_listings (
+                region VARCHAR,
+                salary_offer INTEGER,
+                job_title VARCHAR,
+                source VARCHAR,
+                page INTEGER,
+                scraped_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                salary_text VARCHAR,
+                salary_min INTEGER,
+                salary_max INTEGER,
+                salary_period VARCHAR,
+                currency VARCHAR,
+                salary_monthly INTEGER,
+                title_norm VARCHAR,
+                isco_code VARCHAR
+            )
+        """)
+        for chunk in job_listing_chunks(rows, seed, days, chunk_size):
+            con.execute("INSERT INTO job_listings SELECT * FROM chunk")
+        if parquet_path:
+            con.execute(f"COPY job_listings TO '{parquet_path}' (FORMAT PARQUET, COMPRESSION zstd)")
+        if csv_path:
+            con.execute(f"COPY job_listings TO '{csv_path}' (HEADER)")
+        return con.execute("SELECT COUNT(*) FROM job_listings").fetchone()[0]
+    finally:
+        con.close()
+
+
+def write_csu(seed=42, first_year=2015, db_path="data/csu_data.duckdb"):
+    """Zapíše tabulky ČSÚ stejnou cestou jako fetch_csu_data (Parquet úložiště + DuckDB)"""
+    import fetch_csu_data
+    from csu_store import append_datasets
+
+    collected = csu_tables(seed, first_year)
+    if os.path.exists(db_path):
+        os.remove(db_path)
+    append_datasets(collected)
+    with contextlib.redirect_stdout(io.StringIO()):
+        fetch_csu_data.save_to_duckdb(collected, db_path)
+    return {name: len(df) for name, df in collected.items()}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generátor syntetických dat CzechPayGap")
+    parser.add_argument("--rows", type=int, default=1_000_000, help="počet řádků job_listings")
+    parser.add_argument("--out", default=DEFAULT_OUT_DIR, help="cílový adresář (vytvoří se data/)")
+    parser.add_argument("--days", type=int, default=90, help="rozsah dat scrapování (dny zpět)")
+    parser.add_argument("--first-year", type=int, default=2015, help="první rok řad ČSÚ")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--csv", action="store_true", help="exportovat i data/job_listings.csv")
+    args = parser.parse_args(argv)
+
+    out_dir = os.path.abspath(args.out)
+    print(f"[SYNTH] Generuji {args.rows:,} nabidek do {out_dir}")
+    with in_dir(out_dir):
+        start = time.perf_counter()
+        count = write_job_listings(args.rows, args.seed, args.days, args.chunk_size,
+                                   csv_path="data/job_listings.csv" if args.csv else None)
+        print(f"[OK] job_listings: {count:,} radku ({time.perf_counter() - start:.1f} s)")
+
+        start = time.perf_counter()
+        csu_rows = write_csu(args.seed, args.first_year)
+        print(f"[OK] CSU: {', '.join(f'{k} {v}' for k, v in csu_rows.items())} "
+              f"({time.perf_counter() - start:.1f} s)")
+    return out_dir
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,19 @@
 # pipeline/run_pipeline.py
-import subprocess
 import datetime
-import sys
+import importlib
 import os
+import sys
+import time
+import traceback
 
 LOG_FILE = "pipeline/pipeline_log.txt"
 
+# Kroky pipeline jsou knihovny s funkcí main() - spouštíme je ve stejném procesu
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for _path in (os.path.join(ROOT_DIR, "scripts"), os.path.join(ROOT_DIR, "pipeline")):
+    if _path not in sys.path:
+        sys.path.insert(0, _path)
+
 def log(msg):
     ts = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     line = f"[{ts}] {msg}"
@@ -13,57 +21,136 @@ def log(msg):
     with open(LOG_FILE, "a", encoding="utf-8") as f:
         f.write(line + "\n")
 
-def run_script(script_path, description):
-    """Spustí Python script a loguje výsledek"""
+# Registr aktuálního běhu (pipeline_runs v data/jobs.duckdb), nastaví main()
+recorder = None
+
+def record_stage(module_name, description, status, started_at, duration, result=None, error=None):
+    """Zapíše krok do registru běhů - chyba registru nesmí shodit pipeline"""
+    if recorder is None:
+        return
+    try:
+        recorder.stage(module_name, description, status, started_at, duration, result, error)
+    except Exception as e:
+        log(f"⚠️  Registr běhů: {e}")
+
+def run_stage(module_name, description, **kwargs):
+    """Importuje modul kroku, zavolá jeho main() a loguje výsledek"""
     log(f"▶️  {description}")
-    result = subprocess.run(["python", script_path], capture_output=True, text=True)
-    
-    # Zobraz output
-    if result.stdout:
-        print(result.stdout)
-    
-    if result.returncode == 0:
-        log(f"✅ {description} - OK")
-        return True
-    else:
+    started_at = datetime.datetime.now()
+    start = time.time()
+    try:
+        module = importlib.import_module(module_name)
+        result = module.main(**kwargs)
+    except Exception as e:
+        log(f"❌ Error in {description}")
+        log(f"   Error: {e}")
+        traceback.print_exc()
+        record_stage(module_name, description, "failed", started_at, time.time() - start, error=str(e))
+        return False
+
+    if result is False:
         log(f"❌ Error in {description}")
-        if result.stderr:
-            log(f"   Error: {result.stderr}")
-            print(result.stderr)
+        record_stage(module_name, description, "failed", started_at, time.time() - start)
         return False
+    log(f"✅ {description} - OK ({time.time() - start:.1f} s)")
+    record_stage(module_name, description, "ok", started_at, time.time() - start, result)
+    return True
 
 def ensure_data_folder():
     """Vytvoří složku data/ pokud neexistuje"""
     os.makedirs("data", exist_ok=True)
 
-if __name__ == "__main__":
+def main(renormalize=False):
+    global recorder
+    from run_registry import RunRecorder
+
+    # Zajisti existenci složky data/ (registr běhů je v data/jobs.duckdb)
+    ensure_data_folder()
+    recorder = RunRecorder()
+    recorder.start()
+    ok = False
+    try:
+        ok = run_all(renormalize)
+    finally:
+        recorder.finish("success" if ok else "failed")
+    return ok
+
+def run_all(renormalize=False):
     log("=" * 60)
+    log(f"🆔 Běh pipeline {recorder.run_id}")
     log("🚀 CzechPayGap Pipeline Start")
     log("=" * 60)
-    
-    # Zajisti existenci složky data/
-    ensure_data_folder()
-    
+
     # KROK 1: Stáhnout data z ČSÚ
-    if not run_script("scripts/fetch_csu_data.py", "Stahování dat z ČSÚ"):
+    if not run_stage("fetch_csu_data", "Stahování dat z ČSÚ"):
         log("⚠️  Pipeline pokračuje i přes chybu v ČSÚ datech...")
-    
-    # KROK 2: Scrape pracovní nabídky (použij advanced verzi pokud existuje)
-    import os
-    scraper = "scripts/scrape_job_offers_advanced.py" if os.path.exists("scripts/scrape_job_offers_advanced.py") else "scripts/scrape_job_offers.py"
-    if not run_script(scraper, "Scraping pracovních nabídek (paralelní)"):
+
+    # KROK 2: Scrape pracovní nabídky
+    if not run_stage("scrape_job_offers_advanced", "Scraping pracovních nabídek (paralelní)"):
         log("⚠️  Pipeline pokračuje i přes chybu ve scrapingu...")
-    
+
+    # Slití malých souborů archivu nabídek (opakované běhy téhož dne); s --renormalize
+    # i přepočet platů uložených nabídek podle aktuálních pravidel salary_extract
+    if renormalize:
+        archive_ok = run_stage("listing_archive", "Kompakce archivu a přepočet platů", renormalize=True)
+    else:
+        archive_ok = run_stage("listing_archive", "Kompakce archivu nabídek")
+    if not archive_ok:
+        log("⚠️  Pipeline pokračuje i přes chybu v kompakci archivu...")
+
     # KROK 3: Upload dat do Supabase
-    if not run_script("pipeline/step1_upload.py", "Upload dat do Supabase"):
+    if not run_stage("step1_upload", "Upload dat do Supabase"):
         log("❌ Selhání uploadu - ukončuji pipeline")
-        sys.exit(1)
-    
+        return False
+
     # KROK 4: Výpočet metrik
-    if not run_script("pipeline/step2_metrics.py", "Výpočet metrik a pay gap"):
+    if not run_stage("step2_metrics", "Výpočet metrik a pay gap", ci_workers=os.cpu_count()):
         log("❌ Selhání výpočtu metrik - ukončuji pipeline")
-        sys.exit(1)
-    
+        return False
+
+    # KROK 5: Trendy (klouzavé mediány, pay gap v čase) - inkrementálně nad archivem
+    if not run_stage("step3_trends", "Výpočet trendů", rebuild=renormalize):
+        log("⚠️  Pipeline pokračuje i přes chybu ve výpočtu trendů...")
+
+    # Export metrik a snímku nabídek (Parquet, Arrow IPC, JSON) pro interní spotřebitele
+    if not run_stage("export_metrics", "Export metrik"):
+        log("⚠️  Pipeline pokračuje i přes chybu v exportu...")
+
     log("=" * 60)
     log("🎯 Pipeline finished successfully!")
     log("=" * 60)
+    return True
+
+def show_runs():
+    import duckdb
+    from run_registry import REGISTRY_DB_PATH, latest_successful_run, list_runs
+
+    with duckdb.connect(REGISTRY_DB_PATH) as con:
+        print(list_runs(con).to_string(index=False))
+        latest = latest_successful_run(con)
+    print(f"\nPosledni uspesny beh: {latest['run_id'] if latest else '-'}")
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Pipeline CzechPayGap")
+    parser.add_argument("--runs", action="store_true", help="vypsat registr běhů")
+    parser.add_argument("--rollback", nargs="?", const="", metavar="RUN_ID",
+                        help="vrátit výstupy na úspěšný běh (bez RUN_ID na předposlední)")
+    parser.add_argument("--renormalize", action="store_true",
+                        help="přepočítat platy uložených nabídek (job_listings, archiv) a celé trendy")
+    args = parser.parse_args()
+
+    if args.runs:
+        show_runs()
+    elif args.rollback is not None:
+        from run_registry import rollback
+
+        try:
+            mismatched = rollback(args.rollback or None)
+        except ValueError as e:
+            log(f"❌ Rollback: {e}")
+            sys.exit(1)
+        log(f"↩️  Rollback dokončen{' - nesedí otisk: ' + ', '.join(mismatched) if mismatched else ''}")
+    elif not main(args.renormalize):
+        sys.exit(1)
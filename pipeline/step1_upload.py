@@ -1,13 +1,8 @@
 # pipeline/step1_upload.py
 import os
-import pandas as pd
-from supabase import create_client
-from dotenv import load_dotenv
-
-load_dotenv()
-
-SUPABASE_URL = os.getenv("SUPABASE_URL")
-SUPABASE_KEY = os.getenv("SUPABASE_KEY")
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 
 # Definice tabulek pro různé datasety
 TABLES = {
@@ -18,60 +13,160 @@ TABLES = {
     "job_listings": "job_listings"
 }
 
-supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
+# Sloupce job_listings v Supabase (salary_offer = měsíční ekvivalent)
+JOB_LISTINGS_COLUMNS = ["region", "salary_offer", "source", "job_title",
+                        "salary_min", "salary_max", "salary_period", "currency", "salary_monthly",
+                        "is_outlier", "run_id"]
+
+# Dávkování uploadu - ladí se zátěžovým testem benchmarks/load_test_upload.py
+UPLOAD_BATCH_SIZE = 1000
+UPLOAD_WORKERS = 4
+UPLOAD_RETRIES = 3
+UPLOAD_RETRY_DELAY = 0.5
+# Strop pauzy i pro Retry-After serveru (jako MAX_RETRY_DELAY v crawl runtime)
+UPLOAD_MAX_RETRY_DELAY = 30.0
+# Odpovědi, u kterých server může poslat Retry-After
+RETRY_AFTER_STATUS = (429, 503)
+
+_supabase = None
+
+def get_supabase():
+    """Supabase klient - vytvoří se až při prvním použití a pak se sdílí"""
+    global _supabase
+    if _supabase is None:
+        from supabase import create_client
+        from dotenv import load_dotenv
+
+        load_dotenv()
+        _supabase = create_client(os.getenv("SUPABASE_URL"), os.getenv("SUPABASE_KEY"))
+    return _supabase
+
+def clean_records(df):
+    """DataFrame -> seznam záznamů pro JSON (NaN nahradíme None)"""
+    import pandas as pd
+
+    return df.astype(object).where(pd.notna(df), None).to_dict(orient="records")
+
+# Retry-After poslední odpovědi ve vlákně - APIError z postgrest hlavičky nenese
+_retry_after = threading.local()
+
+def remember_retry_after(response):
+    """httpx hook: Retry-After (v sekundách) z odpovědi 429/503 pro opakování v tomtéž vlákně"""
+    value = response.headers.get("Retry-After")
+    _retry_after.value = (float(value) if response.status_code in RETRY_AFTER_STATUS
+                          and value and value.isdigit() else None)
+
+def watch_retry_after(client):
+    """Zaregistruje hook na HTTP session klienta; klient bez postgrest.session (testovací) se přeskočí
+
+    Volá se jednou za upload před spuštěním vláken - session.event_hooks se přiřazuje celé.
+    """
+    session = getattr(getattr(client, "postgrest", None), "session", None)
+    hooks = getattr(session, "event_hooks", None)
+    if hooks is None:
+        return
+    if remember_retry_after not in hooks["response"]:
+        session.event_hooks = {**hooks, "response": [*hooks["response"], remember_retry_after]}
+
+def retry_delay(attempt, retry_after=None):
+    """Exponenciální pauza; Retry-After serveru má přednost"""
+    if retry_after is not None:
+        return min(retry_after, UPLOAD_MAX_RETRY_DELAY)
+    return min(UPLOAD_RETRY_DELAY * 2 ** attempt, UPLOAD_MAX_RETRY_DELAY)
+
+def upsert_batch(client, table_name, records, on_conflict=None, retries=UPLOAD_RETRIES):
+    """Pošle jednu dávku; při throttlingu/výpadku to zkusí znovu s rostoucí pauzou
+
+    Pošle-li server u 429/503 Retry-After, čeká se tak dlouho, jak žádá
+    (hook zaregistruje upsert_batches).
+    """
+    for attempt in range(retries + 1):
+        _retry_after.value = None
+        try:
+            client.table(table_name).upsert(
+                records, on_conflict=on_conflict or "", returning="minimal"
+            ).execute()
+            return len(records)
+        except Exception:
+            if attempt == retries:
+                raise
+            time.sleep(retry_delay(attempt, _retry_after.value))
 
-def upload_csv_to_supabase(csv_path, table_name, columns=None):
-    """Upload CSV souboru do Supabase tabulky"""
+def upsert_batches(client, table_name, batches, on_conflict=None,
+                   max_workers=UPLOAD_WORKERS, retries=UPLOAD_RETRIES):
+    """Paralelní upload dávek; v letu je nejvýš 2x max_workers dávek (omezená paměť)"""
+    uploaded = 0
+    watch_retry_after(client)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        in_flight = set()
+        for records in batches:
+            if len(in_flight) >= max_workers * 2:
+                done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                uploaded += sum(f.result() for f in done)
+            in_flight.add(executor.submit(upsert_batch, client, table_name, records, on_conflict, retries))
+        uploaded += sum(f.result() for f in in_flight)
+    return uploaded
+
+def iter_csv_batches(csv_path, columns=None, batch_size=UPLOAD_BATCH_SIZE):
+    """Čte CSV po částech a vrací dávky záznamů - celý soubor není nikdy v paměti"""
+    import pandas as pd
+
+    usecols = (lambda col: col in columns) if columns else None
+    for chunk in pd.read_csv(csv_path, usecols=usecols, chunksize=batch_size):
+        if columns:
+            chunk = chunk[[col for col in columns if col in chunk.columns]]
+        yield clean_records(chunk)
+
+def upload_csv_to_supabase(csv_path, table_name, columns=None, client=None, on_conflict=None,
+                           batch_size=UPLOAD_BATCH_SIZE, max_workers=UPLOAD_WORKERS):
+    """Upload CSV souboru do Supabase tabulky (po dávkách, paralelně)"""
     try:
-        if not os.path.exists(csv_path):
+        if not os.path.exists(csv_path) or os.path.getsize(csv_path) == 0:
             print(f"[SKIP] Soubor {csv_path} neexistuje, preskakuji...")
             return False
-        
-        df = pd.read_csv(csv_path)
-        if df.empty:
+
+        client = client or get_supabase()
+        print(f"[UPLOAD] {csv_path} -> {table_name} (davky po {batch_size}, {max_workers} vlaken)")
+        uploaded = upsert_batches(client, table_name, iter_csv_batches(csv_path, columns, batch_size),
+                                  on_conflict=on_conflict, max_workers=max_workers)
+        if uploaded == 0:
             print(f"[SKIP] Soubor {csv_path} je prazdny, preskakuji...")
             return False
-        
-        # Pokud jsou specifikovány sloupce, vybereme jen ty
-        if columns:
-            available_cols = [col for col in columns if col in df.columns]
-            df = df[available_cols]
-        
-        # Odstranění NaN hodnot (nahradíme None, což je JSON kompatibilní)
-        df = df.replace({pd.NA: None, float('nan'): None})
-        # Alternativně použijeme where
-        df = df.where(pd.notna(df), None)
-        
-        print(f"[UPLOAD] {len(df)} rows -> {table_name}")
-        supabase.table(table_name).upsert(df.to_dict(orient="records")).execute()
-        print("[OK] Done")
+        print(f"[OK] Done ({uploaded} rows)")
         return True
     except Exception as e:
         print(f"[ERROR] Chyba pri nahravani {csv_path}: {e}")
         return False
 
-if __name__ == "__main__":
+def main(client=None):
     print("="*60)
     print("NAHRAVANI DAT DO SUPABASE")
     print("="*60 + "\n")
-    
+
+    # Bez připojení nemá smysl pokračovat - chyba se propaguje do orchestrátoru
+    client = client or get_supabase()
+
     # Upload ČSÚ dat
     print("--- CSU Data ---")
     # csu_wages_by_region a csu_wages jsou stejná data, jen jiný název tabulky
     # Nahrávat jen jednou do csu_wages
     # upload_csv_to_supabase("data/csu_wages_by_region.csv", TABLES["csu_wages_by_region"])
-    upload_csv_to_supabase("data/csu_wages.csv", "csu_wages")
-    
-    upload_csv_to_supabase("data/csu_wages_by_sector.csv", TABLES["csu_wages_by_sector"])
-    upload_csv_to_supabase("data/csu_wages_timeseries.csv", TABLES["csu_wages_timeseries"])
+    upload_csv_to_supabase("data/csu_wages.csv", "csu_wages", client=client)
+
+    upload_csv_to_supabase("data/csu_wages_by_sector.csv", TABLES["csu_wages_by_sector"], client=client)
+    upload_csv_to_supabase("data/csu_wages_timeseries.csv", TABLES["csu_wages_timeseries"], client=client)
     # wage_structure má špatnou strukturu, přeskakujeme
     # upload_csv_to_supabase("data/csu_wage_structure.csv", TABLES["csu_wage_structure"])
-    
+
     # Upload dat z pracovních portálů
     print("\n--- Job Listings Data ---")
-    # job_listings tabulka očekává: region, salary_offer, source, job_title
-    upload_csv_to_supabase("data/job_listings.csv", TABLES["job_listings"], 
-                          columns=["region", "salary_offer", "source", "job_title"])
-    
+    # job_listings tabulka očekává: region, salary_offer, source, job_title + strukturovaný plat
+    upload_csv_to_supabase("data/job_listings.csv", TABLES["job_listings"],
+                          columns=JOB_LISTINGS_COLUMNS, client=client)
+
     print("\n[OK] Vsechna data nahrana do Supabase")
     print("="*60)
+    return True
+
+if __name__ == "__main__":
+    main()
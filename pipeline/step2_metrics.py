@@ -1,62 +1,225 @@
 # pipeline/step2_metrics.py
-import pandas as pd
-import duckdb
 import os
+import sys
 
-print("[LOAD] Loading data from DuckDB...")
+# Sdílené moduly ze scripts/ (klasifikace CZ-ISCO) i při spuštění kroku samostatně
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if os.path.join(ROOT_DIR, "scripts") not in sys.path:
+    sys.path.insert(0, os.path.join(ROOT_DIR, "scripts"))
 
-# Připojení k DuckDB databázím
-csu_db = duckdb.connect("data/csu_data.duckdb", read_only=True)
-jobs_db = duckdb.connect("data/jobs.duckdb", read_only=True)
+CSU_DB_PATH = "data/csu_data.duckdb"
+JOBS_DB_PATH = "data/jobs.duckdb"
 
-# Načtení dat z časových řad (nejnovější průměrná mzda pro ČR)
-timeseries = csu_db.execute("SELECT * FROM wages_timeseries ORDER BY region DESC LIMIT 1").fetchdf()
-avg_wage_cz = timeseries['value'].iloc[0]
-print(f"[CSU] Celkovy prumer CR z casovych rad: {avg_wage_cz:.0f} Kc")
+# Názvy krajů v ČSÚ, které se liší od názvů používaných scrapery
+CSU_REGION_ALIASES = {
+    "Hlavní město Praha": "Praha",
+    "Vysočina": "Kraj Vysočina",
+}
+NATIONAL_REGIONS = ("Česká republika", "Česko", "ČR", "CZ")
 
-# Načtení dat z job portálů
-jobs = jobs_db.execute("SELECT * FROM job_listings").fetchdf()
+def load_latest_csu_wages(con):
+    """Průměrná mzda za poslední čtvrtletí pro každý region z pohledu csu_latest"""
+    latest = con.execute("""
+        SELECT region, year, quarter, value
+        FROM csu_latest
+        WHERE dataset IN ('wages_timeseries', 'wages_by_region')
+          AND sector IS NULL AND sex IS NULL
+          AND (measure IS NULL OR measure ILIKE '%průměrn%mzd%')
+        QUALIFY ROW_NUMBER() OVER (
+            PARTITION BY region ORDER BY year DESC, quarter DESC NULLS LAST
+        ) = 1
+    """).fetchdf()
+    latest["region"] = latest["region"].replace(CSU_REGION_ALIASES)
+    return latest
 
-# Agregace dat z pracovních nabídek podle regionu a zdroje
-print(f"[DATA] Zpracovani {len(jobs)} nabidek z {jobs['source'].nunique() if 'source' in jobs.columns else 1} zdroju...")
+def load_csu_wages(con):
+    """Vrátí (celostátní průměr, {region: krajský průměr}) z dat ČSÚ"""
+    import duckdb
 
-# Celková agregace podle regionu
-agg_total = jobs.groupby("region").agg(
-    avg_offer=("salary_offer", "mean"),
-    median_offer=("salary_offer", "median"),
-    min_offer=("salary_offer", "min"),
-    max_offer=("salary_offer", "max"),
-    offers=("salary_offer", "count")
-).reset_index()
+    # Nejnovější čtvrtletí z dlouhého formátu časových řad
+    try:
+        latest = load_latest_csu_wages(con)
+        national = latest[latest["region"].isin(NATIONAL_REGIONS) | latest["region"].isna()]
+        avg_wage_cz = national["value"].iloc[0]
+        regional_wages = dict(zip(latest["region"], latest["value"]))
+        print(f"[CSU] Celkovy prumer CR ({national['year'].iloc[0]}/Q{national['quarter'].iloc[0]}): {avg_wage_cz:.0f} Kc")
+        print(f"[CSU] Krajske prumery k dispozici pro {len(regional_wages) - len(national)} regionu")
+        return avg_wage_cz, regional_wages
+    except (duckdb.Error, IndexError):
+        pass
 
-# Agregace podle regionu a zdroje (pokud existuje sloupec source)
-if "source" in jobs.columns:
-    agg_by_source = jobs.groupby(["region", "source"]).agg(
+    # Starší databáze bez Parquet úložiště - poslední řádek tabulky časových řad
+    ts_columns = [row[0] for row in con.execute("DESCRIBE wages_timeseries").fetchall()]
+    ts_order = "year DESC, quarter DESC NULLS LAST" if "year" in ts_columns else "region DESC"
+    timeseries = con.execute(f"SELECT * FROM wages_timeseries ORDER BY {ts_order} LIMIT 1").fetchdf()
+    avg_wage_cz = timeseries['value'].iloc[0]
+    print(f"[CSU] Celkovy prumer CR z casovych rad: {avg_wage_cz:.0f} Kc")
+    return avg_wage_cz, {}
+
+def add_confidence_intervals(merged, agg_by_source, jobs, workers=None):
+    """Bootstrap intervaly průměrné a mediánové nabídky (kraj, kraj x zdroj) a z nich interval pay gap"""
+    from bootstrap_ci import bootstrap_intervals
+
+    merged = merged.merge(bootstrap_intervals(jobs, "region", workers=workers), on="region", how="left")
+    # Průměr ČSÚ bereme jako pevnou hodnotu - nejistota je jen na straně nabídek
+    merged["pay_gap_pct_ci_low"] = ((merged["avg_offer_ci_low"] - merged["avg_wage"]) / merged["avg_wage"] * 100).round(2)
+    merged["pay_gap_pct_ci_high"] = ((merged["avg_offer_ci_high"] - merged["avg_wage"]) / merged["avg_wage"] * 100).round(2)
+
+    if agg_by_source is not None:
+        agg_by_source = agg_by_source.merge(
+            bootstrap_intervals(jobs, ["region", "source"], workers=workers), on=["region", "source"], how="left")
+    return merged, agg_by_source
+
+def compute_metrics(jobs, avg_wage_cz, regional_wages=None, confidence=True, ci_workers=None):
+    """Agregace nabídek podle regionu a výpočet pay gap -> (merged, agg_by_source)
+
+    confidence=True doplní bootstrap intervaly spolehlivosti (ci_workers = procesy pro resampling).
+    """
+    from region_lookup import UNKNOWN_REGION
+
+    # Nabídky, u kterých se kraj nepodařilo určit, nemají s čím porovnat
+    jobs = jobs[jobs["region"] != UNKNOWN_REGION]
+
+    # Odlehlé nabídky se do metrik nepočítají (plat se zamaskuje), *_all jsou ze všech nabídek
+    has_flags = "is_outlier" in jobs.columns
+    if has_flags:
+        outlier = jobs["is_outlier"].fillna(False).astype(bool)
+        jobs = jobs.assign(salary_all=jobs["salary_offer"], salary_offer=jobs["salary_offer"].mask(outlier))
+
+    # Celková agregace podle regionu (s příznaky i bez odlehlých - pořád jeden groupby)
+    aggregations = dict(
+        avg_offer=("salary_offer", "mean"),
+        median_offer=("salary_offer", "median"),
+        min_offer=("salary_offer", "min"),
+        max_offer=("salary_offer", "max"),
+        offers=("salary_offer", "count")
+    )
+    if has_flags:
+        aggregations.update(
+            avg_offer_all=("salary_all", "mean"),
+            median_offer_all=("salary_all", "median"),
+            min_offer_all=("salary_all", "min"),
+            max_offer_all=("salary_all", "max"),
+            outliers=("is_outlier", "sum")
+        )
+    agg_total = jobs.groupby("region").agg(**aggregations).reset_index()
+
+    # Agregace podle regionu a zdroje (pokud existuje sloupec source)
+    agg_by_source = None
+    if "source" in jobs.columns:
+        agg_by_source = jobs.groupby(["region", "source"]).agg(
+            avg_offer=("salary_offer", "mean"),
+            offers=("salary_offer", "count")
+        ).reset_index()
+
+    # Přidání ČSÚ průměru ke každému regionu
+    # Krajský průměr z posledního čtvrtletí, kde chybí, použijeme celkový průměr ČR
+    agg_total["avg_wage"] = agg_total["region"].map(regional_wages or {}).fillna(avg_wage_cz)
+    merged = agg_total
+    merged["pay_gap"] = merged["avg_offer"] - merged["avg_wage"]
+    merged["pay_gap_pct"] = ((merged["avg_offer"] - merged["avg_wage"]) / merged["avg_wage"] * 100).round(2)
+
+    if confidence:
+        merged, agg_by_source = add_confidence_intervals(merged, agg_by_source, jobs, ci_workers)
+
+    # Seřazení podle pay gap
+    merged = merged.sort_values("pay_gap", ascending=False)
+    return merged, agg_by_source
+
+def compute_occupation_metrics(jobs, avg_wage_cz, min_offers=5):
+    """Agregace nabídek podle povolání CZ-ISCO a pay gap vůči celostátnímu průměru"""
+    from job_titles import ISCO_OCCUPATIONS, classify_titles
+
+    if "is_outlier" in jobs.columns:
+        jobs = jobs[~jobs["is_outlier"].fillna(False).astype(bool)]
+    if "isco_code" not in jobs.columns:
+        # Starší databáze bez klasifikace - zařadíme názvy teď
+        jobs = jobs.assign(isco_code=classify_titles(jobs["job_title"])["isco_code"].to_numpy())
+
+    by_occupation = jobs.dropna(subset=["isco_code", "salary_offer"]).groupby("isco_code").agg(
         avg_offer=("salary_offer", "mean"),
+        median_offer=("salary_offer", "median"),
         offers=("salary_offer", "count")
     ).reset_index()
-    agg_by_source.to_csv("data/wages_by_source.csv", index=False)
-    print(f"[OK] Ulozena agregace podle zdroje: data/wages_by_source.csv")
-
-# Přidání ČSÚ průměru ke každému regionu
-# Prozatím používáme celkový průměr ČR pro všechny regiony
-agg_total["avg_wage"] = avg_wage_cz
-merged = agg_total.copy()
-merged["pay_gap"] = merged["avg_offer"] - merged["avg_wage"]
-merged["pay_gap_pct"] = ((merged["avg_offer"] - merged["avg_wage"]) / merged["avg_wage"] * 100).round(2)
-
-# Seřazení podle pay gap
-merged = merged.sort_values("pay_gap", ascending=False)
-
-merged.to_csv("data/wages_comparison.csv", index=False)
-print(f"[OK] Metriky vypocteny a ulozeny: data/wages_comparison.csv")
-print(f"\n[STATS] Statistiky:")
-print(f"  - Celkem regionu: {len(merged)}")
-print(f"  - Prumerny pay gap: {merged['pay_gap'].mean():.0f} Kc ({merged['pay_gap_pct'].mean():.1f}%)")
-print(f"  - Max pay gap: {merged['pay_gap'].max():.0f} Kc v {merged.iloc[0]['region']}")
-print(f"  - Min pay gap: {merged['pay_gap'].min():.0f} Kc v {merged.iloc[-1]['region']}")
-
-# Uzavření DuckDB připojení
-csu_db.close()
-jobs_db.close()
-print("\n[OK] DuckDB pripojeni uzavrena")
+    by_occupation = by_occupation[by_occupation["offers"] >= min_offers]
+    by_occupation.insert(1, "occupation", by_occupation["isco_code"].map(ISCO_OCCUPATIONS))
+    by_occupation["pay_gap"] = by_occupation["avg_offer"] - avg_wage_cz
+    by_occupation["pay_gap_pct"] = (by_occupation["pay_gap"] / avg_wage_cz * 100).round(2)
+    return by_occupation.sort_values("pay_gap", ascending=False)
+
+def print_stats(merged):
+    print(f"\n[STATS] Statistiky:")
+    print(f"  - Celkem regionu: {len(merged)}")
+    print(f"  - Prumerny pay gap: {merged['pay_gap'].mean():.0f} Kc ({merged['pay_gap_pct'].mean():.1f}%)")
+    print(f"  - Max pay gap: {merged['pay_gap'].max():.0f} Kc v {merged.iloc[0]['region']}")
+    print(f"  - Min pay gap: {merged['pay_gap'].min():.0f} Kc v {merged.iloc[-1]['region']}")
+    if "outliers" in merged.columns:
+        print(f"  - Odlehlych nabidek mimo metriky: {int(merged['outliers'].sum())} "
+              f"(prumerna nabidka bez nich {merged['avg_offer'].mean():.0f} Kc, se vsemi {merged['avg_offer_all'].mean():.0f} Kc)")
+    if "pay_gap_pct_ci_low" in merged.columns:
+        # Kraje s jedinou nabídkou interval nemají - bez intervalů řádek vynecháme
+        width = (merged["pay_gap_pct_ci_high"] - merged["pay_gap_pct_ci_low"]).dropna()
+        if width.empty:
+            return
+        widest = merged.loc[width.idxmax()]
+        print(f"  - Nejsirsi 95% interval pay gap: {widest['region']} "
+              f"({widest['pay_gap_pct_ci_low']:.1f} az {widest['pay_gap_pct_ci_high']:.1f} %, {widest['offers']} nabidek)")
+
+def main(csu_db_path=CSU_DB_PATH, jobs_db_path=JOBS_DB_PATH, ci_workers=None):
+    """ci_workers = procesy pro bootstrap; výchozí None počítá sériově (run_pipeline si procesy vyžádá)"""
+    import duckdb
+
+    print("[LOAD] Loading data from DuckDB...")
+
+    # Připojení k DuckDB databázím
+    csu_db = duckdb.connect(csu_db_path, read_only=True)
+    jobs_db = duckdb.connect(jobs_db_path, read_only=True)
+    try:
+        avg_wage_cz, regional_wages = load_csu_wages(csu_db)
+
+        # Načtení dat z job portálů (duplicity napříč portály se nepočítají, odlehlé mají příznak)
+        from salary_outliers import select_with_flags
+
+        jobs_columns = [row[0] for row in jobs_db.execute("DESCRIBE job_listings").fetchall()]
+        dedup_filter = "WHERE NOT is_duplicate" if "is_duplicate" in jobs_columns else ""
+        jobs = jobs_db.execute(select_with_flags(jobs_db, where=dedup_filter)).fetchdf()
+    finally:
+        # Uzavření DuckDB připojení
+        csu_db.close()
+        jobs_db.close()
+
+    # Agregace dat z pracovních nabídek podle regionu a zdroje
+    print(f"[DATA] Zpracovani {len(jobs)} nabidek z {jobs['source'].nunique() if 'source' in jobs.columns else 1} zdroju...")
+    merged, agg_by_source = compute_metrics(jobs, avg_wage_cz, regional_wages, ci_workers=ci_workers)
+
+    # Každý výstupní řádek nese běh pipeline; v DuckDB zůstává historie metrik všech běhů (rollback)
+    from run_registry import append_run_rows, current_run_id
+
+    run_id = current_run_id()
+    by_occupation = compute_occupation_metrics(jobs, avg_wage_cz) if "job_title" in jobs.columns else None
+    jobs_db = duckdb.connect(jobs_db_path)
+    try:
+        append_run_rows(jobs_db, "wages_comparison", merged, run_id)
+        if agg_by_source is not None:
+            append_run_rows(jobs_db, "wages_by_source", agg_by_source, run_id)
+        if by_occupation is not None:
+            append_run_rows(jobs_db, "wages_by_occupation", by_occupation, run_id)
+    finally:
+        jobs_db.close()
+    merged = merged.assign(run_id=run_id)
+
+    if agg_by_source is not None:
+        agg_by_source.assign(run_id=run_id).to_csv("data/wages_by_source.csv", index=False)
+        print(f"[OK] Ulozena agregace podle zdroje: data/wages_by_source.csv")
+
+    if by_occupation is not None:
+        by_occupation.assign(run_id=run_id).to_csv("data/wages_by_occupation.csv", index=False)
+        print(f"[OK] Ulozena agregace podle povolani CZ-ISCO ({len(by_occupation)}): data/wages_by_occupation.csv")
+
+    merged.to_csv("data/wages_comparison.csv", index=False)
+    print(f"[OK] Metriky vypocteny a ulozeny: data/wages_comparison.csv (beh {run_id})")
+    print_stats(merged)
+    return merged
+
+if __name__ == "__main__":
+    main()
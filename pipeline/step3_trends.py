@@ -0,0 +1,264 @@
+# pipeline/step3_trends.py
+import os
+import sys
+
+# Sdílené moduly ze scripts/ (archiv nabídek, neznámý kraj) i při spuštění kroku samostatně
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for _path in (os.path.join(ROOT_DIR, "scripts"), os.path.join(ROOT_DIR, "pipeline")):
+    if _path not in sys.path:
+        sys.path.insert(0, _path)
+
+from step2_metrics import CSU_DB_PATH, CSU_REGION_ALIASES, JOBS_DB_PATH, NATIONAL_REGIONS  # noqa: E402
+
+TRENDS_CSV_PATH = "data/wage_trends.csv"
+
+# Klouzavá okna (dny včetně aktuálního) a kolik dní zpět potřebuje přepočet jednoho dne
+# (30denní okno; 7denní okno o týden dříve pro mezitýdenní změnu se do něj vejde s rezervou)
+SHORT_WINDOW = 7
+LONG_WINDOW = 30
+LOOKBACK_DAYS = LONG_WINDOW + SHORT_WINDOW
+
+
+def load_csu_quarters(csu_con):
+    """Čtvrtletní průměrné mzdy ČSÚ (region, year, quarter, value); celostátní řada má region NULL"""
+    import duckdb
+
+    try:
+        quarters = csu_con.execute("""
+            SELECT region, year, quarter, AVG(value) AS value
+            FROM csu_timeseries
+            WHERE dataset = 'wages_timeseries'
+              AND sector IS NULL AND sex IS NULL
+              AND (measure IS NULL OR measure ILIKE '%průměrn%mzd%')
+              AND year IS NOT NULL AND quarter IS NOT NULL
+            GROUP BY region, year, quarter
+        """).fetchdf()
+    except duckdb.Error:
+        # Starší databáze bez Parquet úložiště - přímo tabulka časových řad
+        columns = [row[0] for row in csu_con.execute("DESCRIBE wages_timeseries").fetchall()]
+        region = "region" if "region" in columns else "CAST(NULL AS VARCHAR) AS region"
+        quarters = csu_con.execute(f"""
+            SELECT {region}, year, quarter, value
+            FROM wages_timeseries
+            WHERE year IS NOT NULL AND quarter IS NOT NULL AND value IS NOT NULL
+        """).fetchdf()
+
+    quarters["region"] = quarters["region"].replace(CSU_REGION_ALIASES)
+    quarters.loc[quarters["region"].isin(NATIONAL_REGIONS), "region"] = None
+    return quarters
+
+
+def listing_source(con):
+    """SQL zdroje nabídek: denní snímky z Parquet archivu, bez archivu jen aktuální job_listings"""
+    from listing_archive import register_views
+
+    if register_views(con):
+        table = "job_listings_daily"
+        date_expr = "scrape_date"
+    else:
+        table = "job_listings"
+        date_expr = "CAST(scraped_at AS DATE)"
+    columns = [row[0] for row in con.execute(f"DESCRIBE {table}").fetchall()]
+    filters = "".join(f" AND NOT COALESCE({flag}, FALSE)" for flag in ("is_duplicate", "is_outlier")
+                      if flag in columns)
+    return f"""
+        SELECT {date_expr} AS scrape_date, region, salary_offer
+        FROM {table}
+        WHERE salary_offer IS NOT NULL AND region != $unknown{filters}
+    """
+
+
+def materialize_daily(con):
+    """Denní agregace podle kraje (trend_daily) - přepočítá jen dny od posledního uloženého
+
+    Poslední uložený den se počítá znovu (mohl přibýt další běh téhož dne); díky
+    partition pruningu archivu se čtou jen složky těchto dnů. Vrací první přepočtený den.
+    """
+    from region_lookup import UNKNOWN_REGION
+
+    con.execute("""
+        CREATE TABLE IF NOT EXISTS trend_daily (
+            scrape_date DATE,
+            region VARCHAR,
+            offers INTEGER,
+            median_offer DOUBLE,
+            salaries INTEGER[]
+        )
+    """)
+    since = con.execute("SELECT MAX(scrape_date) FROM trend_daily").fetchone()[0]
+    date_filter = "WHERE scrape_date >= $since" if since else ""
+    params = {"unknown": UNKNOWN_REGION, **({"since": since} if since else {})}
+
+    con.execute(f"DELETE FROM trend_daily {date_filter}", {"since": since} if since else {})
+    # Platy dne si necháváme jako seznam - klouzavé mediány se pak počítají přesně
+    con.execute(f"""
+        INSERT INTO trend_daily
+        SELECT scrape_date, region, COUNT(*), MEDIAN(salary_offer), LIST(salary_offer)
+        FROM ({listing_source(con)})
+        {date_filter}
+        GROUP BY scrape_date, region
+    """, params)
+    return since
+
+
+def materialize_trends(con, csu_quarters, since=None):
+    """Klouzavé mediány, mezitýdenní změna a pay gap vůči čtvrtletí ČSÚ (wage_trends)
+
+    Přepočítají se dny od `since` a dny, které byly dosud porovnány jen se starším
+    čtvrtletím ČSÚ (nové čtvrtletí mezitím mohlo vyjít). Okna čtou z trend_daily
+    jen LOOKBACK_DAYS před prvním přepočítaným dnem.
+    """
+    con.execute("""
+        CREATE TABLE IF NOT EXISTS wage_trends (
+            scrape_date DATE,
+            region VARCHAR,
+            offers INTEGER,
+            median_offer DOUBLE,
+            median_7d DOUBLE,
+            offers_7d INTEGER,
+            median_30d DOUBLE,
+            offers_30d INTEGER,
+            median_7d_prev_week DOUBLE,
+            wow_change_pct DOUBLE,
+            csu_year INTEGER,
+            csu_quarter INTEGER,
+            csu_exact BOOLEAN,
+            avg_wage DOUBLE,
+            pay_gap_7d DOUBLE,
+            pay_gap_7d_pct DOUBLE,
+            pay_gap_30d_pct DOUBLE
+        )
+    """)
+    con.register("csu_quarters_df", csu_quarters)
+    con.execute("""
+        CREATE OR REPLACE TEMP TABLE csu_quarters AS
+        SELECT region, CAST(year AS INTEGER) AS year, CAST(quarter AS INTEGER) AS quarter, value,
+               make_date(CAST(year AS INTEGER), CAST(quarter AS INTEGER) * 3 - 2, 1) AS period_start
+        FROM csu_quarters_df
+    """)
+    con.unregister("csu_quarters_df")
+
+    # Dny porovnané se starším čtvrtletím, pro které ČSÚ mezitím vydal novější
+    provisional = con.execute("""
+        SELECT MIN(t.scrape_date)
+        FROM wage_trends t
+        WHERE NOT t.csu_exact AND EXISTS (
+            SELECT 1 FROM csu_quarters q
+            WHERE (q.region = t.region OR q.region IS NULL)
+              AND q.period_start <= t.scrape_date
+              AND q.year * 4 + q.quarter > COALESCE(t.csu_year * 4 + t.csu_quarter, 0)
+        )
+    """).fetchone()[0]
+    if since and provisional:
+        since = min(since, provisional)
+
+    date_filter = "scrape_date >= $since" if since else "TRUE"
+    lookback_filter = f"scrape_date >= $since - INTERVAL {LOOKBACK_DAYS} DAY" if since else "TRUE"
+    params = {"since": since} if since else {}
+    con.execute(f"DELETE FROM wage_trends WHERE {date_filter}", params)
+    con.execute(f"""
+        INSERT INTO wage_trends
+        WITH daily AS (
+            SELECT * FROM trend_daily
+            WHERE {lookback_filter}
+        ),
+        rolled AS (
+            SELECT
+                scrape_date, region, offers, median_offer,
+                list_median(flatten(LIST(salaries) OVER w_short)) AS median_7d,
+                SUM(offers) OVER w_short AS offers_7d,
+                list_median(flatten(LIST(salaries) OVER w_long)) AS median_30d,
+                SUM(offers) OVER w_long AS offers_30d
+            FROM daily
+            WINDOW
+                w_short AS (PARTITION BY region ORDER BY scrape_date
+                            RANGE BETWEEN INTERVAL {SHORT_WINDOW - 1} DAY PRECEDING AND CURRENT ROW),
+                w_long AS (PARTITION BY region ORDER BY scrape_date
+                           RANGE BETWEEN INTERVAL {LONG_WINDOW - 1} DAY PRECEDING AND CURRENT ROW)
+        ),
+        weekly AS (
+            -- Hodnota přesně o týden dříve (chybějící den = NULL, ne předchozí dostupný)
+            SELECT *, MAX(median_7d) OVER (
+                PARTITION BY region ORDER BY scrape_date
+                RANGE BETWEEN INTERVAL 7 DAY PRECEDING AND INTERVAL 7 DAY PRECEDING
+            ) AS median_7d_prev_week
+            FROM rolled
+        ),
+        matched AS (
+            -- Poslední čtvrtletí ČSÚ, které začalo nejpozději v den scrapu (krajské, jinak celostátní)
+            SELECT w.*,
+                   COALESCE(r.year, n.year) AS csu_year,
+                   COALESCE(r.quarter, n.quarter) AS csu_quarter,
+                   COALESCE(r.value, n.value) AS avg_wage
+            FROM weekly w
+            ASOF LEFT JOIN (SELECT * FROM csu_quarters WHERE region IS NOT NULL) r
+                ON w.region = r.region AND w.scrape_date >= r.period_start
+            ASOF LEFT JOIN (SELECT * FROM csu_quarters WHERE region IS NULL) n
+                ON w.scrape_date >= n.period_start
+        )
+        SELECT
+            scrape_date, region, offers, median_offer,
+            median_7d, offers_7d, median_30d, offers_30d, median_7d_prev_week,
+            ROUND((median_7d / median_7d_prev_week - 1) * 100, 2) AS wow_change_pct,
+            csu_year, csu_quarter,
+            COALESCE(csu_year = year(scrape_date) AND csu_quarter = quarter(scrape_date), FALSE) AS csu_exact,
+            avg_wage,
+            median_7d - avg_wage AS pay_gap_7d,
+            ROUND((median_7d - avg_wage) / avg_wage * 100, 2) AS pay_gap_7d_pct,
+            ROUND((median_30d - avg_wage) / avg_wage * 100, 2) AS pay_gap_30d_pct
+        FROM matched
+        WHERE {date_filter}
+    """, params)
+    return since
+
+
+def main(csu_db_path=CSU_DB_PATH, jobs_db_path=JOBS_DB_PATH, csv_path=TRENDS_CSV_PATH, rebuild=False):
+    """Trendy nad archivem; rebuild=True zahodí uložené řady a přepočítá celou historii
+
+    (po změně historických dat - přepočet platů v archivu, rollback job_listings)
+    """
+    import duckdb
+
+    print("[TRENDS] Nacitam ctvrtleti CSU...")
+    csu_db = duckdb.connect(csu_db_path, read_only=True)
+    try:
+        csu_quarters = load_csu_quarters(csu_db)
+    finally:
+        csu_db.close()
+
+    con = duckdb.connect(jobs_db_path)
+    try:
+        if rebuild:
+            con.execute("DROP TABLE IF EXISTS trend_daily")
+            con.execute("DROP TABLE IF EXISTS wage_trends")
+        since = materialize_daily(con)
+        print(f"[TRENDS] trend_daily prepocteno od {since or 'zacatku historie'}")
+        since = materialize_trends(con, csu_quarters, since)
+        print(f"[TRENDS] wage_trends prepocteno od {since or 'zacatku historie'}")
+
+        # Dashboard čte jen hotové řady - žádné skenování historie při načtení
+        trends = con.execute("SELECT * FROM wage_trends ORDER BY region, scrape_date").fetchdf()
+
+        # Snímek řad pro běh pipeline - jen přepočítané dny (od `since`, bez `since` celá historie);
+        # rollback z posloupnosti snímků obnoví trendy bez přepočtu
+        import pandas as pd
+        from run_registry import append_run_rows, current_run_id
+
+        run_id = current_run_id()
+        snapshot = trends if since is None else con.execute(
+            "SELECT * FROM wage_trends WHERE scrape_date >= ? ORDER BY region, scrape_date", [since]).fetchdf()
+        append_run_rows(con, "wage_trends_runs",
+                        snapshot.assign(snapshot_since=pd.Timestamp(since) if since else pd.NaT), run_id)
+        print(f"[TRENDS] Snimek behu: {len(snapshot)} z {len(trends)} radku")
+        trends = trends.assign(run_id=run_id)
+    finally:
+        con.close()
+
+    trends.to_csv(csv_path, index=False)
+    days = trends["scrape_date"].nunique() if len(trends) else 0
+    print(f"[OK] Trendy ulozeny: {csv_path} ({len(trends)} radku, {days} dni)")
+    return trends
+
+
+if __name__ == "__main__":
+    main()
@@ -61,6 +61,21 @@ def analyze_jobs():
         FROM job_listings
     """).fetchdf()
     print(stats.to_string(index=False))
+
+    # Bez odlehlých nabídek - FILTER ve stejném průchodu tabulkou
+    columns = [row[0] for row in con.execute("DESCRIBE job_listings").fetchall()]
+    if "is_outlier" in columns:
+        clean = con.execute("""
+            SELECT 
+                COUNT(*) FILTER (WHERE is_outlier) as outliers,
+                CAST(AVG(salary_offer) FILTER (WHERE NOT is_outlier) AS INTEGER) as avg,
+                CAST(MEDIAN(salary_offer) FILTER (WHERE NOT is_outlier) AS INTEGER) as median,
+                CAST(MIN(salary_offer) FILTER (WHERE NOT is_outlier) AS INTEGER) as min,
+                CAST(MAX(salary_offer) FILTER (WHERE NOT is_outlier) AS INTEGER) as max
+            FROM job_listings
+        """).fetchdf()
+        print("  Bez odlehlých nabídek:")
+        print(clean.to_string(index=False))
     
     # 5. Top 5 a Bottom 5 krajů podle průměrného platu
     print("\n[5] TOP 5 krajů s nejvyšším průměrným platem:")
@@ -91,19 +106,43 @@ def analyze_jobs():
     """).fetchdf()
     print(bottom5.to_string(index=False))
     
-    # 7. Top job titles (pokud existují)
-    print("\n[7] TOP 10 nejčastějších pracovních pozic:")
-    top_jobs = con.execute("""
-        SELECT 
-            job_title,
-            COUNT(*) as count,
-            CAST(AVG(salary_offer) AS INTEGER) as avg_salary
-        FROM job_listings
-        WHERE job_title IS NOT NULL
-        GROUP BY job_title
-        ORDER BY count DESC
-        LIMIT 10
-    """).fetchdf()
+    # 7. Top pozice - po normalizaci názvů a zařazení do CZ-ISCO (pokud existují)
+    if "isco_code" in columns:
+        from job_titles import occupations_frame
+
+        print("\n[7] TOP 10 nejčastějších povolání (CZ-ISCO):")
+        con.register("cz_isco", occupations_frame())
+        top_jobs = con.execute("""
+            SELECT 
+                j.isco_code,
+                o.occupation,
+                COUNT(*) as count,
+                COUNT(DISTINCT j.title_norm) as titles,
+                CAST(AVG(j.salary_offer) AS INTEGER) as avg_salary
+            FROM job_listings j
+            LEFT JOIN cz_isco o USING (isco_code)
+            WHERE j.isco_code IS NOT NULL
+            GROUP BY j.isco_code, o.occupation
+            ORDER BY count DESC
+            LIMIT 10
+        """).fetchdf()
+        unclassified = con.execute("""
+            SELECT COUNT(*) FROM job_listings WHERE job_title IS NOT NULL AND isco_code IS NULL
+        """).fetchone()[0]
+        print(f"  (Nezařazeno do CZ-ISCO: {unclassified:,} nabídek)")
+    else:
+        print("\n[7] TOP 10 nejčastějších pracovních pozic:")
+        top_jobs = con.execute("""
+            SELECT 
+                job_title,
+                COUNT(*) as count,
+                CAST(AVG(salary_offer) AS INTEGER) as avg_salary
+            FROM job_listings
+            WHERE job_title IS NOT NULL
+            GROUP BY job_title
+            ORDER BY count DESC
+            LIMIT 10
+        """).fetchdf()
     
     if len(top_jobs) > 0:
         print(top_jobs.to_string(index=False))
@@ -115,6 +154,21 @@ def analyze_jobs():
         SELECT COUNT(*) FROM job_listings WHERE job_title IS NOT NULL
     """).fetchone()[0]
     print(f"\n[8] Nabídky s job title: {total_with_titles:,} / {total:,} ({total_with_titles*100/total:.1f}%)")
+
+    # 9. Historie z Parquet archivu (jen pokud existuje)
+    from listing_archive import archive_exists, history_sql
+
+    if archive_exists():
+        print("\n[9] Archiv denních scrapů:")
+        history = con.execute(f"""
+            SELECT
+                COUNT(DISTINCT scrape_date) as days,
+                MIN(scrape_date) as first_day,
+                MAX(scrape_date) as last_day,
+                COUNT(*) as offers
+            FROM ({history_sql()})
+        """).fetchdf()
+        print(history.to_string(index=False))
     
     con.close()
     print("\n" + "="*70)
@@ -0,0 +1,313 @@
+"""
+Sdílené běhové prostředí crawleru portálů
+Adaptér portálu (portal_adapters) jen popisuje, odkud stránky brát a jak je číst;
+runtime pro všechny portály zajišťuje souběžnost (vlastní pool vláken na portál,
+portály běží naráz), omezení rychlosti na portál, opakování přechodných chyb,
+znovupoužití spojení (requests.Session na vlákno) a metriky běhu.
+
+Odolnost: přechodné chyby se opakují s exponenciální pauzou a jitterem,
+portál, který opakovaně selhává, odpojí jistič (circuit breaker) a každý portál
+má celkový časový limit - běh tak skončí v předvídatelném čase a report
+(data/crawl_report.json) uvádí, co se přeskočilo a proč.
+"""
+import datetime
+import json
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+HEADERS = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'}
+# (connect, read) - mrtvý host se pozná rychle, pomalá odpověď má víc času
+REQUEST_TIMEOUT = (3.05, 10)
+
+# Přechodné chyby (síť, 429, 5xx) se opakují s exponenciální pauzou a jitterem
+FETCH_RETRIES = 2
+RETRY_DELAY = 0.5
+MAX_RETRY_DELAY = 10.0
+TRANSIENT_STATUS = {429, 500, 502, 503, 504}
+
+# Jistič: po BREAKER_THRESHOLD chybách v řadě se portál na BREAKER_COOLDOWN s odpojí,
+# pak projde jediný zkušební požadavek (half-open)
+BREAKER_THRESHOLD = 5
+BREAKER_COOLDOWN = 30.0
+
+# Celkový čas na jeden portál od startu běhu (s)
+PORTAL_DEADLINE = 300.0
+
+REPORT_PATH = "data/crawl_report.json"
+
+METRIC_KEYS = ("targets", "pages", "records", "requests", "errors", "retries", "bytes", "fetch_s")
+
+
+class FetchError(Exception):
+    """Stránku se nepodařilo stáhnout ani po opakování"""
+
+
+class CircuitOpenError(FetchError):
+    """Jistič portálu je rozpojený - požadavek se vůbec neposlal"""
+
+
+class DeadlineExceeded(FetchError):
+    """Portál vyčerpal svůj časový limit"""
+
+
+class HostRateLimiter:
+    """Minimální rozestup požadavků na jeden portál, sdílený všemi vlákny"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.next_slot = {}
+
+    def wait(self, key, interval):
+        if interval <= 0:
+            return
+        with self.lock:
+            now = time.monotonic()
+            slot = max(now, self.next_slot.get(key, now))
+            self.next_slot[key] = slot + interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+class CircuitBreaker:
+    """Jistič jednoho portálu: closed -> open (po sérii chyb) -> half-open (zkušební požadavek)"""
+
+    def __init__(self, threshold=BREAKER_THRESHOLD, cooldown=BREAKER_COOLDOWN):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.lock = threading.Lock()
+        self.failures = 0
+        self.opened_at = None
+        self.probing = False
+        self.trips = 0
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return "closed"
+        return "half-open" if time.monotonic() - self.opened_at >= self.cooldown else "open"
+
+    def allow(self):
+        """Smí jít požadavek? V half-open jen jeden zkušební najednou"""
+        with self.lock:
+            state = self.state
+            if state == "closed":
+                return True
+            if state == "half-open" and not self.probing:
+                self.probing = True
+                return True
+            return False
+
+    def success(self):
+        with self.lock:
+            self.failures = 0
+            self.opened_at = None
+            self.probing = False
+
+    def failure(self):
+        with self.lock:
+            self.failures += 1
+            if self.probing or (self.opened_at is None and self.failures >= self.threshold):
+                self.opened_at = time.monotonic()
+                self.trips += 1
+            self.probing = False
+
+
+class CrawlMetrics:
+    """Počitadla po portálech a seznam přeskočených cílů (thread-safe)"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.portals = {}
+        self.skipped = []
+
+    def record(self, key, **counts):
+        with self.lock:
+            stats = self.portals.setdefault(key, dict.fromkeys(METRIC_KEYS, 0))
+            for name, value in counts.items():
+                stats[name] += value
+
+    def skip(self, key, what, reason):
+        """Zapíše, co se v běhu nestáhlo (cíl, stránka, detail) a proč"""
+        with self.lock:
+            self.skipped.append({"portal": key, "what": what, "reason": reason})
+
+    def totals(self):
+        with self.lock:
+            totals = {name: sum(stats[name] for stats in self.portals.values()) for name in METRIC_KEYS}
+            totals["skipped"] = len(self.skipped)
+            return totals
+
+    def report(self):
+        print("\n[CRAWL] Metriky podle portalu:")
+        with self.lock:
+            for key, stats in sorted(self.portals.items()):
+                print(f"  - {key}: {stats['pages']} stranek, {stats['records']} nabidek, "
+                      f"{stats['requests']} pozadavku ({stats['bytes'] / 1024:.0f} kB, "
+                      f"{stats['fetch_s']:.1f} s), chyby {stats['errors']}, opakovani {stats['retries']}")
+            if self.skipped:
+                print(f"[CRAWL] Preskoceno {len(self.skipped)}:")
+                for item in self.skipped[:20]:
+                    print(f"  - {item['portal']} {item['what']}: {item['reason']}")
+                if len(self.skipped) > 20:
+                    print(f"  ... a dalsich {len(self.skipped) - 20} (viz {REPORT_PATH})")
+
+
+class CrawlRuntime:
+    """Stahuje stránky pro adaptéry portálů a sbírá jejich nabídky
+
+    rate_limit=False vypne rozestupy mezi požadavky (benchmarky proti mock serveru).
+    """
+
+    def __init__(self, rate_limit=True, retries=FETCH_RETRIES, timeout=REQUEST_TIMEOUT,
+                 breaker_threshold=BREAKER_THRESHOLD, breaker_cooldown=BREAKER_COOLDOWN):
+        self.rate_limit = rate_limit
+        self.retries = retries
+        self.timeout = timeout
+        self.limiter = HostRateLimiter()
+        self.metrics = CrawlMetrics()
+        self.breaker_threshold = breaker_threshold
+        self.breaker_cooldown = breaker_cooldown
+        self.breakers = {}
+        self.deadlines = {}
+        self.lock = threading.Lock()
+        self.random = random.Random()
+        self._local = threading.local()
+
+    def session(self):
+        """requests.Session pro aktuální vlákno - keep-alive spojení na portál"""
+        if not hasattr(self._local, "session"):
+            import requests
+
+            self._local.session = requests.Session()
+            self._local.session.headers.update(HEADERS)
+        return self._local.session
+
+    def breaker(self, key):
+        with self.lock:
+            if key not in self.breakers:
+                self.breakers[key] = CircuitBreaker(self.breaker_threshold, self.breaker_cooldown)
+            return self.breakers[key]
+
+    def set_deadline(self, key, seconds):
+        """Portál smí stahovat nejvýš `seconds` od teď"""
+        self.deadlines[key] = time.monotonic() + seconds
+
+    def remaining(self, key):
+        deadline = self.deadlines.get(key)
+        return float("inf") if deadline is None else deadline - time.monotonic()
+
+    def backoff(self, attempt, retry_after=None):
+        """Exponenciální pauza s jitterem (0.5-1.5x); Retry-After serveru má přednost"""
+        if retry_after is not None:
+            return min(retry_after, MAX_RETRY_DELAY)
+        return min(RETRY_DELAY * 2 ** (attempt - 1) * self.random.uniform(0.5, 1.5), MAX_RETRY_DELAY)
+
+    def fetch(self, url, key, min_interval=0.0):
+        """Stáhne stránku jako text; přechodné chyby opakuje, jinak FetchError"""
+        import requests
+
+        breaker = self.breaker(key)
+        error = retry_after = None
+        for attempt in range(self.retries + 1):
+            if attempt:
+                delay = self.backoff(attempt, retry_after)
+                if delay >= self.remaining(key):
+                    break
+                self.metrics.record(key, retries=1)
+                time.sleep(delay)
+            if self.remaining(key) <= 0:
+                raise DeadlineExceeded(f"{url}: casovy limit portalu vycerpan")
+            if not breaker.allow():
+                raise CircuitOpenError(f"{url}: jistic portalu rozpojen")
+            if self.rate_limit:
+                self.limiter.wait(key, min_interval)
+
+            # Timeout požadavku nepřesáhne zbývající čas portálu
+            connect_timeout, read_timeout = self.timeout
+            remaining = max(self.remaining(key), 0.1)
+            timeout = (min(connect_timeout, remaining), min(read_timeout, remaining))
+            start = time.perf_counter()
+            try:
+                r = self.session().get(url, timeout=timeout)
+            except requests.RequestException as e:
+                self.metrics.record(key, requests=1, errors=1, fetch_s=time.perf_counter() - start)
+                breaker.failure()
+                error, retry_after = e, None
+                continue
+            self.metrics.record(key, requests=1, bytes=len(r.content), fetch_s=time.perf_counter() - start)
+            if r.status_code in TRANSIENT_STATUS:
+                self.metrics.record(key, errors=1)
+                breaker.failure()
+                error = f"HTTP {r.status_code}"
+                retry_after = r.headers.get("Retry-After")
+                retry_after = float(retry_after) if retry_after and retry_after.isdigit() else None
+                continue
+            breaker.success()
+            return r.text
+        raise FetchError(f"{url}: {error}")
+
+    def crawl_target(self, adapter, slug, region):
+        """Projde stránky výsledků jednoho cíle, dokud stránka nevrátí žádnou nabídku"""
+        results = []
+        self.metrics.record(adapter.name, targets=1)
+        for page in range(1, adapter.max_pages + 1):
+            try:
+                html = self.fetch(adapter.page_url(slug, page), adapter.name, adapter.min_interval)
+            except FetchError as e:
+                # Do reportu: cíl a od které stránky se nestahovalo
+                self.metrics.skip(adapter.name, f"{slug or '-'} od stranky {page}", str(e))
+                if not isinstance(e, (CircuitOpenError, DeadlineExceeded)):
+                    print(f"  [!] {adapter.name}/{slug or '-'}/page{page}: {e}")
+                break
+            page_results = adapter.parse(html, region, page)
+            self.metrics.record(adapter.name, pages=1, records=len(page_results))
+            results.extend(page_results)
+            if not page_results:
+                break
+        return results
+
+    def run(self, adapters):
+        """Spustí všechny cíle všech adaptérů; každý portál má vlastní pool vláken"""
+        for adapter in adapters:
+            self.set_deadline(adapter.name, adapter.deadline)
+        executors = [ThreadPoolExecutor(max_workers=adapter.concurrency) for adapter in adapters]
+        futures = {}
+        try:
+            for adapter, executor in zip(adapters, executors):
+                for slug, region in adapter.targets():
+                    future = executor.submit(self.crawl_target, adapter, slug, region)
+                    futures[future] = f"{adapter.name} / {region if slug else '-'}"
+
+            all_results = []
+            for completed, future in enumerate(as_completed(futures), 1):
+                label = futures[future]
+                try:
+                    results = future.result()
+                except Exception as e:
+                    print(f"  [{completed}/{len(futures)}] [!] {label}: {e}")
+                    continue
+                if results:
+                    all_results.extend(results)
+                    print(f"  [{completed}/{len(futures)}] {label}: {len(results)} nabidek")
+            return all_results
+        finally:
+            for executor in executors:
+                executor.shutdown()
+
+    def write_report(self, path=REPORT_PATH):
+        """Report běhu: metriky, stav jističů a přeskočené cíle (JSON)"""
+        with self.metrics.lock:
+            report = {
+                "finished_at": datetime.datetime.now().isoformat(timespec="seconds"),
+                "portals": {key: dict(stats) for key, stats in self.metrics.portals.items()},
+                "skipped": list(self.metrics.skipped),
+            }
+        for key, breaker in self.breakers.items():
+            report["portals"].setdefault(key, {}).update(breaker=breaker.state, breaker_trips=breaker.trips)
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        return report
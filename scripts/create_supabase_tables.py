@@ -71,6 +71,11 @@ def create_tables():
                 salary_offer INTEGER NOT NULL,
                 source TEXT,
                 job_title TEXT,
+                salary_min INTEGER,
+                salary_max INTEGER,
+                salary_period TEXT,
+                currency TEXT,
+                salary_monthly INTEGER,
                 created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
             );
         """,
@@ -0,0 +1,68 @@
+"""
+Perzistentní index vyřešených odkazů na soubory ČSÚ
+Pro každý dataset si pamatuje, odkud se data naposledy úspěšně stáhla,
+takže další běhy jdou rovnou na správný soubor místo procházení stránky produktu
+"""
+import datetime
+import json
+import os
+
+INDEX_PATH = "data/csu_link_index.json"
+
+# Jak dlouho věříme záznamu bez nového ověření
+MAX_AGE_DAYS = 30
+
+
+class LinkIndex:
+    """Index {kód datasetu: url, content_type, size, sha256, etag, last_verified}"""
+
+    def __init__(self, path=INDEX_PATH):
+        self.path = path
+        self.entries = {}
+        self.dirty = False
+        if os.path.exists(path):
+            try:
+                with open(path, encoding="utf-8") as f:
+                    self.entries = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"[VAROVANI] Index odkazu nelze nacist ({e}), zacinam znovu")
+
+    def get(self, key, max_age_days=MAX_AGE_DAYS):
+        """Vrátí záznam, pokud existuje a není starší než max_age_days"""
+        entry = self.entries.get(key)
+        if not entry:
+            return None
+        verified = datetime.datetime.fromisoformat(entry["last_verified"])
+        if datetime.datetime.now() - verified > datetime.timedelta(days=max_age_days):
+            return None
+        return entry
+
+    def record(self, key, url, content_type=None, size=None, sha256=None, etag=None):
+        """Zapíše (nebo obnoví) úspěšně vyřešený odkaz"""
+        previous = self.entries.get(key, {})
+        self.entries[key] = {
+            "url": url,
+            "content_type": content_type,
+            "size": size,
+            "sha256": sha256,
+            "etag": etag,
+            "last_verified": datetime.datetime.now().isoformat(timespec="seconds"),
+            "changed": previous.get("sha256") != sha256,
+        }
+        self.dirty = True
+
+    def forget(self, key):
+        """Odstraní záznam, který už nevede na použitelný soubor"""
+        if self.entries.pop(key, None) is not None:
+            self.dirty = True
+
+    def save(self):
+        """Atomicky uloží index na disk (jen pokud se změnil)"""
+        if not self.dirty:
+            return
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.entries, f, ensure_ascii=False, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.path)
+        self.dirty = False
@@ -0,0 +1,209 @@
+"""
+Streamované, schématem řízené čtení souborů ČSÚ
+CSV jde přes DuckDB read_csv (projekce a přetypování přímo v SQL),
+Excel přes openpyxl v read-only režimu - řádky se čtou postupně
+a DataFrame se sestaví jen jednou na konci
+"""
+import os
+import re
+import tempfile
+from io import BytesIO
+from itertools import chain
+
+import duckdb
+import pandas as pd
+
+from csu_schemas import DEFAULT_SCHEMA
+
+# "2024", "1. čtvrtletí 2024", "Q1 2024", "2024Q1", "1Q2024"
+PERIOD_RE = re.compile(
+    r"^\s*(?:(?P<q1>[1-4])\s*\.?\s*(?:čtvrtletí|ctvrtleti|q)\s*|q\s*(?P<q3>[1-4])\s+)?"
+    r"(?P<year>(?:19|20)\d{2})"
+    r"(?:\s*q\s*(?P<q2>[1-4]))?\s*$",
+    re.I,
+)
+THOUSANDS_RE = re.compile(r"\btis\.|\bv tisících|\bthousand", re.I)
+
+
+def parse_period(label):
+    """Rozloží popisek období na (rok, čtvrtletí); None pokud nejde o období"""
+    m = PERIOD_RE.match(str(label))
+    if not m:
+        return None
+    quarter = m.group("q1") or m.group("q2") or m.group("q3")
+    return int(m.group("year")), int(quarter) if quarter else None
+
+
+def resolve_columns(columns, schema):
+    """Přiřadí zdrojové sloupce kanonickým dimenzím -> [(zdroj, cíl)]"""
+    lookup = schema.lookup()
+    mapping, used = [], set()
+    for col in columns:
+        key = str(col).strip().lower()
+        canonical = lookup.get(key)
+        if canonical and canonical not in used:
+            mapping.append((col, canonical))
+            used.add(canonical)
+        elif schema.keep_extra_text_columns and key.endswith("_txt"):
+            mapping.append((col, key))
+    return mapping
+
+
+def read_csv_streaming(path, schema=DEFAULT_SCHEMA):
+    """CSV -> normalizovaný DataFrame jedním průchodem DuckDB"""
+    con = duckdb.connect()
+    try:
+        source = "read_csv(?, header=true)"
+        columns = [row[0] for row in con.execute(f"DESCRIBE SELECT * FROM {source}", [path]).fetchall()]
+        mapping = resolve_columns(columns, schema)
+        targets = {target for _, target in mapping}
+        if "value" not in targets:
+            # Široká tabulka nebo neznámý formát - dořeší obecná normalizace
+            return normalize_frame(con.execute(f"SELECT * FROM {source}", [path]).df(), schema)
+
+        multiplier = schema.unit_multiplier or 1
+        value_col = next(col for col, target in mapping if target == "value")
+        select = []
+        for col, target in mapping:
+            dtype = schema.dtypes.get(target, "VARCHAR")
+            expr = f'TRY_CAST("{col}" AS {dtype})'
+            if target == "value" and multiplier != 1:
+                expr = f"{expr} * {multiplier}"
+            select.append(f'{expr} AS "{target}"')
+        return con.execute(
+            f'SELECT {", ".join(select)} FROM {source} WHERE TRY_CAST("{value_col}" AS DOUBLE) IS NOT NULL',
+            [path],
+        ).df()
+    finally:
+        con.close()
+
+
+def detect_header(rows, schema):
+    """Najde index řádku s hlavičkou mezi prvními řádky Excelu"""
+    keywords = tuple(k.lower() for k in schema.header_keywords)
+    for i, row in enumerate(rows):
+        # c == c vyřadí i NaN z rámců načtených přes pandas
+        cells = [str(c).strip().lower() for c in row if c is not None and c == c and str(c).strip()]
+        if len(cells) < 2:
+            continue
+        keyword_hits = sum(any(cell.startswith(k) for k in keywords) for cell in cells)
+        period_hits = sum(parse_period(cell) is not None for cell in cells)
+        if keyword_hits >= 1 and (keyword_hits + period_hits) >= 2:
+            return i
+    return None
+
+
+def read_excel_streaming(source, schema=DEFAULT_SCHEMA):
+    """Excel (.xlsx) -> normalizovaný DataFrame přes openpyxl read-only"""
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(source, read_only=True, data_only=True)
+    try:
+        rows = workbook.worksheets[0].iter_rows(values_only=True)
+
+        # Hlavičku hledáme jen v prvních řádcích, zbytek listu se čte proudově
+        preamble = []
+        for row in rows:
+            preamble.append(row)
+            if len(preamble) >= schema.header_search_rows:
+                break
+        header_idx = detect_header(preamble, schema)
+        if header_idx is None:
+            header_idx = next((i for i, r in enumerate(preamble) if sum(c is not None for c in r) >= 2), 0)
+
+        multiplier = schema.unit_multiplier
+        if multiplier is None:
+            notes = " ".join(str(c) for r in preamble[:header_idx] for c in r if c is not None)
+            multiplier = 1000 if THOUSANDS_RE.search(notes) else 1
+
+        header = [str(c).strip() if c is not None else f"col{i}" for i, c in enumerate(preamble[header_idx])]
+        columns = {name: [] for name in header}
+        for row in chain(preamble[header_idx + 1:], rows):
+            if all(c is None for c in row):
+                continue
+            for name, value in zip(header, row):
+                columns[name].append(value)
+    finally:
+        workbook.close()
+
+    return normalize_frame(pd.DataFrame(columns), schema, multiplier)
+
+
+def normalize_frame(df, schema=DEFAULT_SCHEMA, multiplier=None):
+    """Obecná normalizace DataFrame podle schématu (bez kopií celého rámce)"""
+    if df is None or df.empty:
+        return None
+    if multiplier is None:
+        multiplier = schema.unit_multiplier or 1
+
+    mapping = resolve_columns(df.columns, schema)
+    df = df.rename(columns=dict(mapping))
+    dims = [target for _, target in mapping if target != "value"]
+
+    if "value" not in df.columns:
+        period_cols = [c for c in df.columns if c not in dims and parse_period(c)]
+        if period_cols and dims:
+            # Široká tabulka (Kraj | 2022 | 2023 ...) -> dlouhý formát
+            df = df.melt(id_vars=dims, value_vars=period_cols, var_name="period", value_name="value")
+            periods = {p: parse_period(p) for p in period_cols}
+            df["year"] = df["period"].map(lambda p: periods[p][0])
+            df["quarter"] = df["period"].map(lambda p: periods[p][1])
+            df = df.drop(columns="period")
+        else:
+            # Neznámé rozložení - první textový sloupec je region, první číselný hodnota
+            numeric = [c for c in df.columns if c not in dims
+                       and pd.to_numeric(df[c], errors="coerce").notna().any()]
+            text = dims or [c for c in df.columns if c not in numeric][:1]
+            if not numeric or not text:
+                return None
+            df = df[text + numeric[:1]]
+            df.columns = (dims or ["region"]) + ["value"]
+
+    df = df[[c for c in df.columns if c in schema.dtypes or str(c).endswith("_txt")]]
+    for col in df.columns:
+        dtype = schema.dtypes.get(col, "VARCHAR")
+        if dtype in ("INTEGER", "DOUBLE"):
+            df[col] = pd.to_numeric(df[col], errors="coerce")
+        if dtype == "INTEGER":
+            df[col] = df[col].astype("Int64")
+    df = df[df["value"].notna()]
+    if multiplier != 1:
+        df["value"] = df["value"] * multiplier
+    if "region" in df.columns:
+        df = df[df["region"].notna()]
+    return df.reset_index(drop=True) if not df.empty else None
+
+
+def frame_with_detected_header(raw, schema=DEFAULT_SCHEMA):
+    """Rámec načtený bez hlavičky (header=None) -> rámec s nalezenou hlavičkou"""
+    preamble = list(raw.head(schema.header_search_rows).itertuples(index=False, name=None))
+    header_idx = detect_header(preamble, schema)
+    if header_idx is None:
+        return raw
+    body = raw.iloc[header_idx + 1:]
+    body.columns = [str(c).strip() if pd.notna(c) else f"col{i}" for i, c in enumerate(preamble[header_idx])]
+    return body
+
+
+def parse_bytes(body, url, schema=DEFAULT_SCHEMA):
+    """Stažený soubor (CSV nebo Excel) -> normalizovaný DataFrame"""
+    lower = url.lower()
+    if ".xlsx" in lower:
+        return read_excel_streaming(BytesIO(body), schema)
+    if ".xls" in lower:
+        # Starý binární formát openpyxl neumí - jediná cesta je pandas
+        raw = pd.read_excel(BytesIO(body), sheet_name=0, header=None)
+        return normalize_frame(frame_with_detected_header(raw, schema), schema)
+
+    # DuckDB čte ze souboru - obsah zapíšeme do dočasného souboru
+    fd, path = tempfile.mkstemp(suffix=".csv")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(body)
+        try:
+            return read_csv_streaming(path, schema)
+        except (duckdb.InvalidInputException, UnicodeDecodeError):
+            # Starší exporty ČSÚ jsou ve windows-1250
+            return normalize_frame(pd.read_csv(path, encoding="cp1250"), schema)
+    finally:
+        os.remove(path)
@@ -0,0 +1,63 @@
+"""
+Schémata datasetů ČSÚ
+Popisují, jak se sloupce zdrojových souborů mapují na jednotné dimenze
+(region, sector, sex, year, quarter, measure, value), jaké mají typy,
+jak poznat hlavičku v Excelu a v jakých jednotkách jsou hodnoty
+"""
+from dataclasses import dataclass, field
+
+# Kanonické dimenze a jejich typy (DuckDB typy)
+DIMENSION_TYPES = {
+    "region": "VARCHAR",
+    "sector": "VARCHAR",
+    "sex": "VARCHAR",
+    "year": "INTEGER",
+    "quarter": "INTEGER",
+    "measure": "VARCHAR",
+    "value": "DOUBLE",
+}
+
+# Názvy sloupců v otevřených datech ČSÚ (CSV) a v excelových tabulkách
+DEFAULT_COLUMNS = {
+    "value": ("hodnota", "value", "hodnota_num"),
+    "region": ("uzemi_txt", "uzemiz_txt", "vuzemi_txt", "kraj", "území", "uzemi", "region"),
+    "sector": ("odvetvi_txt", "cznace_txt", "odvětví", "odvetvi", "sector"),
+    "sex": ("pohlavi_txt", "pohlaví", "pohlavi", "sex"),
+    "year": ("rok", "year"),
+    "quarter": ("ctvrtleti", "čtvrtletí", "quarter"),
+    "measure": ("stapro_txt", "ukazatel_txt", "ukazatel", "measure"),
+}
+
+# Klíčová slova, podle kterých v Excelu poznáme řádek s hlavičkou
+DEFAULT_HEADER_KEYWORDS = ("kraj", "území", "odvětví", "ukazatel", "rok", "čtvrtletí", "pohlaví")
+
+
+@dataclass(frozen=True)
+class DatasetSchema:
+    """Popis struktury jednoho datasetu"""
+    columns: dict = field(default_factory=lambda: dict(DEFAULT_COLUMNS))
+    dtypes: dict = field(default_factory=lambda: dict(DIMENSION_TYPES))
+    header_keywords: tuple = DEFAULT_HEADER_KEYWORDS
+    # Kolik prvních řádků Excelu prohledat při hledání hlavičky
+    header_search_rows: int = 30
+    # Převod na Kč - např. 1000 pro tabulky "v tis. Kč"; None = detekce z poznámek nad hlavičkou
+    unit_multiplier: float | None = None
+    # Sloupce *_txt, které nemají kanonickou dimenzi, se zachovají pod svým názvem
+    keep_extra_text_columns: bool = True
+
+    def lookup(self):
+        """Mapa {název zdrojového sloupce (lowercase): kanonická dimenze}"""
+        return {name.lower(): canonical
+                for canonical, names in self.columns.items()
+                for name in names}
+
+
+DEFAULT_SCHEMA = DatasetSchema()
+
+WAGES_BY_REGION_SCHEMA = DatasetSchema(
+    header_keywords=("kraj", "území", "region"),
+)
+
+WAGE_STRUCTURE_SCHEMA = DatasetSchema(
+    columns={**DEFAULT_COLUMNS, "measure": ("spkvantil_txt", "stapro_txt", "ukazatel")},
+)
@@ -0,0 +1,88 @@
+"""
+Deklarativní registr datových zdrojů ČSÚ
+Nový dataset = nový záznam v registru, fetcher se o zbytek postará sám
+"""
+from dataclasses import dataclass
+
+from csu_schemas import DEFAULT_SCHEMA, WAGE_STRUCTURE_SCHEMA, WAGES_BY_REGION_SCHEMA, DatasetSchema
+
+# Šablony URL, na kterých ČSÚ publikuje CSV podle kódu datasetu
+CSV_URL_TEMPLATES = (
+    # Formát 1: documents s aktuálním datem
+    "https://www.czso.cz/documents/10180/184344914/{code}data090825.csv",
+    "https://www.czso.cz/documents/10180/184344914/{code}data.csv",
+    # Formát 2: csu.cz downloads
+    "https://csu.gov.cz/sites/default/files/{code}data.csv",
+    # Formát 3: vdb export
+    "https://vdb.czso.cz/vdbvo2/faces/cs/download?pvo={code}&f=CSV",
+    # Formát 4: přímý download
+    "https://www.czso.cz/documents/10180/{code}",
+)
+
+
+@dataclass(frozen=True)
+class CsuSource:
+    """Popis jednoho datasetu ČSÚ"""
+    name: str
+    description: str
+    url: str  # stránka produktu (fallback pro hledání odkazů)
+    output: str
+    code: str | None = None
+    csv_url: str | None = None
+    schema: DatasetSchema = DEFAULT_SCHEMA
+
+    @property
+    def index_key(self):
+        """Klíč v indexu odkazů - kód datasetu, pokud ho známe"""
+        return self.code or self.name
+
+    def candidate_urls(self):
+        """Přímé URL, které se závodí paralelně (přímá CSV URL má přednost)"""
+        urls = [self.csv_url] if self.csv_url else []
+        if self.code:
+            urls.extend(t.format(code=self.code) for t in CSV_URL_TEMPLATES)
+        return urls
+
+
+CSU_SOURCES = {}
+
+
+def register_source(source):
+    """Přidá dataset do registru (klíčem je source.name)"""
+    CSU_SOURCES[source.name] = source
+    return source
+
+
+register_source(CsuSource(
+    name="wages_by_region",
+    # Aktualizovaná URL - zkusíme obecnou stránku s přehledem
+    url="https://www.czso.cz/csu/czso/cri/prumerne-mzdy-1-ctvrtleti-2024",
+    description="Průměrné mzdy podle krajů",
+    output="data/csu_wages_by_region.csv",
+    schema=WAGES_BY_REGION_SCHEMA,
+))
+
+register_source(CsuSource(
+    name="wages_by_sector",
+    url="https://csu.gov.cz/produkty/zamestnanci-a-prumerne-hrube-mesicni-mzdy-podle-odvetvi",
+    code="110079-25",
+    csv_url="https://csu.gov.cz/docs/107508/185d8d2f-675c-fa34-dbe6-8fb0034d3d32/110079-25data090825.csv?version=1.0",
+    description="Zaměstnanci a mzdy podle odvětví",
+    output="data/csu_wages_by_sector.csv",
+))
+
+register_source(CsuSource(
+    name="wages_timeseries",
+    url="https://csu.gov.cz/produkty/pmz_cr",
+    code="110030-25",
+    description="Mzdy, náklady práce – časové řady",
+    output="data/csu_wages_timeseries.csv",
+))
+
+register_source(CsuSource(
+    name="wage_structure",
+    url="https://csu.gov.cz/produkty/struktura-mezd-zamestnancu-2024",
+    description="Struktura mezd zaměstnanců 2024",
+    output="data/csu_wage_structure.csv",
+    schema=WAGE_STRUCTURE_SCHEMA,
+))
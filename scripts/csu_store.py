@@ -0,0 +1,165 @@
+"""
+Dlouhý formát časových řad ČSÚ v Parquetu
+Každé pozorování je jeden řádek (dataset, region, sector, sex, year, quarter,
+measure, value). Soubory jsou rozdělené podle dataset/year (hive partitioning),
+takže dotazy na jeden dataset nebo pár let čtou jen příslušné složky.
+Každý běh připisuje jen nová nebo změněná pozorování - historie se hromadí.
+"""
+import datetime
+import os
+
+import duckdb
+
+STORE_DIR = "data/csu_store"
+
+# Klíč pozorování (bez value) a všechny sloupce úložiště
+KEY_COLUMNS = ["dataset", "region", "sector", "sex", "year", "quarter", "measure"]
+LONG_COLUMNS = KEY_COLUMNS + ["value", "fetched_at"]
+
+# Typ každého sloupce v úložišti (chybějící dimenze se doplní jako NULL)
+COLUMN_TYPES = {
+    "dataset": "VARCHAR",
+    "region": "VARCHAR",
+    "sector": "VARCHAR",
+    "sex": "VARCHAR",
+    "year": "INTEGER",
+    "quarter": "INTEGER",
+    "measure": "VARCHAR",
+    "value": "DOUBLE",
+    "fetched_at": "TIMESTAMP",
+}
+
+# Celorepublikové řádky ČSÚ
+NATIONAL_REGIONS = ("Česká republika", "Česko", "ČR", "CZ")
+
+
+def store_exists(store_dir=STORE_DIR):
+    """True, pokud úložiště obsahuje alespoň jeden Parquet soubor"""
+    for _, _, files in os.walk(store_dir):
+        if any(f.endswith(".parquet") for f in files):
+            return True
+    return False
+
+
+def load_incoming(con, name, df, fetched_at):
+    """Normalizovaný DataFrame datasetu -> dočasná tabulka incoming v dlouhém formátu"""
+    present = set(df.columns)
+    select = []
+    for col in LONG_COLUMNS:
+        if col == "dataset":
+            select.append("CAST($name AS VARCHAR) AS dataset")
+        elif col == "fetched_at":
+            select.append("CAST($fetched_at AS TIMESTAMP) AS fetched_at")
+        elif col in present:
+            select.append(f'TRY_CAST("{col}" AS {COLUMN_TYPES[col]}) AS {col}')
+        else:
+            select.append(f"CAST(NULL AS {COLUMN_TYPES[col]}) AS {col}")
+    con.register("incoming_df", df)
+    con.execute(f"""
+        CREATE OR REPLACE TEMP TABLE incoming AS
+        SELECT * FROM (SELECT {', '.join(select)} FROM incoming_df) WHERE value IS NOT NULL
+    """, {"name": name, "fetched_at": fetched_at})
+    con.unregister("incoming_df")
+
+
+def append_datasets(collected_data, store_dir=STORE_DIR, fetched_at=None):
+    """Připíše stažené datasety do úložiště, vrací {dataset: počet nových řádků}"""
+    fetched_at = fetched_at or datetime.datetime.now()
+    con = duckdb.connect()
+    written = {}
+    try:
+        has_history = store_exists(store_dir)
+        for name, df in collected_data.items():
+            if df is None or df.empty:
+                continue
+            load_incoming(con, name, df, fetched_at)
+
+            if has_history:
+                # Jen nová nebo revidovaná pozorování - čteme pouze partition tohoto datasetu
+                con.execute(f"""
+                    DELETE FROM incoming AS i
+                    WHERE EXISTS (
+                        SELECT 1 FROM ({latest_sql(store_dir)}) AS s
+                        WHERE s.dataset = $name
+                          AND {' AND '.join(f's.{c} IS NOT DISTINCT FROM i.{c}' for c in KEY_COLUMNS[1:])}
+                          AND s.value IS NOT DISTINCT FROM i.value
+                    )
+                """, {"name": name})
+
+            count = con.execute("SELECT COUNT(*) FROM incoming").fetchone()[0]
+            if count:
+                os.makedirs(store_dir, exist_ok=True)
+                con.execute(f"""
+                    COPY incoming TO '{store_dir}'
+                    (FORMAT PARQUET, PARTITION_BY (dataset, year), APPEND,
+                     FILENAME_PATTERN 'run_{{uuid}}', COMPRESSION zstd)
+                """)
+            written[name] = count
+    finally:
+        con.close()
+    return written
+
+
+def latest_sql(store_dir=STORE_DIR):
+    """SQL s poslední verzí každého pozorování (revize ČSÚ přepisují starší hodnoty)"""
+    return f"""
+        SELECT {', '.join(LONG_COLUMNS)}
+        FROM read_parquet('{store_dir}/**/*.parquet', hive_partitioning = true, union_by_name = true)
+        QUALIFY ROW_NUMBER() OVER (
+            PARTITION BY {', '.join(KEY_COLUMNS)} ORDER BY fetched_at DESC
+        ) = 1
+    """
+
+
+def register_views(con, store_dir=STORE_DIR):
+    """Zaregistruje pohledy nad úložištěm v DuckDB databázi"""
+    if not store_exists(store_dir):
+        return False
+
+    # Všechna pozorování v poslední revizi
+    con.execute(f"CREATE OR REPLACE VIEW csu_timeseries AS {latest_sql(store_dir)}")
+
+    # Nejnovější období (rok, čtvrtletí) pro každý dataset/region/ukazatel
+    con.execute("""
+        CREATE OR REPLACE VIEW csu_latest AS
+        SELECT *
+        FROM csu_timeseries
+        WHERE year IS NOT NULL
+        QUALIFY ROW_NUMBER() OVER (
+            PARTITION BY dataset, region, sector, sex, measure
+            ORDER BY year DESC, quarter DESC NULLS LAST
+        ) = 1
+    """)
+    return True
+
+
+def latest_quarter_per_region(con, dataset, measure_like=None):
+    """Poslední dostupné čtvrtletí pro každý region daného datasetu"""
+    params = [dataset]
+    measure_filter = ""
+    if measure_like:
+        measure_filter = "AND measure ILIKE ?"
+        params.append(measure_like)
+    return con.execute(f"""
+        SELECT region, year, quarter, measure, value
+        FROM csu_latest
+        WHERE dataset = ? AND sector IS NULL AND sex IS NULL {measure_filter}
+        ORDER BY region
+    """, params).fetchdf()
+
+
+def trend(con, dataset, region=None, since_year=None):
+    """Víceletý vývoj - filtr na dataset a rok se propíše až na výběr souborů"""
+    conditions, params = ["dataset = ?"], [dataset]
+    if region:
+        conditions.append("region = ?")
+        params.append(region)
+    if since_year:
+        conditions.append("year >= ?")
+        params.append(since_year)
+    return con.execute(f"""
+        SELECT region, year, quarter, measure, value
+        FROM csu_timeseries
+        WHERE {' AND '.join(conditions)}
+        ORDER BY region, year, quarter
+    """, params).fetchdf()
@@ -0,0 +1,121 @@
+"""
+Předpočítané podklady grafů dashboardu
+Pipeline (export_metrics) uloží pro každý graf jen to, co vykresluje - seřazené
+sloupce a hotové souhrny - do data/export/dashboard_views.json. Aplikace je při
+startu jen načte přes json; pandas ani agregace nad CSV nepotřebuje.
+
+Modul záměrně používá jen standardní knihovnu: importuje ho i dashboard a ten
+má startovat co nejrychleji.
+"""
+import datetime
+import json
+import math
+import os
+
+VIEWS_PATH = "data/export/dashboard_views.json"
+# Zvýšit při změně struktury - aplikace starší podklady nepoužije
+VIEWS_VERSION = 1
+
+TREND_COLUMNS = ["median_7d", "median_30d", "pay_gap_7d_pct", "pay_gap_30d_pct"]
+
+
+def clean(value):
+    """Hodnota pro JSON: NaN -> None, datum -> ISO řetězec, numpy skaláry -> Python"""
+    if value is None:
+        return None
+    if isinstance(value, (datetime.date, datetime.datetime)):
+        return value.isoformat()[:10]
+    if hasattr(value, "item"):
+        value = value.item()
+    if isinstance(value, float) and math.isnan(value):
+        return None
+    return value
+
+
+def column(data, name):
+    return [clean(v) for v in data.get(name, [])]
+
+
+def comparison_views(data):
+    """Souhrny a grafy podle kraje z wages_comparison ({sloupec: [hodnoty]})"""
+    regions = column(data, "region")
+    avg_wage = column(data, "avg_wage")
+    wages = [(w, r) for w, r in zip(avg_wage, regions) if w is not None]
+    pay_gap = [g for g in column(data, "pay_gap") if g is not None]
+    offers = column(data, "offers")
+
+    views = {
+        "metrics": {
+            "regions": len(regions),
+            "avg_wage_mean": sum(w for w, _ in wages) / len(wages) if wages else None,
+            "avg_wage_min": min(wages)[0] if wages else None,
+            "avg_wage_min_region": min(wages)[1] if wages else None,
+            "avg_wage_max": max(wages)[0] if wages else None,
+            "avg_wage_max_region": max(wages)[1] if wages else None,
+            "pay_gap_mean": sum(pay_gap) / len(pay_gap) if pay_gap else None,
+            "offers_total": sum(o for o in offers if o is not None),
+        },
+        "by_region": {name: column(data, name) for name in ("region", "avg_wage", "avg_offer", "pay_gap", "offers")},
+        "ci": None,
+    }
+
+    if "pay_gap_pct_ci_low" in data:
+        names = ["region", "pay_gap_pct", "pay_gap_pct_ci_low", "pay_gap_pct_ci_high", "offers"]
+        rows = sorted(zip(*(column(data, name) for name in names)),
+                      key=lambda row: -math.inf if row[1] is None else row[1], reverse=True)
+        views["ci"] = {name: [row[i] for row in rows] for i, name in enumerate(names)}
+    return views
+
+
+def trend_views(data):
+    """Řady po krajích a poslední mezitýdenní změna z wage_trends"""
+    dates = column(data, "scrape_date")
+    if not dates:
+        return None
+    regions = column(data, "region")
+    series = {}
+    for i in sorted(range(len(dates)), key=lambda i: (regions[i], dates[i])):
+        region = series.setdefault(regions[i], {"scrape_date": [], **{name: [] for name in TREND_COLUMNS}})
+        region["scrape_date"].append(dates[i])
+        for name in TREND_COLUMNS:
+            region[name].append(clean(data[name][i]) if name in data else None)
+
+    latest_date = max(dates)
+    wow = column(data, "wow_change_pct") or [None] * len(dates)
+    latest = sorted((wow[i], regions[i]) for i in range(len(dates))
+                    if dates[i] == latest_date and wow[i] is not None)
+    return {
+        "regions": sorted(series),
+        "series": series,
+        "latest": {"scrape_date": latest_date,
+                   "region": [r for _, r in latest],
+                   "wow_change_pct": [w for w, _ in latest]},
+    }
+
+
+def build_views(comparison, trends=None):
+    """Všechny podklady dashboardu; vstupy jsou sloupcové slovníky (Arrow to_pydict, DataFrame.to_dict("list"))"""
+    return {
+        "version": VIEWS_VERSION,
+        "generated_at": datetime.datetime.now().isoformat(timespec="seconds"),
+        # Běh pipeline, ze kterého metriky pochází (registr pipeline_runs)
+        "run_id": next(iter(column(comparison, "run_id")), None),
+        **comparison_views(comparison),
+        "trends": trend_views(trends) if trends else None,
+    }
+
+
+def write_views(views, path=VIEWS_PATH):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(views, f, ensure_ascii=False, separators=(",", ":"))
+    os.replace(path + ".tmp", path)
+
+
+def load_views(path=VIEWS_PATH):
+    """Podklady z pipeline, nebo None (chybí / jiná verze struktury)"""
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as f:
+        views = json.load(f)
+    return views if views.get("version") == VIEWS_VERSION else None
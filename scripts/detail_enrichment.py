@@ -0,0 +1,196 @@
+"""
+Doplnění nabídek z detailních stránek
+Stránka výsledků často neukáže plat nebo lokalitu, detail nabídky ano. Nabídky,
+kterým chybí plat nebo kraj a mají odkaz na detail, se seřadí podle očekávaného
+přínosu (chybějící pole x úspěšnost detailů daného portálu z minulých běhů)
+a stáhne se jen tolik detailů, kolik dovolí globální rozpočet požadavků.
+
+Výsledky (i neúspěšné) se ukládají do data/detail_cache.json, takže další běh
+stahuje jen nové detaily a cache hit rozpočet nečerpá.
+"""
+import datetime
+import heapq
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from crawl_runtime import CircuitOpenError, DeadlineExceeded
+from portal_adapters import LOCATION_CLASS_RE, PORTAL_ADAPTERS, SALARY_TEXT_RE, parse_structured_page
+from region_lookup import UNKNOWN_REGION, resolve_region
+from salary_extract import NORMALIZED_COLUMNS, normalize_salary
+
+CACHE_PATH = "data/detail_cache.json"
+# Jak dlouho věříme uloženému detailu
+MAX_AGE_DAYS = 7
+
+# Globální rozpočet požadavků na detaily za jeden běh a počet souběžných stahování
+ENRICH_BUDGET = 200
+ENRICH_WORKERS = 4
+
+# Přínos doplnění jednotlivých polí (plat je pro pay gap důležitější než kraj)
+SALARY_VALUE = 1.0
+REGION_VALUE = 0.5
+
+
+class DetailCache:
+    """Cache {url: source, salary, location, fetched_at} vytěžených detailů"""
+
+    def __init__(self, path=CACHE_PATH):
+        self.path = path
+        self.entries = {}
+        self.lock = threading.Lock()
+        self.dirty = False
+        if os.path.exists(path):
+            try:
+                with open(path, encoding="utf-8") as f:
+                    self.entries = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"[VAROVANI] Cache detailu nelze nacist ({e}), zacinam znovu")
+
+    def get(self, url, max_age_days=MAX_AGE_DAYS):
+        entry = self.entries.get(url)
+        if not entry:
+            return None
+        fetched = datetime.datetime.fromisoformat(entry["fetched_at"])
+        if datetime.datetime.now() - fetched > datetime.timedelta(days=max_age_days):
+            return None
+        return entry
+
+    def record(self, url, source, salary, location):
+        with self.lock:
+            self.entries[url] = {
+                "source": source,
+                "salary": salary,
+                "location": location,
+                "fetched_at": datetime.datetime.now().isoformat(timespec="seconds"),
+            }
+            self.dirty = True
+
+    def hit_rates(self):
+        """Podíl detailů s platem podle portálu (Laplaceovo vyhlazení, neznámý portál = 0.5)"""
+        counts = {}
+        for entry in self.entries.values():
+            found, total = counts.get(entry["source"], (0, 0))
+            counts[entry["source"]] = (found + (entry["salary"] is not None), total + 1)
+        return {source: (found + 1) / (total + 2) for source, (found, total) in counts.items()}
+
+    def save(self):
+        """Atomicky uloží cache na disk (jen pokud se změnila)"""
+        if not self.dirty:
+            return
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.entries, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+        self.dirty = False
+
+
+def parse_detail_page(html, source):
+    """Detail nabídky -> (dict s NORMALIZED_COLUMNS + salary_text, lokalita); JSON-LD má přednost"""
+    from bs4 import BeautifulSoup
+
+    structured = [r for r in parse_structured_page(html, UNKNOWN_REGION, source, 0) or []
+                  if r["salary_offer"] is not None]
+    if structured:
+        best = structured[0]
+        return {k: best[k] for k in ["salary_text"] + NORMALIZED_COLUMNS}, best["location"]
+
+    soup = BeautifulSoup(html, "html.parser")
+    salary = None
+    for s in soup.find_all(string=SALARY_TEXT_RE):
+        parsed = normalize_salary(s)
+        if parsed:
+            salary = {"salary_text": s.strip()[:200], **parsed}
+            break
+    location_elem = soup.find(class_=LOCATION_CLASS_RE) or soup.find(itemprop="addressLocality")
+    location = location_elem.get_text(" ", strip=True)[:200] if location_elem else None
+    return salary, location
+
+
+def expected_value(record, hit_rate):
+    """Očekávaný přínos stažení detailu pro jednu nabídku"""
+    value = 0.0
+    if record.get("salary_offer") is None:
+        value += SALARY_VALUE * hit_rate
+    if record.get("region") == UNKNOWN_REGION:
+        value += REGION_VALUE
+    return value
+
+
+def apply_detail(record, salary, location):
+    """Doplní do nabídky jen chybějící pole; vrací True, pokud se něco změnilo"""
+    changed = False
+    if record.get("salary_offer") is None and salary:
+        record.update(salary)
+        record["salary_offer"] = salary["salary_monthly"]
+        changed = True
+    if location and not record.get("location"):
+        record["location"] = location
+    if record.get("region") == UNKNOWN_REGION:
+        region = resolve_region(location)
+        if region:
+            record["region"] = region
+            changed = True
+    return changed
+
+
+def enrich_listings(records, runtime, budget=ENRICH_BUDGET, workers=ENRICH_WORKERS, cache=None):
+    """Doplní plat/kraj z detailů v pořadí podle očekávaného přínosu; vrací statistiky"""
+    cache = cache or DetailCache()
+    hit_rates = cache.hit_rates()
+    stats = {"candidates": 0, "cache_hits": 0, "fetched": 0, "failed": 0, "enriched": 0, "skipped": 0}
+
+    # Kandidáti podle URL detailu (stejný detail může mít více záznamů)
+    by_url = {}
+    for record in records:
+        url = record.get("detail_url")
+        if url and expected_value(record, hit_rates.get(record["source"], 0.5)) > 0:
+            by_url.setdefault(url, []).append(record)
+    stats["candidates"] = len(by_url)
+
+    def apply(url, salary, location):
+        stats["enriched"] += sum(apply_detail(record, salary, location) for record in by_url[url])
+
+    # Nejdřív cache - nečerpá rozpočet
+    queue = []
+    for url, group in by_url.items():
+        entry = cache.get(url)
+        if entry:
+            stats["cache_hits"] += 1
+            apply(url, entry["salary"], entry["location"])
+        else:
+            value = sum(expected_value(r, hit_rates.get(r["source"], 0.5)) for r in group)
+            queue.append((value, url))
+
+    # Omezená prioritní fronta: jen `budget` nejcennějších detailů
+    selected = heapq.nlargest(budget, queue)
+    stats["skipped"] = len(queue) - len(selected)
+    if stats["skipped"]:
+        runtime.metrics.skip("detail", f"{stats['skipped']} detailu", "mimo rozpocet pozadavku")
+
+    def fetch(url):
+        source = by_url[url][0]["source"]
+        adapter = PORTAL_ADAPTERS.get(source)
+        html = runtime.fetch(url, source, adapter.min_interval if adapter else 1.0)
+        salary, location = parse_detail_page(html, source)
+        cache.record(url, source, salary, location)
+        return salary, location
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = [(url, executor.submit(fetch, url)) for _, url in selected]
+        for url, future in futures:
+            try:
+                salary, location = future.result()
+            except Exception as e:
+                stats["failed"] += 1
+                runtime.metrics.skip(by_url[url][0]["source"], f"detail {url}", str(e))
+                if not isinstance(e, (CircuitOpenError, DeadlineExceeded)):
+                    print(f"  [!] detail {url}: {e}")
+                continue
+            stats["fetched"] += 1
+            apply(url, salary, location)
+
+    cache.save()
+    return stats
@@ -0,0 +1,404 @@
+"""
+Export metrik a snímku nabídek pro další spotřebitele
+Každý dataset se zapíše jako Parquet (zstd, pro archiv a DuckDB/pandas),
+Arrow IPC soubor (bez komprese - dá se namapovat do paměti a číst bez kopírování
+a parsování) a u malých metrik i jako kompaktní JSON pro web.
+
+Malé lokální API (http.server nad DuckDB) pak servíruje datasety jako proud
+Arrow record batchí - interní spotřebitel nemusí parsovat CSV ani chodit přes Supabase:
+
+    python scripts/export_metrics.py --serve --port 8766
+    curl http://127.0.0.1:8766/datasets
+    curl "http://127.0.0.1:8766/datasets/wages_comparison.arrow?columns=region,pay_gap_pct"
+"""
+import json
+import os
+import re
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+EXPORT_DIR = "data/export"
+JOBS_DB_PATH = "data/jobs.duckdb"
+
+# Arrow typy ze schématu v manifestu -> typ parametru filtru v DuckDB
+SQL_TYPES = {
+    "bool": "BOOLEAN", "int8": "TINYINT", "int16": "SMALLINT", "int32": "INTEGER", "int64": "BIGINT",
+    "uint8": "UTINYINT", "uint16": "USMALLINT", "uint32": "UINTEGER", "uint64": "UBIGINT",
+    "float": "FLOAT", "double": "DOUBLE", "string": "VARCHAR", "large_string": "VARCHAR",
+    "date32[day]": "DATE",
+}
+
+
+def sql_type(arrow_type):
+    """Typ sloupce z manifestu -> SQL typ pro CAST parametru; None = neznámý (porovná se text)"""
+    if arrow_type in SQL_TYPES:
+        return SQL_TYPES[arrow_type]
+    if arrow_type.startswith("timestamp"):
+        return "TIMESTAMPTZ" if "tz=" in arrow_type else "TIMESTAMP"
+    decimal = re.fullmatch(r"decimal128\((\d+), (\d+)\)", arrow_type)
+    if decimal:
+        return f"DECIMAL({decimal.group(1)}, {decimal.group(2)})"
+    if arrow_type.startswith("dictionary<values=string"):
+        return "VARCHAR"
+    return None
+
+
+def listings_sql(con):
+    """Snímek nabídek bez duplicit; listing_id je stabilní klíč pro stránkování prohlížeče
+
+    Seřazeno podle kraje a platu - min/max statistiky row group pak filtrují prohlížeč nabídek.
+    """
+    columns = [row[0] for row in con.execute("DESCRIBE job_listings").fetchall()]
+    where = "WHERE NOT COALESCE(is_duplicate, FALSE)" if "is_duplicate" in columns else ""
+    return f"""
+        SELECT rowid AS listing_id, * FROM job_listings
+        {where}
+        ORDER BY region, salary_offer, listing_id
+    """
+
+
+# Dataset -> (zdroj, JSON pro web); zdroj je CSV z pipeline nebo SQL (funkce) nad data/jobs.duckdb
+DATASETS = {
+    "wages_comparison": ("data/wages_comparison.csv", True),
+    "wages_by_source": ("data/wages_by_source.csv", True),
+    "wages_by_occupation": ("data/wages_by_occupation.csv", True),
+    "wage_trends": ("data/wage_trends.csv", True),
+    "job_listings": (listings_sql, False),
+}
+
+# Velikost record batche v API a v IPC souborech i row group v Parquetu
+BATCH_ROWS = 64 * 1024
+# Desetinná místa v JSON (mzdy a procenta víc nepotřebují)
+JSON_DECIMALS = 2
+
+SERVE_HOST = "127.0.0.1"
+SERVE_PORT = 8766
+
+
+def is_csv(source):
+    return isinstance(source, str) and source.endswith(".csv")
+
+
+def load_dataset(con, source):
+    """Zdroj datasetu -> pyarrow.Table (CSV přes DuckDB, jinak SQL nad jobs.duckdb)"""
+    if is_csv(source):
+        return con.execute("SELECT * FROM read_csv_auto(?)", [source]).fetch_arrow_table()
+    return con.execute(source(con) if callable(source) else source).fetch_arrow_table()
+
+
+def write_ipc(table, path):
+    """Arrow IPC soubor (random access) - bez komprese, aby šel číst přes memory map"""
+    import pyarrow as pa
+
+    tmp_path = path + ".tmp"
+    with pa.OSFile(tmp_path, "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+        writer.write_table(table, max_chunksize=BATCH_ROWS)
+    os.replace(tmp_path, path)
+
+
+def write_json(table, path):
+    """Kompaktní sloupcový JSON {"columns": [...], "data": {sloupec: [hodnoty]}}"""
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    data = {}
+    for name, column in zip(table.column_names, table.columns):
+        if pa.types.is_floating(column.type):
+            column = pc.round(column, JSON_DECIMALS)
+        elif pa.types.is_temporal(column.type):
+            column = column.cast(pa.string())
+        data[name] = column.to_pylist()
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"columns": table.column_names, "rows": table.num_rows, "data": data},
+                  f, ensure_ascii=False, separators=(",", ":"))
+    os.replace(tmp_path, path)
+
+
+def export_all(export_dir=EXPORT_DIR, jobs_db_path=JOBS_DB_PATH, datasets=None):
+    """Zapíše všechny dostupné datasety a manifest, vrací {dataset: počet řádků}"""
+    import duckdb
+    import pyarrow.parquet as pq
+
+    os.makedirs(export_dir, exist_ok=True)
+    datasets = datasets or DATASETS
+    has_jobs_db = os.path.exists(jobs_db_path)
+    con = duckdb.connect(jobs_db_path, read_only=True) if has_jobs_db else duckdb.connect()
+    manifest = {}
+    try:
+        for name, (source, with_json) in datasets.items():
+            if is_csv(source) and not os.path.exists(source):
+                print(f"  [SKIP] {name}: {source} neexistuje")
+                continue
+            if not is_csv(source) and not has_jobs_db:
+                print(f"  [SKIP] {name}: {jobs_db_path} neexistuje")
+                continue
+            try:
+                table = load_dataset(con, source)
+            except duckdb.Error as e:
+                print(f"  [CHYBA] {name}: {e}")
+                continue
+
+            files = {"parquet": f"{name}.parquet", "arrow": f"{name}.arrow"}
+            parquet_path = os.path.join(export_dir, files["parquet"])
+            pq.write_table(table, parquet_path + ".tmp", compression="zstd", row_group_size=BATCH_ROWS)
+            os.replace(parquet_path + ".tmp", parquet_path)
+            write_ipc(table, os.path.join(export_dir, files["arrow"]))
+            if with_json:
+                files["json"] = f"{name}.json"
+                write_json(table, os.path.join(export_dir, files["json"]))
+            manifest[name] = {
+                "rows": table.num_rows,
+                "schema": {field.name: str(field.type) for field in table.schema},
+                "files": files,
+            }
+            print(f"  - {name}: {table.num_rows} radku ({', '.join(files)})")
+    finally:
+        con.close()
+
+    # Manifest až po datech - API nikdy nenabídne dataset, jehož soubory ještě nejsou hotové
+    manifest_path = os.path.join(export_dir, "manifest.json")
+    with open(manifest_path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    os.replace(manifest_path + ".tmp", manifest_path)
+    return {name: entry["rows"] for name, entry in manifest.items()}
+
+
+def read_export(name, export_dir=EXPORT_DIR):
+    """Načte dataset z Arrow IPC přes memory map - data se nekopírují ani neparsují"""
+    import pyarrow as pa
+
+    source = pa.memory_map(os.path.join(export_dir, f"{name}.arrow"), "r")
+    return pa.ipc.open_file(source).read_all()
+
+
+class ChunkedWriter:
+    """Soubor pro pyarrow, který píše do HTTP odpovědi jako chunked transfer"""
+
+    def __init__(self, wfile):
+        self.wfile = wfile
+        self.closed = False
+
+    def write(self, data):
+        data = bytes(data)
+        if data:
+            self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+        return len(data)
+
+    def flush(self):
+        self.wfile.flush()
+
+    def close(self):
+        if not self.closed:
+            self.wfile.write(b"0\r\n\r\n")
+            self.closed = True
+
+
+class ExportServer:
+    """HTTP API nad exportem: /datasets, /datasets/<name>.arrow|.parquet|.json
+
+    .arrow je Arrow IPC stream generovaný DuckDB po record batchích; parametry
+    columns=a,b, where sloupec=hodnota (např. region=Praha) a limit=N se
+    propíšou do dotazu nad Parquetem, takže se čte jen to, co klient chce.
+    """
+
+    def __init__(self, export_dir=EXPORT_DIR):
+        self.export_dir = export_dir
+        self.local = threading.local()
+        self.httpd = None
+        self.thread = None
+
+    def connection(self):
+        """DuckDB spojení pro vlákno požadavku"""
+        import duckdb
+
+        if not hasattr(self.local, "con"):
+            self.local.con = duckdb.connect()
+        return self.local.con
+
+    def manifest(self):
+        path = os.path.join(self.export_dir, "manifest.json")
+        if not os.path.exists(path):
+            return {}
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+
+    def query(self, name, params, schema):
+        """SQL a parametry pro výběr z Parquetu datasetu; sloupce se ověřují proti schématu"""
+        columns = [c for c in params.pop("columns", [""])[0].split(",") if c]
+        unknown = [c for c in columns if c not in schema]
+        limit = params.pop("limit", [None])[0]
+        filters = {key: values[0] for key, values in params.items()}
+        unknown += [c for c in filters if c not in schema]
+        if unknown:
+            raise ValueError(f"Neznamy sloupec: {', '.join(unknown)}")
+        if limit is not None and not limit.isdigit():
+            raise ValueError("limit musi byt cislo")
+
+        select = ", ".join(f'"{c}"' for c in columns) or "*"
+        # Parametr v typu sloupce - porovnání čísel jako čísel a min/max pruning row groups Parquetu
+        types = {c: sql_type(schema[c]) for c in filters}
+        where = " AND ".join(f'"{c}" = CAST(? AS {types[c]})' if types[c] else f'CAST("{c}" AS VARCHAR) = ?'
+                             for c in filters)
+        sql = f"SELECT {select} FROM read_parquet(?)"
+        if where:
+            sql += f" WHERE {where}"
+        if limit is not None:
+            sql += f" LIMIT {int(limit)}"
+        path = os.path.join(self.export_dir, f"{name}.parquet")
+        return sql, [path, *filters.values()]
+
+    def stream_arrow(self, handler, name, params, schema):
+        """Odešle dataset jako Arrow stream; chyby dotazu vyhodí ještě před hlavičkami
+
+        Selže-li čtení až během proudu (hlavičky už odešly), spojení se zavře bez
+        ukončovacího chunku - klient pozná useknutou odpověď, ne poloviční dataset.
+        """
+        import duckdb
+        import pyarrow as pa
+
+        sql, args = self.query(name, params, schema)
+        reader = self.connection().execute(sql, args).fetch_record_batch(BATCH_ROWS)
+        handler.send_response(200)
+        handler.send_header("Content-Type", "application/vnd.apache.arrow.stream")
+        handler.send_header("Transfer-Encoding", "chunked")
+        handler.end_headers()
+        sink = ChunkedWriter(handler.wfile)
+        try:
+            with pa.ipc.new_stream(sink, reader.schema) as writer:
+                for batch in reader:
+                    writer.write_batch(batch)
+        except (duckdb.Error, pa.ArrowException, OSError):
+            handler.close_connection = True
+            return
+        sink.close()
+
+    def start(self, host=SERVE_HOST, port=SERVE_PORT):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def send_body(self, status, content_type, body):
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def send_json(self, status, payload):
+                self.send_body(status, "application/json", json.dumps(payload, ensure_ascii=False).encode("utf-8"))
+
+            def do_GET(self):
+                url = urlsplit(self.path)
+                manifest = server.manifest()
+                if url.path.rstrip("/") == "/datasets":
+                    return self.send_json(200, manifest)
+
+                m = re.fullmatch(r"/datasets/(\w+)\.(arrow|parquet|json)", url.path)
+                if not m or m.group(1) not in manifest:
+                    return self.send_json(404, {"error": "dataset nenalezen"})
+                name, fmt = m.groups()
+                entry = manifest[name]
+                if fmt == "arrow":
+                    import duckdb
+
+                    try:
+                        server.stream_arrow(self, name, parse_qs(url.query), entry["schema"])
+                    except (ValueError, duckdb.ConversionException) as e:
+                        # Neplatný parametr, i hodnota filtru, která nejde převést na typ sloupce
+                        self.send_json(400, {"error": str(e)})
+                    except (duckdb.Error, OSError) as e:
+                        # Chybějící/poškozený Parquet nebo chyba dotazu - hlavičky ještě neodešly
+                        self.send_json(500, {"error": f"{name}: {e}"})
+                    return
+                if fmt not in entry["files"]:
+                    return self.send_json(404, {"error": f"{name} nema export {fmt}"})
+                try:
+                    with open(os.path.join(server.export_dir, entry["files"][fmt]), "rb") as f:
+                        body = f.read()
+                except OSError as e:
+                    return self.send_json(500, {"error": f"{name}: {e}"})
+                content_type = "application/json" if fmt == "json" else "application/vnd.apache.parquet"
+                self.send_body(200, content_type, body)
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer((host, port), Handler)
+        self.httpd.daemon_threads = True
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def stop(self):
+        if self.httpd:
+            self.httpd.shutdown()
+            self.httpd.server_close()
+            self.httpd = None
+
+    def __enter__(self):
+        return self.start(port=0)
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def fetch_arrow(url):
+    """Klient API: stáhne dataset jako pyarrow.Table (čte proud batchí bez parsování)"""
+    import urllib.request
+
+    import pyarrow as pa
+
+    with urllib.request.urlopen(url) as response:
+        return pa.ipc.open_stream(response).read_all()
+
+
+def export_views(export_dir=EXPORT_DIR):
+    """Předpočítané podklady grafů dashboardu z právě exportovaných datasetů"""
+    from dashboard_views import build_views, write_views
+
+    comparison = read_export("wages_comparison", export_dir).to_pydict()
+    trends_path = os.path.join(export_dir, "wage_trends.arrow")
+    trends = read_export("wage_trends", export_dir).to_pydict() if os.path.exists(trends_path) else None
+    path = os.path.join(export_dir, "dashboard_views.json")
+    write_views(build_views(comparison, trends), path)
+    return path
+
+
+def main(export_dir=EXPORT_DIR):
+    print("[EXPORT] Zapisuji datasety (Parquet, Arrow IPC, JSON)...")
+    exported = export_all(export_dir)
+    print(f"[OK] Exportovano {len(exported)} datasetu do {export_dir}")
+    if "wages_comparison" in exported:
+        print(f"[OK] Podklady dashboardu: {export_views(export_dir)}")
+    return exported
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="Export metrik a lokální Arrow API")
+    parser.add_argument("--serve", action="store_true", help="spustit HTTP API nad exportem")
+    parser.add_argument("--host", default=SERVE_HOST)
+    parser.add_argument("--port", type=int, default=SERVE_PORT)
+    parser.add_argument("--no-export", dest="export", action="store_false", help="jen API, bez nového exportu")
+    args = parser.parse_args()
+
+    if args.export:
+        main()
+    if args.serve:
+        server = ExportServer().start(args.host, args.port)
+        print(f"[API] Bezi na {server.url}/datasets (Ctrl+C pro ukonceni)")
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            server.stop()
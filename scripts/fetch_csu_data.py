@@ -1,45 +1,40 @@
-import pandas as pd
-import requests
-from bs4 import BeautifulSoup
-import time
-import duckdb
+"""
+Stahování datasetů ČSÚ
+Modul nemá vedlejší efekty při importu - těžké závislosti (pandas, DuckDB,
+aiohttp, BeautifulSoup) se načítají až ve funkcích, které je potřebují.
+Vstupní body: fetch_all() pro stažení, main() pro celý krok pipeline.
+"""
+import asyncio
+import hashlib
 import os
 
-# URL pro různé datasety ČSÚ
-CSU_SOURCES = {
-    "wages_by_region": {
-        # Aktualizovaná URL - zkusíme obecnou stránku s přehledem
-        "url": "https://www.czso.cz/csu/czso/cri/prumerne-mzdy-1-ctvrtleti-2024",
-        "description": "Průměrné mzdy podle krajů",
-        "output": "data/csu_wages_by_region.csv"
-    },
-    "wages_by_sector": {
-        "url": "https://csu.gov.cz/produkty/zamestnanci-a-prumerne-hrube-mesicni-mzdy-podle-odvetvi",
-        "code": "110079-25",
-        "csv_url": "https://csu.gov.cz/docs/107508/185d8d2f-675c-fa34-dbe6-8fb0034d3d32/110079-25data090825.csv?version=1.0",
-        "description": "Zaměstnanci a mzdy podle odvětví",
-        "output": "data/csu_wages_by_sector.csv"
-    },
-    "wages_timeseries": {
-        "url": "https://csu.gov.cz/produkty/pmz_cr",
-        "code": "110030-25",
-        "description": "Mzdy, náklady práce – časové řady",
-        "output": "data/csu_wages_timeseries.csv"
-    },
-    "wage_structure": {
-        "url": "https://csu.gov.cz/produkty/struktura-mezd-zamestnancu-2024",
-        "description": "Struktura mezd zaměstnanců 2024",
-        "output": "data/csu_wage_structure.csv"
-    }
-}
+from csu_link_index import INDEX_PATH, LinkIndex
+from csu_schemas import DEFAULT_SCHEMA
+from csu_sources import CSU_SOURCES
+
+HEADERS = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'}
+
+# Kolik datasetů stahujeme současně a timeout jednoho pokusu o URL
+MAX_CONCURRENT_SOURCES = 8
+URL_TIMEOUT = 15
+PAGE_TIMEOUT = 10
+
+# Hranice velikosti souboru pro HEAD pre-check (menší = chybová stránka, větší = nejde o naši tabulku)
+MIN_FILE_SIZE = 100
+MAX_FILE_SIZE = 50 * 1024 * 1024
+
+def fetch_direct_excel(url, output_file, schema=DEFAULT_SCHEMA):
+    """Stáhne přímo Excel soubor z URL (hlavička se hledá podle schématu)"""
+    import requests
+    from csu_parser import parse_bytes
 
-def fetch_direct_excel(url, output_file, header_row=3):
-    """Stáhne přímo Excel soubor z URL"""
     try:
         print(f"  Stahuji z: {url}")
-        df = pd.read_excel(url, sheet_name=0, header=header_row)
-        df = df.rename(columns={"Kraj": "region", "2023": "avg_wage"})
-        df = df[["region", "avg_wage"]].dropna()
+        r = requests.get(url, headers=HEADERS, timeout=URL_TIMEOUT)
+        r.raise_for_status()
+        df = parse_bytes(r.content, url, schema)
+        if df is None:
+            raise ValueError("data nelze normalizovat")
         df.to_csv(output_file, index=False)
         print(f"[OK] Stazeno: {output_file}")
         return df
@@ -47,271 +42,337 @@ def fetch_direct_excel(url, output_file, header_row=3):
         print(f"[CHYBA] Stahovani {output_file}: {str(e)[:100]}")
         return None
 
-def clean_and_normalize_data(df, data_type):
-    """Normalizuje a čistí data podle typu datasetu"""
-    if df is None or df.empty:
+def clean_and_normalize_data(df, schema=DEFAULT_SCHEMA):
+    """Normalizuje a čistí data podle schématu datasetu"""
+    from csu_parser import normalize_frame
+
+    return normalize_frame(df, schema)
+
+def client_timeout(seconds):
+    import aiohttp
+
+    return aiohttp.ClientTimeout(total=seconds)
+
+async def probe(session, url, timeout=PAGE_TIMEOUT):
+    """HEAD požadavek - typ a velikost souboru bez stahování; None = nedostupné"""
+    try:
+        async with session.head(url, allow_redirects=True,
+                                timeout=client_timeout(timeout)) as r:
+            if r.status == 405:
+                # Server HEAD nepodporuje - o souboru nic nevíme, ale nevylučujeme ho
+                return {"url": url, "content_type": None, "size": None, "etag": None}
+            if r.status != 200:
+                return None
+            return {
+                "url": str(r.url),
+                "content_type": r.headers.get("Content-Type", "").split(";")[0] or None,
+                "size": int(r.headers["Content-Length"]) if "Content-Length" in r.headers else None,
+                "etag": r.headers.get("ETag"),
+            }
+    except Exception:
         return None
-    
-    # Pokus o identifikaci sloupců s daty
-    df_clean = df.copy()
-    
-    # Odstranění prázdných řádků a sloupců
-    df_clean = df_clean.dropna(how='all', axis=0).dropna(how='all', axis=1)
-    
-    if df_clean.empty:
+
+def is_plausible_file(info):
+    """Předběžná kontrola podle HEAD - HTML stránky a obří/prázdné soubory vyřadíme"""
+    if info is None:
+        return False
+    if info["content_type"] and info["content_type"].startswith("text/html"):
+        return False
+    if info["size"] is not None and not (MIN_FILE_SIZE < info["size"] <= MAX_FILE_SIZE):
+        return False
+    return True
+
+class NotModified(Exception):
+    """Podmíněný GET: server odpověděl 304, soubor se od posledního stažení nezměnil"""
+
+async def download(session, url, timeout=URL_TIMEOUT, etag=None):
+    """Stáhne URL a vrátí (obsah, content-type, ETag), při chybě nebo prázdné odpovědi vyhodí výjimku
+
+    S etag jde o podmíněný GET (If-None-Match) - nezměněný soubor vyhodí NotModified.
+    """
+    headers = {"If-None-Match": etag} if etag else None
+    async with session.get(url, headers=headers, timeout=client_timeout(timeout)) as r:
+        if r.status == 304:
+            raise NotModified(url)
+        if r.status != 200:
+            raise ValueError(f"HTTP {r.status}")
+        body = await r.read()
+        content_type = r.headers.get("Content-Type", "").split(";")[0] or None
+        etag = r.headers.get("ETag")
+    if len(body) <= MIN_FILE_SIZE:
+        raise ValueError("prazdna odpoved")
+    return body, content_type, etag
+
+async def fetch_and_normalize(session, url, schema, timeout=URL_TIMEOUT, etag=None):
+    """Stáhne jednu URL a rovnou ji normalizuje; None/chyba = neúspěch"""
+    from csu_parser import parse_bytes
+
+    body, content_type, etag = await download(session, url, timeout, etag)
+    # Parsování je CPU práce - nesmí blokovat event loop ostatních stahování
+    df_clean = await asyncio.to_thread(parse_bytes, body, url, schema)
+    if df_clean is None or df_clean.empty:
+        raise ValueError("data nelze normalizovat")
+    info = {
+        "content_type": content_type,
+        "size": len(body),
+        "sha256": hashlib.sha256(body).hexdigest(),
+        "etag": etag,
+    }
+    return url, df_clean, info
+
+async def race_urls(session, urls, schema, timeout=URL_TIMEOUT):
+    """Zkusí všechny URL současně - vyhrává první úspěšná, zbytek se zruší"""
+    pending = {asyncio.create_task(fetch_and_normalize(session, url, schema, timeout))
+               for url in urls}
+    try:
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    return task.result()
         return None
-    
-    # Nejdřív zkusíme normální zpracování (bez přeskakování)
-    
-    # Pokus o detekci hlavičky (první neprázdný řádek)
-    if len(df_clean) > 0 and df_clean.iloc[0].isna().sum() > len(df_clean.columns) / 2:
-        df_clean = df_clean.iloc[1:].reset_index(drop=True)
-    
-    # Nastavení prvního sloupce jako "region" a druhého jako "value"
-    if len(df_clean.columns) >= 2:
-        cols = df_clean.columns.tolist()
-        df_clean = df_clean.rename(columns={
-            cols[0]: 'region',
-            cols[1]: 'value'
-        })
-        
-        # Ponechání pouze region a value
-        df_clean = df_clean[['region', 'value']]
-        
-        # Odstranění NaN hodnot
-        df_clean = df_clean.dropna()
-        
-        # Převod value na numerický typ
-        try:
-            df_clean['value'] = pd.to_numeric(df_clean['value'], errors='coerce')
-            df_clean = df_clean.dropna()
-        except:
-            pass
-    
-    return df_clean if not df_clean.empty else None
+    finally:
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+
+async def find_links_on_page(session, url):
+    """Najde odkazy na Excel/CSV soubory na stránce produktu ČSÚ"""
+    async with session.get(url, timeout=client_timeout(PAGE_TIMEOUT)) as r:
+        html = await r.text()
+
+    from bs4 import BeautifulSoup
+    soup = BeautifulSoup(html, "html.parser")
+
+    links = []
+    for link in soup.find_all('a', href=True):
+        href = link['href']
+        if any(ext in href.lower() for ext in ['.xlsx', '.xls', '.csv']):
+            file_url = href if href.startswith('http') else f"https://csu.gov.cz{href}"
+            if file_url not in links:
+                links.append(file_url)
+    return links
 
-def fetch_csv_data_from_csu(code):
-    """Stáhne CSV data přímo z ČSÚ API podle kódu datasetu"""
+def rank_page_links(source, probed):
+    """Seřadí kandidáty ze stránky - soubory s kódem datasetu a CSV napřed, pak menší"""
+    def score(info):
+        url = info["url"].lower()
+        has_code = bool(source.code) and source.code.lower() in url
+        return (not has_code, '.csv' not in url, info["size"] or MAX_FILE_SIZE)
+    return sorted(probed, key=score)
+
+def unchanged(entry, info):
+    """HEAD vrací stejný ETag jako záznam v indexu (a stejnou velikost, pokud ji známe oba)"""
+    if not entry.get("etag") or info["etag"] != entry["etag"]:
+        return False
+    return info["size"] is None or entry.get("size") is None or info["size"] == entry["size"]
+
+def load_cached(source):
+    """Data z posledního stažení (source.output); None, pokud chybí nebo nejdou načíst"""
+    from csu_parser import read_csv_streaming
+
+    if not os.path.exists(source.output):
+        return None
     try:
-        from io import StringIO
-        
-        headers = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'}
-        
-        # Různé pokusy o stažení CSV podle kódu
-        csv_urls = [
-            # Formát 1: documents s aktuálním datem
-            f"https://www.czso.cz/documents/10180/184344914/{code}data090825.csv",
-            f"https://www.czso.cz/documents/10180/184344914/{code}data.csv",
-            # Formát 2: csu.cz downloads
-            f"https://csu.gov.cz/sites/default/files/{code}data.csv",
-            # Formát 3: vdb export
-            f"https://vdb.czso.cz/vdbvo2/faces/cs/download?pvo={code}&f=CSV",
-            # Formát 4: přímý download
-            f"https://www.czso.cz/documents/10180/{code}",
-        ]
-        
-        for csv_url in csv_urls:
-            try:
-                print(f"  [TRY] {csv_url}")
-                r = requests.get(csv_url, headers=headers, timeout=15)
-                if r.status_code == 200 and len(r.text) > 100:
-                    # Zkusíme načíst jako CSV
-                    df = pd.read_csv(StringIO(r.text))
-                    if not df.empty:
-                        print(f"  [SUCCESS] Stazeno z: {csv_url}")
-                        return df
-            except Exception as e:
-                continue
-        
+        df = read_csv_streaming(source.output, source.schema)
+    except Exception:
         return None
-        
-    except Exception as e:
-        print(f"  [DEBUG] API error: {e}")
+    return df if df is not None and not df.empty else None
+
+async def fetch_indexed(session, source, link_index):
+    """Zkusí odkaz z indexu - nezměněný soubor (ETag) se nestahuje, jinak se po HEAD ověření stáhne"""
+    entry = link_index.get(source.index_key)
+    if not entry:
         return None
+    info = await probe(session, entry["url"])
+    if is_plausible_file(info):
+        # Záznam indexu se obnoví s tím, co o souboru víme (sha256 zůstává -> changed = False)
+        known = {key: entry.get(key) for key in ("content_type", "size", "sha256", "etag")}
+        if unchanged(entry, info):
+            df = await asyncio.to_thread(load_cached, source)
+            if df is not None:
+                print(f"  [{source.name}] Beze zmeny (ETag), nestahuji")
+                return entry["url"], df, known
+        try:
+            # Server bez ETagu v HEAD (405) rozhodne podmíněným GET; bez lokálních dat stahujeme celé
+            etag = entry.get("etag") if os.path.exists(source.output) else None
+            url, df_clean, downloaded = await fetch_and_normalize(session, entry["url"], source.schema, etag=etag)
+            return url, df_clean, {**downloaded, "etag": downloaded["etag"] or info["etag"]}
+        except NotModified:
+            df = await asyncio.to_thread(load_cached, source)
+            if df is not None:
+                print(f"  [{source.name}] Beze zmeny (304), nestahuji")
+                return entry["url"], df, known
+        except Exception:
+            pass
+    print(f"  [{source.name}] Odkaz z indexu uz neplati, hledam znovu")
+    link_index.forget(source.index_key)
+    return None
 
-def fetch_from_csu_page(url, output_file, description, code=None, csv_url=None):
-    """Pokusí se najít a stáhnout Excel/CSV soubory ze stránky produktu ČSÚ"""
+async def fetch_source(session, source, link_index=None):
+    """Stáhne jeden dataset: index odkazů, pak závod přímých URL, pak stránka produktu"""
     try:
-        from io import StringIO
-        
-        # Pokud máme přímou CSV URL, použijeme ji
-        if csv_url:
-            print(f"  [CSV] Stahuji primo z: {csv_url}")
-            headers = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'}
-            try:
-                r = requests.get(csv_url, headers=headers, timeout=20)
-                if r.status_code == 200:
-                    df = pd.read_csv(StringIO(r.text))
-                    if not df.empty:
-                        # Normalizace dat
-                        df_clean = clean_and_normalize_data(df, description)
-                        if df_clean is not None and not df_clean.empty:
-                            df_clean.to_csv(output_file, index=False)
-                            print(f"[OK] Stazeno: {output_file} ({len(df_clean)} radku)")
-                            return df_clean
-            except Exception as e:
-                print(f"  [CHYBA] CSV download: {e}")
-        
-        # Pokud máme kód, zkusíme API
-        if code:
-            print(f"  [API] Zkousim stahnout pres API s kodem: {code}")
-            df = fetch_csv_data_from_csu(code)
-            if df is not None and not df.empty:
-                # Normalizace dat
-                df_clean = clean_and_normalize_data(df, description)
-                if df_clean is not None and not df_clean.empty:
-                    df_clean.to_csv(output_file, index=False)
-                    print(f"[OK] Stazeno: {output_file} ({len(df_clean)} radku)")
-                    return df_clean
-        
-        # Fallback: Parsování HTML stránky
-        headers = {'User-Agent': 'Mozilla/5.0'}
-        r = requests.get(url, headers=headers, timeout=10)
-        soup = BeautifulSoup(r.text, "html.parser")
-        
-        # Hledáme odkazy na Excel nebo CSV soubory
-        for link in soup.find_all('a', href=True):
-            href = link['href']
-            if any(ext in href.lower() for ext in ['.xlsx', '.xls', '.csv']):
-                file_url = href if href.startswith('http') else f"https://csu.gov.cz{href}"
-                
+        if link_index is not None:
+            result = await fetch_indexed(session, source, link_index)
+            if result:
+                url, df_clean, info = result
+                print(f"  [{source.name}] [INDEX] {url}")
+                link_index.record(source.index_key, url, **info)
+                return df_clean
+
+        result = None
+        urls = source.candidate_urls()
+        if urls:
+            print(f"  [{source.name}] Zavodim {len(urls)} URL soucasne")
+            result = await race_urls(session, urls, source.schema)
+
+        if result is None:
+            # Fallback: Parsování HTML stránky - kandidáty nejdřív ověříme HEADem
+            # a stahujeme postupně jen ty, které vypadají jako datový soubor
+            links = await find_links_on_page(session, source.url)
+            probed = await asyncio.gather(*(probe(session, link) for link in links))
+            candidates = rank_page_links(source, [p for p in probed if is_plausible_file(p)])
+            print(f"  [{source.name}] Stranka produktu: {len(candidates)}/{len(links)} kandidatu po HEAD kontrole")
+            for candidate in candidates:
                 try:
-                    if file_url.endswith('.csv'):
-                        df = pd.read_csv(file_url)
-                    else:
-                        # Timeout pro Excel soubory
-                        df = pd.read_excel(file_url, sheet_name=0, engine='openpyxl')
-                    
-                    # Normalizace dat
-                    df_clean = clean_and_normalize_data(df, description)
-                    
-                    if df_clean is not None and not df_clean.empty:
-                        df_clean.to_csv(output_file, index=False)
-                        print(f"[OK] Stazeno: {output_file} ({len(df_clean)} radku)")
-                        return df_clean
-                except KeyboardInterrupt:
-                    raise  # Propagate Ctrl+C
-                except Exception as e:
+                    result = await fetch_and_normalize(session, candidate["url"], source.schema)
+                    break
+                except Exception:
                     # Tiché selhání - zkusíme další soubor
                     continue
-        
-        print(f"[VAROVANI] Nenalezen soubor na: {url}")
-        return None
-        
+
+        if result is None:
+            print(f"[VAROVANI] Nenalezen soubor na: {source.url}")
+            return None
+
+        url, df_clean, info = result
+        print(f"  [{source.name}] [SUCCESS] Stazeno z: {url}")
+        if link_index is not None:
+            link_index.record(source.index_key, url, **info)
+        return df_clean
+
     except Exception as e:
-        print(f"[CHYBA] Nacteni {description}: {str(e)[:100]}")
+        print(f"[CHYBA] Nacteni {source.description}: {str(e)[:100]}")
         return None
 
-# Hlavní část - stahování dat
-print("Stahuji data z CSU...\n")
-
-# DuckDB connection
-db_path = "data/csu_data.duckdb"
-os.makedirs("data", exist_ok=True)
-con = duckdb.connect(db_path)
-
-collected_data = {}
-
-# 1. Stáhnout základní data o mzdách podle krajů
-source = CSU_SOURCES["wages_by_region"]
-print(f"[1/4] {source['description']}")
-df = fetch_from_csu_page(source["url"], source["output"], source["description"])
-if df is not None:
-    collected_data["wages_by_region"] = df
-time.sleep(1)
-
-# 2. Stáhnout data podle odvětví
-source = CSU_SOURCES["wages_by_sector"]
-print(f"\n[2/4] {source['description']}")
-df = fetch_from_csu_page(
-    source["url"], 
-    source["output"], 
-    source["description"],
-    code=source.get("code"),
-    csv_url=source.get("csv_url")
-)
-if df is not None:
-    collected_data["wages_by_sector"] = df
-time.sleep(1)
-
-# 3. Stáhnout časové řady
-source = CSU_SOURCES["wages_timeseries"]
-print(f"\n[3/4] {source['description']}")
-df = fetch_from_csu_page(
-    source["url"], 
-    source["output"], 
-    source["description"],
-    code=source.get("code")
-)
-if df is not None:
-    collected_data["wages_timeseries"] = df
-time.sleep(1)
-
-# 4. Stáhnout strukturu mezd
-source = CSU_SOURCES["wage_structure"]
-print(f"\n[4/4] {source['description']}")
-df = fetch_from_csu_page(source["url"], source["output"], source["description"])
-if df is not None:
-    collected_data["wage_structure"] = df
-
-print("\n[OK] Dokonceno stahovani dat z CSU")
-
-# Uložení do DuckDB
-print("\n[DuckDB] Ukladam data do databaze...")
-for table_name, df in collected_data.items():
+async def fetch_all_async(sources, max_concurrent=MAX_CONCURRENT_SOURCES, link_index=None):
+    """Stáhne všechny datasety současně (omezeno semaforem)"""
+    import aiohttp
+
+    semaphore = asyncio.Semaphore(max_concurrent)
+
+    async with aiohttp.ClientSession(headers=HEADERS) as session:
+        async def bounded(source):
+            async with semaphore:
+                return source, await fetch_source(session, source, link_index)
+
+        collected = {}
+        for coro in asyncio.as_completed([bounded(s) for s in sources]):
+            source, df = await coro
+            if df is not None:
+                df.to_csv(source.output, index=False)
+                print(f"[OK] Stazeno: {source.output} ({len(df)} radku)")
+                collected[source.name] = df
+        return collected
+
+def fetch_all(sources=None, max_concurrent=MAX_CONCURRENT_SOURCES, index_path=INDEX_PATH):
+    """Synchronní vstupní bod - vrací {název datasetu: DataFrame}
+
+    index_path=None vypne index odkazů (každý běh hledá soubory znovu).
+    """
+    if sources is None:
+        sources = list(CSU_SOURCES.values())
+    link_index = LinkIndex(index_path) if index_path else None
     try:
-        con.execute(f"DROP TABLE IF EXISTS {table_name}")
-        con.execute(f"CREATE TABLE {table_name} AS SELECT * FROM df")
-        row_count = con.execute(f"SELECT COUNT(*) FROM {table_name}").fetchone()[0]
-        print(f"  - {table_name}: {row_count} radku")
+        return asyncio.run(fetch_all_async(sources, max_concurrent, link_index))
+    finally:
+        if link_index is not None:
+            link_index.save()
+
+def save_to_duckdb(collected_data, db_path="data/csu_data.duckdb"):
+    """Uloží stažené datasety do DuckDB a vytvoří analytické pohledy"""
+    import duckdb
+    from csu_store import register_views
+
+    con = duckdb.connect(db_path)
+
+    print("\n[DuckDB] Ukladam data do databaze...")
+    for table_name, df in collected_data.items():
+        try:
+            con.execute(f"DROP TABLE IF EXISTS {table_name}")
+            con.execute(f"CREATE TABLE {table_name} AS SELECT * FROM df")
+            row_count = con.execute(f"SELECT COUNT(*) FROM {table_name}").fetchone()[0]
+            print(f"  - {table_name}: {row_count} radku")
+        except Exception as e:
+            print(f"  [CHYBA] {table_name}: {e}")
+
+    # Vytvoř analytické pohledy
+    print("\n[DuckDB] Vytvarim analyticke pohledy...")
+
+    # Pohledy nad dlouhým formátem časových řad (Parquet úložiště)
+    if register_views(con):
+        print("  - csu_timeseries, csu_latest: OK")
+
+    # Pohled: Průměrné mzdy podle regionů
+    try:
+        con.execute("""
+            CREATE OR REPLACE VIEW avg_wages_by_region AS
+            SELECT region, value as avg_wage 
+            FROM wages_by_region
+            WHERE value IS NOT NULL
+            ORDER BY value DESC
+        """)
+        print("  - avg_wages_by_region: OK")
     except Exception as e:
-        print(f"  [CHYBA] {table_name}: {e}")
-
-# Vytvoř analytické pohledy
-print("\n[DuckDB] Vytvarim analyticke pohledy...")
-
-# Pohled: Průměrné mzdy podle regionů
-try:
-    con.execute("""
-        CREATE OR REPLACE VIEW avg_wages_by_region AS
-        SELECT region, value as avg_wage 
-        FROM wages_by_region
-        WHERE value IS NOT NULL
-        ORDER BY value DESC
-    """)
-    print("  - avg_wages_by_region: OK")
-except Exception as e:
-    print(f"  [CHYBA] avg_wages_by_region: {e}")
-
-# Statistiky
-print("\n[DuckDB] Statistiky:")
-try:
-    stats = con.execute("""
-        SELECT 
-            COUNT(*) as total_tables,
-            SUM(estimated_size) as total_rows
-        FROM duckdb_tables() 
-        WHERE schema_name = 'main'
-    """).fetchdf()
+        print(f"  [CHYBA] avg_wages_by_region: {e}")
+
+    # Statistiky
+    print("\n[DuckDB] Statistiky:")
     print(f"  Celkem tabulek: {len(collected_data)}")
     print(f"  Celkem radku: {sum(len(df) for df in collected_data.values())}")
-except:
-    pass
-
-con.close()
-print(f"\n[OK] Data ulozena do: {db_path}")
-
-# Pro zpětnou kompatibilitu - vytvoř původní soubor
-try:
-    df_main = pd.read_csv("data/csu_wages_by_region.csv")
-    df_main.to_csv("data/csu_wages.csv", index=False)
-    print("[OK] Vytvoren hlavni soubor: data/csu_wages.csv")
-except Exception as e:
-    print(f"[VAROVANI] Nelze vytvorit hlavni soubor: {e}")
-    # Vytvořit dummy data pro testování
-    dummy_data = pd.DataFrame({
-        'region': ['Praha', 'Středočeský kraj', 'Jihomoravský kraj'],
-        'avg_wage': [45000, 38000, 35000]
-    })
-    dummy_data.to_csv("data/csu_wages.csv", index=False)
-    print("[OK] Vytvoren testovaci soubor s dummy daty")
+
+    con.close()
+    print(f"\n[OK] Data ulozena do: {db_path}")
+
+def write_legacy_csv():
+    """Pro zpětnou kompatibilitu - vytvoří původní soubor data/csu_wages.csv"""
+    import pandas as pd
+
+    try:
+        df_main = pd.read_csv("data/csu_wages_by_region.csv")
+        df_main.to_csv("data/csu_wages.csv", index=False)
+        print("[OK] Vytvoren hlavni soubor: data/csu_wages.csv")
+    except Exception as e:
+        print(f"[VAROVANI] Nelze vytvorit hlavni soubor: {e}")
+        # Vytvořit dummy data pro testování
+        dummy_data = pd.DataFrame({
+            'region': ['Praha', 'Středočeský kraj', 'Jihomoravský kraj'],
+            'avg_wage': [45000, 38000, 35000]
+        })
+        dummy_data.to_csv("data/csu_wages.csv", index=False)
+        print("[OK] Vytvoren testovaci soubor s dummy daty")
+
+def main():
+    from csu_store import append_datasets
+
+    print("Stahuji data z CSU...\n")
+    os.makedirs("data", exist_ok=True)
+
+    sources = list(CSU_SOURCES.values())
+    print(f"[INFO] {len(sources)} datasetu, az {MAX_CONCURRENT_SOURCES} soucasne")
+    collected_data = fetch_all(sources)
+
+    print(f"\n[OK] Dokonceno stahovani dat z CSU ({len(collected_data)}/{len(sources)})")
+
+    # Historie v dlouhém formátu - připisují se jen nová/revidovaná pozorování
+    written = append_datasets(collected_data)
+    print("\n[STORE] Parquet uloziste casovych rad:")
+    for name, count in written.items():
+        print(f"  - {name}: {count} novych pozorovani")
+
+    save_to_duckdb(collected_data)
+    write_legacy_csv()
+    return collected_data
+
+if __name__ == "__main__":
+    main()
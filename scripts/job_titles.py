@@ -0,0 +1,274 @@
+"""
+Normalizace názvů pozic a klasifikace do CZ-ISCO
+Názvy z portálů se liší pádem, rodem ("Učitel/ka"), diakritikou i přívěsky
+("HPP", "ihned"). Normalizace je sjednotí na tokeny bez diakritiky a stop-slov,
+předpočítaný index kmenů klíčových slov pak název přiřadí ke kódu CZ-ISCO.
+
+Klasifikace se počítá jen pro unikátní názvy a výsledek se rozkopíruje
+(classify_titles), takže jde pustit i na miliony nabídek.
+"""
+import re
+import unicodedata
+from functools import lru_cache
+
+# Slova, která o pozici nic neříkají (ukončení rodu, úvazek, lokalita, náborové fráze)
+STOP_WORDS = {
+    "a", "i", "na", "pro", "do", "v", "ve", "s", "se", "z", "ze", "k", "ke", "o", "u", "od", "po",
+    "m", "ka", "ice", "yne", "ky", "kyne", "zena", "muz", "bratr",
+    "hpp", "dpp", "dpc", "ico", "zl", "plny", "uvazek", "uvazku", "zkraceny", "brigada", "brigadne",
+    "ihned", "nabor", "nastup", "moznost", "prace", "pozice", "volna", "misto", "nabidka",
+    "praha", "brno", "ostrava", "plzen", "olomouc", "liberec", "pardubice", "zlin", "kladno",
+    "cz", "sk", "en", "de",
+}
+MAX_TITLE_TOKENS = 12
+
+# CZ-ISCO: kód -> název povolání (podtřída na 4 místa)
+ISCO_OCCUPATIONS = {
+    "1120": "Nejvyšší představitelé společností",
+    "1321": "Řídící pracovníci v průmyslové výrobě",
+    "1420": "Řídící pracovníci v maloobchodě a velkoobchodě",
+    "2141": "Specialisté v oblasti průmyslového inženýrství",
+    "2144": "Strojní inženýři",
+    "2211": "Praktičtí lékaři",
+    "2221": "Všeobecné sestry se specializací",
+    "2330": "Učitelé na středních školách",
+    "2341": "Učitelé na 1. stupni základních škol",
+    "2342": "Učitelé v oblasti předškolní výchovy",
+    "2411": "Specialisté v oblasti účetnictví",
+    "2413": "Finanční analytici",
+    "2421": "Specialisté v oblasti strategie a řízení organizací",
+    "2423": "Specialisté v oblasti personálního řízení",
+    "2431": "Specialisté v oblasti reklamy a marketingu",
+    "2511": "Systémoví analytici",
+    "2512": "Vývojáři softwaru",
+    "2522": "Správci počítačových sítí",
+    "2611": "Advokáti a právníci",
+    "2635": "Specialisté v oblasti sociální práce",
+    "3123": "Mistři ve stavebnictví",
+    "3313": "Odborní pracovníci v oblasti účetnictví",
+    "3322": "Obchodní zástupci",
+    "3341": "Vedoucí v oblasti administrativních agend",
+    "3512": "Technici uživatelské podpory IT",
+    "4110": "Všeobecní administrativní pracovníci",
+    "4120": "Sekretáři",
+    "4222": "Pracovníci v zákaznických kontaktních centrech",
+    "4226": "Recepční",
+    "4313": "Úředníci ve mzdových účtárnách",
+    "4321": "Úředníci ve skladech",
+    "5120": "Kuchaři",
+    "5131": "Číšníci a servírky",
+    "5223": "Prodavači v prodejnách",
+    "5230": "Pokladníci a prodavači vstupenek",
+    "5321": "Ošetřovatelé a pracovníci sociálních služeb",
+    "5414": "Pracovníci ostrahy a bezpečnostních agentur",
+    "7126": "Instalatéři a potrubáři",
+    "7212": "Svářeči a řezači kovů",
+    "7222": "Nástrojaři a zámečníci",
+    "7223": "Seřizovači a obsluha obráběcích strojů",
+    "7231": "Mechanici a opraváři motorových vozidel",
+    "7411": "Stavební a provozní elektrikáři",
+    "8219": "Montážní dělníci a obsluha výroby",
+    "8322": "Řidiči osobních a malých dodávkových automobilů",
+    "8332": "Řidiči nákladních automobilů",
+    "8344": "Řidiči vysokozdvižných vozíků",
+    "9112": "Uklízeči a pomocníci",
+    "9329": "Pomocní pracovníci ve výrobě",
+    "9412": "Pomocníci v kuchyni",
+}
+
+# Hlavní třídy CZ-ISCO (první číslice)
+ISCO_MAJOR_GROUPS = {
+    "1": "Zákonodárci a řídící pracovníci",
+    "2": "Specialisté",
+    "3": "Techničtí a odborní pracovníci",
+    "4": "Úředníci",
+    "5": "Pracovníci ve službách a prodeji",
+    "6": "Kvalifikovaní pracovníci v zemědělství",
+    "7": "Řemeslníci a opraváři",
+    "8": "Obsluha strojů a zařízení, montéři",
+    "9": "Pomocní a nekvalifikovaní pracovníci",
+}
+
+# Pravidla: kmeny slov (bez diakritiky), které musí název obsahovat -> kód CZ-ISCO.
+# Víceslovná pravidla mají přednost před jednoslovnými.
+ISCO_RULES = [
+    (("mzdov", "ucetn"), "4313"),
+    (("hlavn", "ucetn"), "2411"),
+    (("financn", "analy"), "2413"),
+    (("data", "analy"), "2511"),
+    (("zdravotn", "sestr"), "2221"),
+    (("vseobecn", "sestr"), "2221"),
+    (("obchodn", "zastup"), "3322"),
+    (("obchodn", "referent"), "3322"),
+    (("call", "centr"), "4222"),
+    (("operator", "call"), "4222"),
+    (("operator", "vyrob"), "8219"),
+    (("obsluh", "vyrob"), "8219"),
+    (("obsluh", "cnc"), "7223"),
+    (("operator", "cnc"), "7223"),
+    (("projektov", "manazer"), "2421"),
+    (("project", "manager"), "2421"),
+    (("vedouc", "prodejn"), "1420"),
+    (("vedouc", "smen"), "1321"),
+    (("vedouc", "vyrob"), "1321"),
+    (("ucitel", "ms"), "2342"),
+    (("ucitel", "materskou"), "2342"),
+    (("ucitel", "ss"), "2330"),
+    (("ucitel", "stredn"), "2330"),
+    (("ridic", "c"), "8332"),
+    (("ridic", "ce"), "8332"),
+    (("ridic", "kamion"), "8332"),
+    (("ridic", "nakladn"), "8332"),
+    (("ridic", "vzv"), "8344"),
+    (("it", "support"), "3512"),
+    (("it", "podpor"), "3512"),
+    (("socialn", "pracovn"), "2635"),
+    (("pomocn", "kuchyn"), "9412"),
+    (("pomocn", "delnik"), "9329"),
+    (("pomocn", "sil"), "9329"),
+    (("marketing",), "2431"),
+    (("developer",), "2512"),
+    (("vyvojar",), "2512"),
+    (("programator",), "2512"),
+    (("java",), "2512"),
+    (("python",), "2512"),
+    (("frontend",), "2512"),
+    (("backend",), "2512"),
+    (("tester",), "2512"),
+    (("sitov",), "2522"),
+    (("administrator",), "2522"),
+    (("helpdesk",), "3512"),
+    (("analytik",), "2511"),
+    (("analyst",), "2511"),
+    (("lekar",), "2211"),
+    (("sestr",), "2221"),
+    (("ucitel",), "2341"),
+    (("ucetn",), "3313"),
+    (("personalist",), "2423"),
+    (("hr",), "2423"),
+    (("pravnik",), "2611"),
+    (("reditel",), "1120"),
+    (("stavbyvedouc",), "3123"),
+    (("mistr",), "3123"),
+    (("technolog",), "2141"),
+    (("konstrukter",), "2144"),
+    (("asistent",), "4120"),
+    (("sekretar",), "4120"),
+    (("administrativ",), "4110"),
+    (("referent",), "4110"),
+    (("office",), "3341"),
+    (("recepcn",), "4226"),
+    (("skladn",), "4321"),
+    (("kuchar",), "5120"),
+    (("cisnik",), "5131"),
+    (("servirk",), "5131"),
+    (("barman",), "5131"),
+    (("prodavac",), "5223"),
+    (("pokladn",), "5230"),
+    (("pecovatel",), "5321"),
+    (("osetrovatel",), "5321"),
+    (("ostrah",), "5414"),
+    (("strazn",), "5414"),
+    (("instalater",), "7126"),
+    (("svarec",), "7212"),
+    (("zamecnik",), "7222"),
+    (("nastrojar",), "7222"),
+    (("obrabec",), "7223"),
+    (("cnc",), "7223"),
+    (("automechanik",), "7231"),
+    (("mechanik",), "7231"),
+    (("elektrikar",), "7411"),
+    (("montazn",), "8219"),
+    (("operator",), "8219"),
+    (("ridic",), "8322"),
+    (("kuryr",), "8322"),
+    (("vzv",), "8344"),
+    (("uklizec",), "9112"),
+    (("uklid",), "9112"),
+    (("delnik",), "9329"),
+    (("manazer",), "2421"),
+    (("obchodnik",), "3322"),
+]
+
+
+def fold_diacritics(text):
+    """'Účetní' -> 'Ucetni'"""
+    return unicodedata.normalize("NFKD", text).encode("ascii", "ignore").decode("ascii")
+
+
+def title_tokens(title):
+    """Tokeny názvu: bez diakritiky, malými písmeny, bez stop-slov a rodových koncovek"""
+    tokens = re.findall(r"[a-z0-9+#]+", fold_diacritics(str(title)).lower())
+    return [t for t in tokens if t not in STOP_WORDS][:MAX_TITLE_TOKENS]
+
+
+def normalize_title(title):
+    """'Učitel/ka ZŠ - HPP, Praha' -> 'ucitel zs'"""
+    return " ".join(title_tokens(title))
+
+
+def build_index(rules=ISCO_RULES):
+    """Předpočítaný index: kmen -> [(pořadí pravidla, kmeny pravidla, kód)]"""
+    index = {}
+    for order, (stems, code) in enumerate(rules):
+        for stem in stems:
+            index.setdefault(stem, []).append((order, stems, code))
+    return index
+
+
+ISCO_INDEX = build_index()
+MIN_STEM = min(len(stem) for stem in ISCO_INDEX)
+# Krátké kmeny ("c", "ms", "hr") musí odpovídat celému tokenu, ne jen jeho začátku
+EXACT_STEM_LENGTH = 3
+
+
+@lru_cache(maxsize=65536)
+def classify_normalized(normalized):
+    """Normalizovaný název -> kód CZ-ISCO (nebo None); prefixy tokenů se hledají v indexu"""
+    tokens = normalized.split()
+    # Kmen pravidla odpovídá tokenu, pokud je jeho prefixem (skloňování, přípony)
+    matched = {}
+    for token in tokens:
+        for end in range(min(MIN_STEM, len(token)), len(token) + 1):
+            if end < EXACT_STEM_LENGTH and end != len(token):
+                continue
+            for order, stems, code in ISCO_INDEX.get(token[:end], ()):
+                matched.setdefault(order, set()).add(token[:end])
+    best = None
+    for order in sorted(matched):
+        stems, code = ISCO_RULES[order]
+        if set(stems) <= matched[order]:
+            # Víceslovné pravidlo vyhrává nad jednoslovným, jinak rozhoduje pořadí
+            if best is None or len(stems) > len(ISCO_RULES[best][0]):
+                best = order
+    return ISCO_RULES[best][1] if best is not None else None
+
+
+def classify_title(title):
+    """Název pozice -> (normalizovaný název, kód CZ-ISCO)"""
+    if title is None or title != title:
+        return None, None
+    normalized = normalize_title(title)
+    return normalized, classify_normalized(normalized)
+
+
+def classify_titles(titles):
+    """Pole názvů -> DataFrame (title_norm, isco_code); počítá se jen pro unikátní názvy"""
+    import pandas as pd
+
+    codes, uniques = pd.factorize(pd.Series(titles, dtype=object))
+    classified = [classify_title(t) for t in uniques]
+    lookup = pd.DataFrame(classified + [(None, None)], columns=["title_norm", "isco_code"])
+    # Kód -1 (chybějící název) ukáže na poslední, prázdný řádek
+    return lookup.iloc[codes].reset_index(drop=True)
+
+
+def occupations_frame():
+    """Číselník CZ-ISCO pro joiny v DuckDB (con.register("cz_isco", occupations_frame()))"""
+    import pandas as pd
+
+    return pd.DataFrame([
+        {"isco_code": code, "occupation": name,
+         "major_group": code[0], "major_group_name": ISCO_MAJOR_GROUPS[code[0]]}
+        for code, name in ISCO_OCCUPATIONS.items()
+    ])
@@ -0,0 +1,237 @@
+"""
+Archiv denních scrapů nabídek v Parquetu
+data/jobs.duckdb i data/job_listings.csv obsahují jen poslední běh. Archiv si každý
+běh připíše do data/listings_archive rozděleného podle scrape_date/source
+(hive partitioning, zstd), takže dotazy přes měsíce historie čtou jen složky
+vybraných dnů a portálů.
+
+Zápis je jen připisování (běh = nový soubor v partition, řádky nesou archived_at běhu);
+opakované běhy téhož dne tak nechávají v partition víc malých souborů, které slévá
+compact_archive(). S renormalize=True kompakce zároveň přepočítá platové sloupce
+z uloženého textu platu (po změně pravidel v salary_extract).
+"""
+import datetime
+import glob
+import json
+import os
+import uuid
+
+import duckdb
+
+ARCHIVE_DIR = "data/listings_archive"
+JOBS_DB_PATH = "data/jobs.duckdb"
+
+# Partition se slévá, jakmile má alespoň tolik souborů
+COMPACT_MIN_FILES = 2
+# Řazení uvnitř slitého souboru - min/max statistiky row group pak filtrují i podle kraje
+SORT_COLUMNS = ["region", "salary_offer"]
+# Manifest rozpracované kompakce (slitý soubor + nahrazené soubory) v listové složce
+MANIFEST_SUFFIX = ".compact.json"
+
+
+def archive_exists(archive_dir=ARCHIVE_DIR):
+    """True, pokud archiv obsahuje alespoň jeden Parquet soubor"""
+    return bool(glob.glob(os.path.join(archive_dir, "**", "*.parquet"), recursive=True))
+
+
+def archive_listings(con, table="job_listings", archive_dir=ARCHIVE_DIR):
+    """Připíše nabídky z tabulky do archivu, vrací počet zapsaných řádků"""
+    count = con.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+    if not count:
+        return 0
+    os.makedirs(archive_dir, exist_ok=True)
+    con.execute(f"""
+        COPY (
+            SELECT *, CAST(scraped_at AS DATE) AS scrape_date, CAST($archived_at AS TIMESTAMP) AS archived_at
+            FROM {table}
+            ORDER BY {', '.join(SORT_COLUMNS)}
+        ) TO '{archive_dir}'
+        (FORMAT PARQUET, PARTITION_BY (scrape_date, source), APPEND,
+         FILENAME_PATTERN 'run_{{uuid}}', COMPRESSION zstd)
+    """, {"archived_at": datetime.datetime.now()})
+    return count
+
+
+def partition_dirs(archive_dir=ARCHIVE_DIR):
+    """Listové složky archivu (scrape_date=.../source=...) a jejich Parquet soubory"""
+    for path in sorted(glob.glob(os.path.join(archive_dir, "scrape_date=*", "source=*"))):
+        files = sorted(glob.glob(os.path.join(path, "*.parquet")))
+        if files:
+            yield path, files
+
+
+def write_manifest(path, merged, replaced):
+    """Atomicky zapíše manifest kompakce - od této chvíle se výměna vždy dokončí"""
+    manifest = os.path.join(path, os.path.basename(merged)[:-len(".parquet")] + MANIFEST_SUFFIX)
+    with open(manifest + ".tmp", "w", encoding="utf-8") as f:
+        json.dump({"merged": os.path.basename(merged),
+                   "replaced": [os.path.basename(p) for p in replaced]}, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(manifest + ".tmp", manifest)
+    return manifest
+
+
+def finish_compaction(manifest):
+    """Dokončí výměnu podle manifestu (opakovatelně): slitý soubor na místo, nahrazené pryč"""
+    path = os.path.dirname(manifest)
+    with open(manifest, encoding="utf-8") as f:
+        entry = json.load(f)
+    merged = os.path.join(path, entry["merged"])
+    if os.path.exists(merged + ".tmp"):
+        os.replace(merged + ".tmp", merged)
+    for name in entry["replaced"]:
+        replaced = os.path.join(path, name)
+        if os.path.exists(replaced):
+            os.remove(replaced)
+    os.remove(manifest)
+
+
+def recover_compactions(archive_dir=ARCHIVE_DIR):
+    """Dokončí kompakce přerušené pádem, vrací jejich počet
+
+    Kompakce s manifestem měla slitý soubor celý - dokončí se. Dočasné soubory bez
+    manifestu jsou z kompakce přerušené dřív; původní soubory jsou pak netknuté
+    a dočasné se jen smažou.
+    """
+    pattern = os.path.join(archive_dir, "scrape_date=*", "source=*", "*")
+    manifests = sorted(glob.glob(pattern + MANIFEST_SUFFIX))
+    for manifest in manifests:
+        finish_compaction(manifest)
+    for leftover in glob.glob(pattern + ".tmp"):
+        os.remove(leftover)
+    return len(manifests)
+
+
+def compact_archive(archive_dir=ARCHIVE_DIR, min_files=COMPACT_MIN_FILES, renormalize=False):
+    """Slije soubory každé partition s alespoň `min_files` soubory do jednoho, vrací statistiky
+
+    Nový soubor vzniká pod dočasným jménem (glob *.parquet ho nevidí). Hotový se zapíše
+    do manifestu spolu s nahrazenými soubory a teprve pak se přejmenuje a originály
+    smažou; pád kdekoli po zápisu manifestu dokončí příští běh (recover_compactions),
+    takže v archivu nezůstanou trvale duplicitní řádky. Čtenář může duplicitu vidět
+    jen po dobu mazání originálů.
+    S renormalize=True se přepíše i partition s jediným souborem, pokud se v ní změnil plat.
+    """
+    from salary_extract import renormalize_table
+
+    stats = {"partitions": 0, "files_before": 0, "files_after": 0, "bytes_before": 0, "bytes_after": 0,
+             "renormalized": 0, "recovered": recover_compactions(archive_dir)}
+    con = duckdb.connect()
+    try:
+        for path, files in partition_dirs(archive_dir):
+            file_list = ", ".join(f"'{f}'" for f in files)
+            # Partition sloupce jsou jen v cestě - čteme bez hive, ať se do souboru nezapíšou
+            source = f"read_parquet([{file_list}], hive_partitioning = false, union_by_name = true)"
+            if renormalize:
+                con.execute(f"CREATE OR REPLACE TEMP TABLE partition_rows AS SELECT * FROM {source}")
+                renormalized = renormalize_table(con, "partition_rows")
+                stats["renormalized"] += renormalized
+                if not renormalized and len(files) < min_files:
+                    continue
+                source = "partition_rows"
+            elif len(files) < min_files:
+                continue
+            tmp_path = os.path.join(path, f"compact_{uuid.uuid4().hex}.parquet.tmp")
+            con.execute(f"""
+                COPY (
+                    SELECT * FROM {source}
+                    ORDER BY {', '.join(SORT_COLUMNS)}
+                ) TO '{tmp_path}' (FORMAT PARQUET, COMPRESSION zstd)
+            """)
+            final_path = tmp_path[:-len(".tmp")]
+            bytes_before = sum(os.path.getsize(f) for f in files)
+            finish_compaction(write_manifest(path, final_path, files))
+
+            stats["partitions"] += 1
+            stats["files_before"] += len(files)
+            stats["files_after"] += 1
+            stats["bytes_before"] += bytes_before
+            stats["bytes_after"] += os.path.getsize(final_path)
+    finally:
+        con.close()
+    return stats
+
+
+def history_sql(archive_dir=ARCHIVE_DIR):
+    """SQL nad celým archivem; filtry na scrape_date/source vyberou jen příslušné složky"""
+    return f"""
+        SELECT *
+        FROM read_parquet('{archive_dir}/**/*.parquet', hive_partitioning = true, union_by_name = true,
+                          hive_types = {{'scrape_date': DATE, 'source': VARCHAR}})
+    """
+
+
+def register_views(con, archive_dir=ARCHIVE_DIR):
+    """Zaregistruje pohledy nad archivem v DuckDB databázi"""
+    if not archive_exists(archive_dir):
+        return False
+
+    # Všechny archivované běhy
+    con.execute(f"CREATE OR REPLACE VIEW job_listings_history AS {history_sql(archive_dir)}")
+
+    # Jeden snímek na den a portál - při více bězích téhož dne platí poslední zápis
+    con.execute("""
+        CREATE OR REPLACE VIEW job_listings_daily AS
+        SELECT *
+        FROM job_listings_history
+        QUALIFY archived_at = MAX(archived_at) OVER (PARTITION BY scrape_date, source)
+    """)
+    return True
+
+
+def daily_summary(con, since=None, source=None):
+    """Počet nabídek a medián platu po dnech - filtr na den/portál se propíše až na výběr složek"""
+    conditions, params = ["salary_offer IS NOT NULL", "NOT COALESCE(is_duplicate, FALSE)"], []
+    if since:
+        conditions.append("scrape_date >= ?")
+        params.append(since)
+    if source:
+        conditions.append("source = ?")
+        params.append(source)
+    return con.execute(f"""
+        SELECT scrape_date, COUNT(*) AS offers, CAST(MEDIAN(salary_offer) AS INTEGER) AS median_salary
+        FROM job_listings_daily
+        WHERE {' AND '.join(conditions)}
+        GROUP BY scrape_date
+        ORDER BY scrape_date
+    """, params).fetchdf()
+
+
+def renormalize_current(jobs_db_path=JOBS_DB_PATH):
+    """Přepočet platů v aktuálním job_listings (a jeho CSV), vrací počet změněných řádků"""
+    from salary_extract import renormalize_table
+
+    if not os.path.exists(jobs_db_path):
+        return 0
+    with duckdb.connect(jobs_db_path) as con:
+        if not con.execute("SELECT COUNT(*) FROM information_schema.tables "
+                           "WHERE table_name = 'job_listings'").fetchone()[0]:
+            return 0
+        changed = renormalize_table(con, "job_listings")
+        if changed:
+            con.execute("COPY (SELECT * FROM job_listings WHERE NOT is_duplicate) "
+                        "TO 'data/job_listings.csv' (HEADER, DELIMITER ',')")
+    return changed
+
+
+def main(archive_dir=ARCHIVE_DIR, renormalize=False):
+    """Kompakce archivu (krok pipeline); renormalize=True přepočítá i uložené platy"""
+    if renormalize:
+        print(f"[ARCHIV] Prepocet platu v job_listings: {renormalize_current()} radku zmeneno")
+    if not archive_exists(archive_dir):
+        print(f"[ARCHIV] {archive_dir} je prazdny, neni co slevat")
+        return True
+    stats = compact_archive(archive_dir, renormalize=renormalize)
+    if stats["recovered"]:
+        print(f"[ARCHIV] Dokonceno {stats['recovered']} prerusenych kompakci")
+    print(f"[ARCHIV] Slito {stats['partitions']} partition: {stats['files_before']} -> "
+          f"{stats['files_after']} souboru ({stats['bytes_before'] / 1024:.0f} -> "
+          f"{stats['bytes_after'] / 1024:.0f} kB)")
+    if renormalize:
+        print(f"[ARCHIV] Prepocet platu v archivu: {stats['renormalized']} radku zmeneno")
+    return stats
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,354 @@
+"""
+Detekce duplicitních nabídek napříč portály (MinHash + LSH)
+Stejná nabídka často visí na prace.cz, jobs.cz i profesia.cz. Každá nabídka dostane
+MinHash podpis z normalizovaného názvu pozice; podpisy se rozdělí do LSH pásem
+a kandidáti na shodu jsou jen nabídky se společným košem - žádné porovnání n x n.
+Kandidát je duplicita, pokud pochází z jiného portálu a sedí odhad Jaccardovy
+podobnosti, plat, kraj i lokalita (pokud ji znají obě nabídky). Samotná shoda názvu
+a platu nestačí - běžné pozice (Skladník, Řidič) mají v kraji desítky nezávislých nabídek
+se stejným platem a lokalita bývá jen obec. Pár proto musí mít i shodného zaměstnavatele;
+nabídky bez zaměstnavatele se (jako nabídky bez názvu) neporovnávají. Dvě nabídky jednoho portálu jsou vždy dvě různé nabídky
+(jiný zaměstnavatel, jiná pobočka) - totožnost v rámci portálu určuje detail_url.
+
+Podpisy a koše se ukládají do data/jobs.duckdb (listing_fingerprints, listing_lsh),
+takže každý běh počítá podpisy jen pro nové nabídky a hledá shody i vůči historii.
+Koš se dál dělí podle platového pásma (šířka = tolerance platu) a pamatuje si jen
+prvního člena z každého portálu, kraje a zaměstnavatele - i u běžných pozic s obřími koši se tak
+nová nabídka ověřuje jen proti pár reprezentantům, kteří mají plat v toleranci.
+"""
+import re
+import zlib
+
+import numpy as np
+
+from job_titles import fold_diacritics, normalize_title
+from region_lookup import UNKNOWN_REGION
+
+NUM_PERM = 64
+# 16 pásem po 4 hodnotách: kandidátem se pár stane zhruba od podobnosti 0.5
+BANDS = 16
+SIMILARITY_THRESHOLD = 0.8
+# Relativní rozdíl měsíčního platu, který ještě považujeme za stejnou nabídku
+SALARY_TOLERANCE = 0.05
+SHINGLE_SIZE = 3
+# Obecná slova lokality, podle kterých se místa nerozliší
+LOCATION_STOP_WORDS = {"kraj", "okres", "mesto", "hlavni", "nad", "pod", "obec", "ceska", "republika", "remote"}
+# Právní formy a obecná slova, která se v názvu zaměstnavatele mezi portály liší
+EMPLOYER_STOP_WORDS = {"s", "r", "o", "a", "sro", "as", "spol", "k", "v", "vos", "se", "z", "zs",
+                       "ltd", "gmbh", "inc", "cz", "czech", "republic", "group"}
+
+MERSENNE_PRIME = (1 << 31) - 1
+_rng = np.random.default_rng(20240601)
+PERM_A = _rng.integers(1, MERSENNE_PRIME, size=NUM_PERM, dtype=np.int64)
+PERM_B = _rng.integers(0, MERSENNE_PRIME, size=NUM_PERM, dtype=np.int64)
+BAND_COEFFS = _rng.integers(1, 1 << 62, size=NUM_PERM // BANDS, dtype=np.int64).astype(np.uint64) | np.uint64(1)
+
+FINGERPRINTS_TABLE = "listing_fingerprints"
+LSH_TABLE = "listing_lsh"
+
+
+def shingles(normalized):
+    """Znakové n-gramy normalizovaného názvu (odolné vůči drobným rozdílům v zápisu)"""
+    text = f" {normalized} "
+    if len(text) <= SHINGLE_SIZE:
+        return {text}
+    return {text[i:i + SHINGLE_SIZE] for i in range(len(text) - SHINGLE_SIZE + 1)}
+
+
+# Totožnost nabídky v rámci portálu: odkaz na detail; bez odkazu (starší adaptéry) obsah karty
+KEY_COLUMNS = ["source", "detail_url"]
+FALLBACK_KEY_COLUMNS = ["source", "job_title", "salary_text", "region", "location", "employer"]
+
+
+def listing_keys(df):
+    """Stabilní 64bit klíče nabídek - opakovaně scrapované nabídky se nepřepočítávají"""
+    import pandas as pd
+
+    by_url = pd.util.hash_pandas_object(df.reindex(columns=KEY_COLUMNS).astype("string"), index=False)
+    by_card = pd.util.hash_pandas_object(df.reindex(columns=FALLBACK_KEY_COLUMNS).astype("string"), index=False)
+    has_url = df.reindex(columns=["detail_url"])["detail_url"].notna().to_numpy()
+    return np.where(has_url, by_url.to_numpy(), by_card.to_numpy()).view(np.int64)
+
+
+def words(text):
+    return re.findall(r"[a-z0-9]+", fold_diacritics(text).lower())
+
+
+def location_tokens(locations):
+    """Lokality -> množiny význačných slov ('Praha 5 – Smíchov' -> {'praha', 'smichov'}), chybějící -> prázdná"""
+    return np.array([frozenset(t for t in words(loc)
+                               if len(t) >= 3 and not t.isdigit() and t not in LOCATION_STOP_WORDS)
+                     if isinstance(loc, str) else frozenset() for loc in locations], dtype=object)
+
+
+def employer_keys(employers):
+    """Zaměstnavatelé -> porovnatelný klíč ('ALBERT Česká republika, s.r.o.' -> 'albert ceska republika'), chybějící -> ''"""
+    return np.array([" ".join(t for t in words(name) if t not in EMPLOYER_STOP_WORDS)
+                     if isinstance(name, str) else "" for name in employers], dtype=object)
+
+
+def minhash_signatures(titles):
+    """MinHash podpisy (n x NUM_PERM) pro seznam názvů jedním vektorovým průchodem
+
+    Názvy se opakují (Skladník, Řidič...), podpis se počítá jen pro unikátní normalizované názvy.
+    """
+    import pandas as pd
+
+    codes, uniques = pd.factorize(pd.Series([normalize_title(t) for t in titles], dtype=object))
+    if not len(uniques):
+        return np.empty((0, NUM_PERM), dtype=np.int64)
+    hashed = [np.fromiter((zlib.crc32(s.encode("utf-8")) for s in shingles(t)), dtype=np.int64)
+              for t in uniques]
+    lengths = np.array([len(h) for h in hashed])
+    offsets = np.concatenate([[0], np.cumsum(lengths)[:-1]])
+    values = np.concatenate(hashed)
+    # (a * x + b) mod p pro všechny n-gramy a permutace, minimum po názvech
+    permuted = (values[:, None] * PERM_A[None, :] + PERM_B[None, :]) % MERSENNE_PRIME
+    return np.minimum.reduceat(permuted, offsets, axis=0)[codes]
+
+
+def band_keys(signatures):
+    """Klíče LSH košů (n x BANDS) - hash každého pásma podpisu"""
+    rows = NUM_PERM // BANDS
+    bands = signatures.reshape(len(signatures), BANDS, rows).astype(np.uint64)
+    return (bands * BAND_COEFFS).sum(axis=2).view(np.int64)
+
+
+def salary_bands(salaries):
+    """Logaritmická platová pásma široká SALARY_TOLERANCE; nabídky bez platu mají pásmo -1
+
+    Dvojice v toleranci leží ve stejném nebo sousedním pásmu.
+    """
+    with np.errstate(invalid="ignore", divide="ignore"):
+        bands = np.floor(np.log(salaries) / np.log1p(SALARY_TOLERANCE))
+    return np.where(np.isfinite(bands), bands, -1).astype(np.int32)
+
+
+def compatible_regions(region_a, region_b):
+    return (region_a == region_b) | (region_a == UNKNOWN_REGION) | (region_b == UNKNOWN_REGION)
+
+
+def verify(sig_a, sig_b, salary_a, salary_b, region_a, region_b, source_a, source_b, place_a, place_b,
+           employer_a, employer_b):
+    """Vektorové ověření párů kandidátů: jiný portál, podobnost názvu, plat v toleranci,
+    slučitelný kraj, lokalita se společným slovem (place_* jsou množiny z location_tokens)
+    a stejný známý zaměstnavatel (employer_* z employer_keys)"""
+    other_portal = source_a != source_b
+    place_ok = np.fromiter((not a or not b or not a.isdisjoint(b) for a, b in zip(place_a, place_b)),
+                           dtype=bool, count=len(place_a))
+    same_employer = (employer_a == employer_b) & (employer_a != "")
+    similar = (sig_a == sig_b).mean(axis=1) >= SIMILARITY_THRESHOLD
+    region_ok = compatible_regions(region_a, region_b)
+    both_missing = np.isnan(salary_a) & np.isnan(salary_b)
+    with np.errstate(invalid="ignore"):
+        salary_ok = np.abs(salary_a - salary_b) <= SALARY_TOLERANCE * np.fmax(salary_a, salary_b)
+    return other_portal & similar & region_ok & place_ok & same_employer & (salary_ok | both_missing)
+
+
+def ensure_tables(con):
+    con.execute(f"""
+        CREATE TABLE IF NOT EXISTS {FINGERPRINTS_TABLE} (
+            listing_key BIGINT PRIMARY KEY,
+            cluster_id BIGINT,
+            source VARCHAR,
+            region VARCHAR,
+            salary_monthly INTEGER,
+            signature BIGINT[],
+            first_seen TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            location VARCHAR,
+            employer VARCHAR
+        )
+    """)
+    con.execute(f"ALTER TABLE {FINGERPRINTS_TABLE} ADD COLUMN IF NOT EXISTS location VARCHAR")
+    con.execute(f"ALTER TABLE {FINGERPRINTS_TABLE} ADD COLUMN IF NOT EXISTS employer VARCHAR")
+    # Starší úložiště měla reprezentanty bez platového pásma / zaměstnavatele - koše se založí znovu
+    columns = [row[0] for row in con.execute(
+        "SELECT column_name FROM information_schema.columns WHERE table_name = ?", [LSH_TABLE]).fetchall()]
+    if columns and not {"salary_band", "employer"} <= set(columns):
+        con.execute(f"DROP TABLE {LSH_TABLE}")
+    con.execute(f"""
+        CREATE TABLE IF NOT EXISTS {LSH_TABLE} (
+            band SMALLINT,
+            bucket BIGINT,
+            salary_band INTEGER,
+            source VARCHAR,
+            region VARCHAR,
+            employer VARCHAR,
+            listing_key BIGINT,
+            PRIMARY KEY (band, bucket, salary_band, source, region, employer)
+        )
+    """)
+
+
+def copy_groups(n, pairs, sources):
+    """Union-find nad ověřenými páry -> kořen (nejmenší index) skupiny kopií každého prvku
+
+    Skupina smí mít z každého portálu nejvýš jednu nabídku - podobné nabídky jednoho portálu
+    se tak přes společné kandidáty neřetězí do jednoho shluku. Páry mají přijít seřazené
+    od nejbližších, aby kopie dostala svůj nejpodobnější protějšek.
+    """
+    parent = np.arange(n)
+    portals = [{source} for source in sources]
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    for a, b in pairs:
+        ra, rb = find(a), find(b)
+        if ra == rb or portals[ra] & portals[rb]:
+            continue
+        root, child = min(ra, rb), max(ra, rb)
+        parent[child] = root
+        portals[root] |= portals[child]
+    return np.array([find(i) for i in range(n)], dtype=np.int64)
+
+
+def closest_first(pairs, signatures, salaries):
+    """Pořadí párů: nejmenší rozdíl platu, pak nejvyšší podobnost názvu, pak pořadí v dávce"""
+    a, b = pairs[:, 0], pairs[:, 1]
+    similarity = (signatures[a] == signatures[b]).mean(axis=1)
+    with np.errstate(invalid="ignore"):
+        gap = np.nan_to_num(np.abs(salaries[a] - salaries[b]) / np.fmax(salaries[a], salaries[b]))
+    return pairs[np.lexsort((b, a, -similarity, gap))]
+
+
+def deduplicate(df, con):
+    """Přidá sloupce cluster_id a is_duplicate; z kopií jedné nabídky na více portálech platí první
+
+    Nabídky bez názvu pozice nebo zaměstnavatele nejde spolehlivě porovnat - zůstávají bez shluku.
+    """
+    import pandas as pd
+
+    ensure_tables(con)
+    df = df.reset_index(drop=True).copy()
+    df["cluster_id"] = pd.array([None] * len(df), dtype="Int64")
+    employer_key = pd.Series(employer_keys(df.reindex(columns=["employer"])["employer"]), index=df.index)
+    comparable = df[df["job_title"].notna() & (employer_key != "")]
+    keys = pd.Series(listing_keys(comparable), index=comparable.index)
+
+    # 1) Nabídky, které už v úložišti jsou, převezmou svůj shluk
+    con.register("batch_keys", pd.DataFrame({"listing_key": keys.unique()}))
+    known = dict(con.execute(f"""
+        SELECT f.listing_key, f.cluster_id FROM batch_keys JOIN {FINGERPRINTS_TABLE} f USING (listing_key)
+    """).fetchall())
+    con.unregister("batch_keys")
+
+    # 2) Nové nabídky (každá jen jednou) - MinHash podpisy a LSH koše
+    new = comparable.loc[~keys.isin(known).to_numpy()]
+    new = new.assign(listing_key=keys[new.index]).drop_duplicates("listing_key")
+    n = len(new)
+    if n:
+        signatures = minhash_signatures(new["job_title"].tolist())
+        salaries = new["salary_offer"].astype("float64").to_numpy()
+        regions = new["region"].astype(object).to_numpy()
+        sources = new["source"].fillna("").astype(object).to_numpy()
+        places = location_tokens(new.reindex(columns=["location"])["location"])
+        employers = employer_key[new.index].to_numpy()
+        lsh = pd.DataFrame({
+            "pos": np.repeat(np.arange(n), BANDS),
+            "band": np.tile(np.arange(BANDS, dtype=np.int16), n),
+            "bucket": band_keys(signatures).reshape(-1),
+            "listing_key": np.repeat(new["listing_key"].to_numpy(), BANDS),
+            "salary_band": np.repeat(salary_bands(salaries), BANDS),
+            "source": np.repeat(sources, BANDS),
+            "region": np.repeat(new["region"].fillna(UNKNOWN_REGION).astype(object).to_numpy(), BANDS),
+            "employer": np.repeat(employers, BANDS),
+        })
+
+        # 3) Kandidáti ve stejném běhu - člen koše se porovná s prvním členem každého jiného
+        #    portálu a slučitelného kraje se stejným zaměstnavatelem ve stejném a sousedních
+        #    platových pásmech
+        con.register("batch_lsh", lsh)
+        pairs = con.execute("""
+            WITH reps AS (
+                SELECT band, bucket, salary_band + shift AS salary_band, source, region, employer, MIN(pos) AS pos
+                FROM batch_lsh, (VALUES (-1), (0), (1)) s(shift) GROUP BY ALL
+            )
+            SELECT DISTINCT r.pos AS rep, b.pos AS member
+            FROM batch_lsh b JOIN reps r USING (band, bucket, salary_band, employer)
+            WHERE r.source <> b.source
+              AND (r.region = b.region OR r.region = $unknown OR b.region = $unknown)
+        """, {"unknown": UNKNOWN_REGION}).fetchnumpy()
+        pairs = np.column_stack([pairs["rep"], pairs["member"]]).astype(np.int64)
+        a, b = pairs[:, 0], pairs[:, 1]
+        ok = verify(signatures[a], signatures[b], salaries[a], salaries[b], regions[a], regions[b],
+                    sources[a], sources[b], places[a], places[b], employers[a], employers[b])
+        roots = copy_groups(n, closest_first(pairs[ok], signatures, salaries), sources)
+
+        # 4) Kandidáti z historie - join přes (pásmo, koš, platové pásmo), ověřeno podpisem
+        candidates = con.execute(f"""
+            SELECT c.pos, f.cluster_id, f.source, f.region, f.location, coalesce(f.employer, '') AS employer,
+                   CAST(f.salary_monthly AS DOUBLE) AS salary, f.signature
+            FROM (
+                SELECT DISTINCT b.pos, l.listing_key
+                FROM (SELECT * REPLACE (salary_band + shift AS salary_band)
+                      FROM batch_lsh, (VALUES (-1), (0), (1)) s(shift)) b
+                JOIN {LSH_TABLE} l USING (band, bucket, salary_band, employer)
+                WHERE l.source <> b.source
+                  AND (l.region = b.region OR l.region = $unknown OR b.region = $unknown)
+            ) c JOIN {FINGERPRINTS_TABLE} f USING (listing_key)
+        """, {"unknown": UNKNOWN_REGION}).fetchdf()
+        cluster_ids = new["listing_key"].to_numpy()[roots]
+        if len(candidates):
+            pos = candidates["pos"].to_numpy()
+            ok = verify(signatures[pos], np.stack(candidates["signature"].to_numpy()),
+                        salaries[pos], candidates["salary"].to_numpy(dtype="float64", na_value=np.nan),
+                        regions[pos], candidates["region"].astype(object).to_numpy(),
+                        sources[pos], candidates["source"].astype(object).to_numpy(),
+                        places[pos], location_tokens(candidates["location"]),
+                        employers[pos], candidates["employer"].astype(object).to_numpy())
+            # Jen shluky z portálů, které skupina ještě nemá
+            group_portals = pd.MultiIndex.from_arrays([roots, sources])
+            ok &= ~pd.MultiIndex.from_arrays([roots[pos], candidates["source"].to_numpy()]).isin(group_portals)
+            # Skupina převezme nejmenší shluk z historie, jinak klíč svého prvního člena
+            # (Int64 - přes float64 by se 64bit ID shluků zaokrouhlila)
+            matched = pd.Series(candidates["cluster_id"].to_numpy()[ok], dtype="Int64").groupby(roots[pos[ok]]).min()
+            inherited = matched.reindex(roots)
+            cluster_ids = np.where(inherited.notna(), inherited.fillna(0).to_numpy(np.int64), cluster_ids)
+
+        new = new.assign(cluster_id=cluster_ids, signature=list(signatures),
+                         location=new.reindex(columns=["location"])["location"], employer_key=employers)
+        con.register("new_fingerprints", new)
+        con.execute(f"""
+            INSERT INTO {FINGERPRINTS_TABLE} (listing_key, cluster_id, source, region, salary_monthly, signature,
+                                              location, employer)
+            SELECT listing_key, cluster_id, source, region, TRY_CAST(salary_offer AS INTEGER), signature,
+                   location, employer_key
+            FROM new_fingerprints
+        """)
+        # Nové koše s prvním členem portálu, kraje a zaměstnavatele; existující si ponechají reprezentanta
+        con.execute(f"""
+            INSERT INTO {LSH_TABLE}
+            SELECT band, bucket, salary_band, source, region, employer, listing_key FROM batch_lsh b
+            WHERE NOT EXISTS (SELECT 1 FROM {LSH_TABLE} l
+                              WHERE l.band = b.band AND l.bucket = b.bucket AND l.salary_band = b.salary_band
+                                AND l.source = b.source AND l.region = b.region AND l.employer = b.employer)
+            QUALIFY ROW_NUMBER() OVER (PARTITION BY band, bucket, salary_band, source, region, employer
+                                       ORDER BY pos) = 1
+        """)
+        con.unregister("new_fingerprints")
+        con.unregister("batch_lsh")
+        known.update(zip(new["listing_key"].tolist(), new["cluster_id"].tolist()))
+
+    df.loc[comparable.index, "cluster_id"] = keys.map(known).astype("Int64")
+    df["is_duplicate"] = duplicate_flags(df)
+    return df
+
+
+def duplicate_flags(df):
+    """Duplicita = kopie nabídky z jiného portálu nebo stejný detail_url podruhé
+
+    Shluk spojuje i nabídky jednoho portálu přes společnou kopii jinde (A@jobs ~ B@prace ~ C@jobs).
+    Portál ale žádnou nabídku nevystavuje dvakrát, takže k-tá nabídka každého portálu ve shluku
+    tvoří jednu skupinu kopií a platí jen první z ní - shluk tak zachová tolik nabídek,
+    kolik jich má jeho nejbohatší portál.
+    """
+    urls = df.reindex(columns=["source", "detail_url"])
+    repeated = urls["detail_url"].notna() & urls.duplicated()
+    clustered = df[df["cluster_id"].notna() & ~repeated]
+    nth = clustered.groupby(["cluster_id", "source"], dropna=False).cumcount()
+    copies = clustered.assign(nth=nth).duplicated(["cluster_id", "nth"])
+    return repeated | copies.reindex(df.index, fill_value=False)
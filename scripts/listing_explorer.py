@@ -0,0 +1,124 @@
+"""
+Prohlížeč jednotlivých nabídek - stránkované dotazy DuckDB
+Stránka dashboardu nikdy nenačítá celou job_listings: filtr i řazení běží v DuckDB
+a každá stránka je samostatný dotaz s LIMIT. Stránkuje se podle klíče (keyset):
+další stránka začíná za poslední dvojicí (řadicí hodnota, listing_id), takže
+cena stránky neroste s její hloubkou jako u OFFSET přes statisíce řádků.
+
+Zdrojem je data/export/job_listings.parquet z export_metrics, seřazený podle
+kraje a platu; min/max statistiky row group (zone maps) pak filtr na kraj
+a platové pásmo omezí na pár row group. Bez exportu se čte přímo data/jobs.duckdb.
+"""
+import os
+
+EXPORT_PARQUET = "data/export/job_listings.parquet"
+JOBS_DB_PATH = "data/jobs.duckdb"
+
+PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+DISPLAY_COLUMNS = ["region", "salary_offer", "job_title", "source", "location",
+                   "salary_text", "scraped_at", "detail_url"]
+
+# Řazení -> (výraz bez NULL, směr); listing_id je vždy druhý klíč, aby bylo pořadí úplné
+SORTS = {
+    "salary_desc": ("COALESCE(salary_offer, 0)", "DESC"),
+    "salary_asc": ("COALESCE(salary_offer, 0)", "ASC"),
+    "title": ("COALESCE(job_title, '')", "ASC"),
+    "region": ("COALESCE(region, '')", "ASC"),
+    "newest": ("COALESCE(scraped_at, TIMESTAMP '1970-01-01')", "DESC"),
+}
+
+
+def connect(parquet_path=EXPORT_PARQUET, jobs_db_path=JOBS_DB_PATH):
+    """In-memory DuckDB s pohledem `listings` (export Parquet, jinak tabulka z jobs.duckdb)"""
+    import duckdb
+
+    con = duckdb.connect()
+    if os.path.exists(parquet_path):
+        con.execute(f"CREATE VIEW listings AS SELECT * FROM read_parquet('{parquet_path}')")
+    elif os.path.exists(jobs_db_path):
+        con.execute(f"ATTACH '{jobs_db_path}' AS jobs (READ_ONLY)")
+        con.execute("CREATE VIEW listings AS SELECT rowid AS listing_id, * FROM jobs.job_listings")
+    else:
+        raise FileNotFoundError(f"Chybi {parquet_path} i {jobs_db_path}")
+    return con
+
+
+def listing_columns(con):
+    return [row[0] for row in con.cursor().execute("DESCRIBE listings").fetchall()]
+
+
+def where_clause(filters, columns):
+    """Filtry {regions, sources, salary_min, salary_max, title} -> (SQL podmínka, parametry)"""
+    conditions, params = [], []
+    if "is_duplicate" in columns and not filters.get("duplicates"):
+        conditions.append("NOT COALESCE(is_duplicate, FALSE)")
+    for column, key in (("region", "regions"), ("source", "sources")):
+        values = filters.get(key)
+        if values:
+            conditions.append(f"{column} IN ({', '.join('?' * len(values))})")
+            params.extend(values)
+    if filters.get("salary_min") is not None:
+        conditions.append("salary_offer >= ?")
+        params.append(filters["salary_min"])
+    if filters.get("salary_max") is not None:
+        conditions.append("salary_offer <= ?")
+        params.append(filters["salary_max"])
+    if filters.get("title"):
+        # Bez diakritiky: "ucet" najde "Účetní"
+        conditions.append("strip_accents(job_title) ILIKE strip_accents(?)")
+        params.append(f"%{filters['title']}%")
+    return " AND ".join(conditions) or "TRUE", params
+
+
+def fetch_page(con, filters=None, sort="salary_desc", after=None, page_size=PAGE_SIZE, columns=None):
+    """Jedna stránka nabídek -> (DataFrame, kurzor další stránky nebo None)
+
+    `after` je kurzor z předchozí stránky (řadicí hodnota, listing_id).
+    """
+    if sort not in SORTS:
+        raise ValueError(f"Nezname razeni {sort!r}, povolene: {', '.join(SORTS)}")
+    page_size = max(1, min(int(page_size), MAX_PAGE_SIZE))
+    available = listing_columns(con)
+    shown = [c for c in (columns or DISPLAY_COLUMNS) if c in available]
+    expr, direction = SORTS[sort]
+    where, params = where_clause(filters or {}, available)
+    if after is not None:
+        # Rozepsané porovnání dvojic - DuckDB ho vyhodnotí rychleji než (a, b) < (x, y)
+        op = "<" if direction == "DESC" else ">"
+        where += f" AND ({expr} {op} ? OR ({expr} = ? AND listing_id {op} ?))"
+        params.extend([after[0], after[0], after[1]])
+
+    # O řádek víc - pozná se tak, zda existuje další stránka
+    page = con.cursor().execute(f"""
+        SELECT {expr} AS sort_key, listing_id, {', '.join(shown)}
+        FROM listings
+        WHERE {where}
+        ORDER BY sort_key {direction}, listing_id {direction}
+        LIMIT {page_size + 1}
+    """, params).fetchdf()
+    cursor = None
+    if len(page) > page_size:
+        page = page.iloc[:page_size]
+        last = page.iloc[-1]
+        cursor = (last["sort_key"].item() if hasattr(last["sort_key"], "item") else last["sort_key"],
+                  int(last["listing_id"]))
+    return page.drop(columns=["sort_key"]).reset_index(drop=True), cursor
+
+
+def count_listings(con, filters=None):
+    """Počet nabídek odpovídajících filtru (stejné zone maps jako stránka)"""
+    where, params = where_clause(filters or {}, listing_columns(con))
+    return con.cursor().execute(f"SELECT COUNT(*) FROM listings WHERE {where}", params).fetchone()[0]
+
+
+def filter_options(con):
+    """Hodnoty pro výběr filtrů: kraje, portály a rozsah platů"""
+    cur = con.cursor()
+    regions = [r[0] for r in cur.execute(
+        "SELECT DISTINCT region FROM listings WHERE region IS NOT NULL ORDER BY region").fetchall()]
+    sources = [r[0] for r in cur.execute(
+        "SELECT DISTINCT source FROM listings WHERE source IS NOT NULL ORDER BY source").fetchall()]
+    low, high = cur.execute("SELECT MIN(salary_offer), MAX(salary_offer) FROM listings").fetchone()
+    return {"regions": regions, "sources": sources, "salary_range": (low or 0, high or 0)}
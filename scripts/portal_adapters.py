@@ -0,0 +1,387 @@
+"""
+Adaptéry pracovních portálů
+Portál je deklarativní záznam v registru: jak sestavit URL stránky výsledků,
+jak stránkovat, kde na stránce hledat karty nabídek a jakým parserem je číst.
+Stahování, souběžnost, omezení rychlosti, opakování, jistič, časový limit a metriky dostane každý
+adaptér od sdíleného runtime (crawl_runtime) - nový portál = nový register_portal().
+"""
+import json
+import re
+from dataclasses import dataclass
+from html import unescape
+from urllib.parse import urljoin, urlsplit
+
+from bs4 import BeautifulSoup
+
+from crawl_runtime import PORTAL_DEADLINE
+from region_lookup import UNKNOWN_REGION, resolve_region
+from salary_extract import NORMALIZED_COLUMNS, normalize_amounts, normalize_salary
+
+regions = {
+    "praha": "Praha",
+    "stredocesky": "Středočeský kraj",
+    "jihocesky": "Jihočeský kraj",
+    "plzensky": "Plzeňský kraj",
+    "karlovarsky": "Karlovarský kraj",
+    "ustecky": "Ústecký kraj",
+    "liberecky": "Liberecký kraj",
+    "kralovehradecky": "Královéhradecký kraj",
+    "pardubicky": "Pardubický kraj",
+    "vysocina": "Kraj Vysočina",
+    "jihomoravsky": "Jihomoravský kraj",
+    "olomoucky": "Olomoucký kraj",
+    "moravskoslezsky": "Moravskoslezský kraj",
+    "zlinsky": "Zlínský kraj",
+}
+
+# Základní URL portálů - ostatní domény mají tvar https://www.<domain>
+PORTAL_BASE_URLS = {
+    "prace.cz": "https://www.prace.cz",
+    "jobs.cz": "https://www.jobs.cz",
+}
+
+SALARY_TEXT_RE = re.compile(r"\d{2,}\s*(?:Kč|CZK|EUR|€)", re.I)
+LOCATION_CLASS_RE = re.compile(r"locality|location|place|address|city", re.I)
+EMPLOYER_CLASS_RE = re.compile(r"company|employer|firm", re.I)
+
+# JSON-LD a hydratační payloady (<script type="application/json">, __NEXT_DATA__)
+STRUCTURED_SCRIPT_RE = re.compile(
+    r"<script[^>]*type=[\"']application/(?:ld\+)?json[\"'][^>]*>(.*?)</script>", re.S | re.I)
+# Kolik úrovní nad odkazem /nabidka/ ještě patří k jedné nabídce (h3 -> box -> li)
+LISTING_DEPTH = 3
+UNIT_PERIODS = {"HOUR": "hour", "DAY": "day", "WEEK": "week", "MONTH": "month", "YEAR": "year"}
+
+
+def portal_url(domain, path):
+    """Absolutní URL na portálu (základ lze přesměrovat např. na lokální mock server)"""
+    return PORTAL_BASE_URLS.get(domain, f"https://www.{domain}") + path
+
+
+def detail_url(source, href):
+    """Absolutní URL detailu nabídky; odkazy na doménu portálu jdou přes PORTAL_BASE_URLS"""
+    if not href:
+        return None
+    parts = urlsplit(urljoin(portal_url(source, "/"), href))
+    host = parts.netloc.lower()
+    if host == source or host.endswith("." + source):
+        return portal_url(source, parts.path + (f"?{parts.query}" if parts.query else ""))
+    return parts.geturl()
+
+
+def listing_without_salary(region, job_title, source, page, url, location=None, employer=None):
+    """Nabídka bez platu - kandidát pro doplnění z detailu (detail_enrichment)"""
+    return {
+        "region": region,
+        "salary_offer": None,
+        "job_title": job_title[:200] if job_title else None,
+        "source": source,
+        "page": page,
+        "salary_text": None,
+        "location": location,
+        "employer": employer,
+        "detail_url": url,
+        **dict.fromkeys(NORMALIZED_COLUMNS),
+    }
+
+
+def iter_job_postings(data):
+    """Objekty JobPosting kdekoli v JSON (samostatně, v @graph, ItemList i v hydratačním stavu)"""
+    stack = [data]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, dict):
+            kind = node.get("@type")
+            if kind == "JobPosting" or (isinstance(kind, list) and "JobPosting" in kind):
+                yield node
+                continue
+            stack.extend(reversed(list(node.values())))
+        elif isinstance(node, list):
+            stack.extend(reversed(node))
+
+
+def first(value):
+    """schema.org dovoluje u většiny vlastností jednu hodnotu i seznam"""
+    return (value[0] if value else None) if isinstance(value, list) else value
+
+
+def to_amount(value):
+    try:
+        return round(float(str(value).replace(" ", "").replace("\xa0", "").replace(",", ".")))
+    except (TypeError, ValueError):
+        return None
+
+
+def structured_salary(posting):
+    """baseSalary (MonetaryAmount) -> (dict s NORMALIZED_COLUMNS, text platu) nebo (None, None)"""
+    base = first(posting.get("baseSalary") or posting.get("estimatedSalary"))
+    if not isinstance(base, dict):
+        return None, None
+    value = base.get("value")
+    if not isinstance(value, dict):
+        value = {"value": value}
+    low = to_amount(value.get("minValue", value.get("value")))
+    high = to_amount(value.get("maxValue"))
+    unit = str(value.get("unitText") or base.get("unitText") or "").upper()
+    currency = str(base.get("currency") or value.get("currency") or "CZK").upper()
+    salary = normalize_amounts(low, high, UNIT_PERIODS.get(unit), currency)
+    text = " – ".join(str(v) for v in (low, high) if v is not None) + f" {currency}" + (f"/{unit}" if unit else "")
+    return salary, text
+
+
+def structured_location(posting):
+    """jobLocation.address -> 'Obec, Kraj' (nebo None)"""
+    place = first(posting.get("jobLocation"))
+    address = place.get("address") if isinstance(place, dict) else None
+    address = first(address)
+    if isinstance(address, str):
+        return address[:200]
+    if not isinstance(address, dict):
+        return None
+    parts = [address.get("addressLocality"), address.get("addressRegion")]
+    return ", ".join(str(p) for p in parts if p)[:200] or None
+
+
+def structured_employer(posting):
+    """hiringOrganization -> název zaměstnavatele (nebo None)"""
+    organization = first(posting.get("hiringOrganization"))
+    if isinstance(organization, dict):
+        organization = organization.get("name")
+    return unescape(str(organization)).strip()[:200] or None if organization else None
+
+
+def parse_structured_page(html, region, source, page):
+    """Rychlá cesta: nabídky z JSON-LD / vloženého JSON bez stavby DOM stromu
+
+    Vrací None, pokud stránka strukturovaná data nemá - pak přijde na řadu DOM parser.
+    """
+    # Levný test podřetězce - stránky bez JobPosting se regexem vůbec neprocházejí
+    if "JobPosting" not in html:
+        return None
+    results = []
+    for block in STRUCTURED_SCRIPT_RE.findall(html):
+        try:
+            data = json.loads(block)
+        except ValueError:
+            continue
+        for posting in iter_job_postings(data):
+            salary, salary_text = structured_salary(posting)
+            title = posting.get("title") or posting.get("name")
+            title = unescape(str(title)).strip() if title else None
+            location = structured_location(posting)
+            employer = structured_employer(posting)
+            url = detail_url(source, first(posting.get("url")))
+            listing_region = region
+            if region == UNKNOWN_REGION:
+                listing_region = resolve_region(location) or UNKNOWN_REGION
+            if not salary:
+                if url:
+                    results.append(listing_without_salary(listing_region, title, source, page, url,
+                                                          location, employer))
+                continue
+            results.append({
+                "region": listing_region,
+                "salary_offer": salary["salary_monthly"],
+                "job_title": title[:200] if title else None,
+                "source": source,
+                "page": page,
+                "salary_text": salary_text[:200],
+                "location": location,
+                "employer": employer,
+                "detail_url": url,
+                **salary
+            })
+    # Bez jediného platu nemá rychlá cesta výhodu - rozhodne DOM parser
+    if not any(r["salary_offer"] is not None for r in results):
+        return None
+    return results
+
+
+def parse_prace_cz_page(html, region, page, source="prace.cz"):
+    """Vytáhne nabídky z jedné stránky výsledků prace.cz (odkazy /nabidka/ a platy v textu)"""
+    results = []
+    soup = BeautifulSoup(html, "html.parser")
+
+    # Mapa předek odkazu -> (title, detail URL); plat se k nabídce přiřadí přes společného předka
+    job_titles_map = {}
+    job_links = soup.find_all('a', href=re.compile(r'/nabidka/'))
+    for link in job_links:
+        title = link.get_text(strip=True)
+        if title:
+            listing = (title, detail_url(source, link.get("href")))
+            for ancestor in list(link.parents)[:LISTING_DEPTH]:
+                job_titles_map.setdefault(id(ancestor), listing)
+
+    # Scrape platy (původní metoda)
+    matched = set()
+    for s in soup.find_all(string=SALARY_TEXT_RE):
+        salary = normalize_salary(s)
+        if salary:
+            # Zkus najít job title
+            job_title = url = None
+            for ancestor in list(s.parents)[:LISTING_DEPTH + 1]:
+                if id(ancestor) in job_titles_map:
+                    job_title, url = job_titles_map[id(ancestor)]
+                    matched.add(url)
+                    break
+
+            results.append({
+                "region": region,
+                "salary_offer": salary["salary_monthly"],
+                "job_title": job_title[:200] if job_title else None,
+                "source": source,
+                "page": page,
+                "salary_text": s.strip()[:200],
+                "detail_url": url,
+                **salary
+            })
+
+    # Nabídky bez platu na stránce výsledků - kandidáti pro detail
+    for title, url in dict.fromkeys(job_titles_map.values()):
+        if url not in matched:
+            results.append(listing_without_salary(region, title, source, page, url))
+    return results
+
+
+def parse_job_cards_page(html, region, source, page, card_class=r'offer|job|listing|search'):
+    """Vytáhne nabídky ze stránky s kartami nabídek (jobs.cz a obecné portály)"""
+    results = []
+    soup = BeautifulSoup(html, "html.parser")
+
+    # Najdeme všechny pracovní nabídky
+    job_cards = soup.find_all(['article', 'div'], class_=re.compile(card_class, re.I))
+
+    if not job_cards:
+        # Fallback
+        for s in soup.find_all(string=SALARY_TEXT_RE):
+            salary = normalize_salary(s)
+            if salary:
+                results.append({
+                    "region": region,
+                    "salary_offer": salary["salary_monthly"],
+                    "job_title": None,
+                    "source": source,
+                    "page": page,
+                    "salary_text": s.strip()[:200],
+                    **salary
+                })
+        return results
+
+    for card in job_cards:
+        # Hledej titulek
+        title_elem = card.find(['h2', 'h3', 'a'], class_=re.compile(r'title|name|position', re.I))
+        job_title = title_elem.get_text(strip=True) if title_elem else None
+        link = title_elem if title_elem is None or title_elem.name == "a" else title_elem.find("a")
+        url = detail_url(source, link.get("href")) if link else None
+
+        # Lokalita karty - u portálů bez kraje v URL z ní určíme kraj
+        location_elem = card.find(class_=LOCATION_CLASS_RE) or card.find(itemprop="addressLocality")
+        location = location_elem.get_text(" ", strip=True)[:200] if location_elem else None
+        employer_elem = card.find(class_=EMPLOYER_CLASS_RE) or card.find(itemprop="hiringOrganization")
+        employer = employer_elem.get_text(" ", strip=True)[:200] or None if employer_elem else None
+        card_region = region
+        if region == UNKNOWN_REGION:
+            card_region = resolve_region(location) or UNKNOWN_REGION
+
+        # Hledej plat
+        salary = salary_text = None
+        for s in card.find_all(string=SALARY_TEXT_RE):
+            salary = normalize_salary(s)
+            if salary:
+                salary_text = s.strip()[:200]
+                break
+
+        if salary:
+            results.append({
+                "region": card_region,
+                "salary_offer": salary["salary_monthly"],
+                "job_title": job_title[:200] if job_title else None,
+                "source": source,
+                "page": page,
+                "salary_text": salary_text,
+                "location": location,
+                "employer": employer,
+                "detail_url": url,
+                **salary
+            })
+        elif url and job_title:
+            results.append(listing_without_salary(card_region, job_title, source, page, url, location, employer))
+    return results
+
+
+# Parsery stránek výsledků: (adaptér, html, kraj, stránka) -> seznam nabídek
+PAGE_PARSERS = {
+    "links": lambda adapter, html, region, page: parse_prace_cz_page(html, region, page, adapter.name),
+    "cards": lambda adapter, html, region, page: parse_job_cards_page(
+        html, region, adapter.name, page, card_class=adapter.card_class),
+}
+
+
+@dataclass(frozen=True)
+class PortalAdapter:
+    """Popis jednoho portálu pro sdílený crawl runtime"""
+    name: str  # doména, zároveň hodnota sloupce source
+    page_path: str  # cesta stránky výsledků; {slug} = kraj, {page} = číslo stránky
+    first_page_path: str | None = None  # jiná cesta pro první stránku (bez parametru page)
+    per_region: bool = False  # procházet každý kraj zvlášť (kraj je pak známý z URL)
+    max_pages: int = 5
+    parser: str = "cards"  # klíč v PAGE_PARSERS
+    card_class: str = r'offer|job|listing|search'
+    concurrency: int = 1  # souběžných cílů (krajů) na portálu
+    min_interval: float = 1.0  # minimální rozestup požadavků na portál (s)
+    structured: bool = True  # zkusit nejdřív JSON-LD / vložený JSON, DOM jen jako fallback
+    deadline: float = PORTAL_DEADLINE  # celkový čas na portál včetně detailů (s)
+
+    def targets(self):
+        """Cíle procházení: (slug kraje, kraj); portál bez krajů má jediný cíl"""
+        if self.per_region:
+            return list(regions.items())
+        return [(None, UNKNOWN_REGION)]
+
+    def page_url(self, slug, page):
+        path = self.first_page_path if page == 1 and self.first_page_path else self.page_path
+        return portal_url(self.name, path.format(slug=slug, page=page))
+
+    def parse(self, html, region, page):
+        if self.structured:
+            results = parse_structured_page(html, region, self.name, page)
+            if results:
+                return results
+        return PAGE_PARSERS[self.parser](self, html, region, page)
+
+
+PORTAL_ADAPTERS = {}
+
+
+def register_portal(adapter):
+    """Přidá portál do registru (klíčem je adapter.name)"""
+    PORTAL_ADAPTERS[adapter.name] = adapter
+    return adapter
+
+
+register_portal(PortalAdapter(
+    name="prace.cz",
+    page_path="/nabidky/?region={slug}&page={page}",
+    per_region=True,
+    max_pages=10,
+    parser="links",
+    concurrency=5,
+    min_interval=0.1,
+))
+
+register_portal(PortalAdapter(
+    name="jobs.cz",
+    # Jobs.cz používá jiný pagination parametr
+    page_path="/prace/?locality%5B%5D={slug}&page={page}",
+    per_region=True,
+    max_pages=10,
+    concurrency=5,
+    min_interval=0.1,
+))
+
+for _domain in ("profesia.cz", "startupjobs.cz", "dobraprace.cz"):
+    register_portal(PortalAdapter(
+        name=_domain,
+        page_path="/prace?page={page}",
+        first_page_path="/prace",
+        card_class=r'offer|job|listing',
+    ))
@@ -0,0 +1,211 @@
+"""
+Určení kraje z textu lokality nabídky
+Obecné portály (profesia.cz, startupjobs.cz, dobraprace.cz) nemají kraj v URL,
+karta nabídky ale obsahuje lokalitu ("Brno - Královo Pole", "Praha 5", "Hradec Král.").
+Offline index obcí (bez diakritiky, malými písmeny) ji přiřadí ke kraji:
+přesná shoda přes hash, zkrácené názvy přes prefixový trie.
+
+Výchozí index obsahuje obce s rozšířenou působností a okresy; úplný číselník
+obcí lze doplnit souborem data/obce.csv (sloupce obec, kraj). Výsledky jsou
+v cache, opakovaná lokalita stojí jen vyhledání ve slovníku.
+"""
+import csv
+import os
+import re
+import unicodedata
+from functools import lru_cache
+
+UNKNOWN_REGION = "Neznamy"
+MUNICIPALITIES_CSV = "data/obce.csv"
+
+# Kraj (názvy jako v scraperu) -> obce s rozšířenou působností a další větší obce
+MUNICIPALITIES = {
+    "Praha": ["Praha", "Hlavní město Praha"],
+    "Středočeský kraj": [
+        "Praha-západ", "Praha-východ", "Benešov", "Beroun", "Brandýs nad Labem-Stará Boleslav",
+        "Čáslav", "Černošice", "Český Brod", "Dobříš", "Kladno", "Kolín", "Kralupy nad Vltavou",
+        "Kutná Hora", "Lysá nad Labem", "Mělník", "Mladá Boleslav", "Mnichovo Hradiště", "Neratovice",
+        "Nymburk", "Poděbrady", "Příbram", "Rakovník", "Říčany", "Sedlčany", "Slaný", "Vlašim",
+        "Votice", "Hořovice", "Jesenice", "Roztoky", "Čelákovice", "Úvaly", "Milovice",
+        "Odolena Voda", "Rudná", "Hostivice", "Mnichovice",
+    ],
+    "Jihočeský kraj": [
+        "České Budějovice", "Český Krumlov", "Jindřichův Hradec", "Písek", "Prachatice",
+        "Strakonice", "Tábor", "Blatná", "Dačice", "Kaplice", "Milevsko", "Soběslav",
+        "Trhové Sviny", "Třeboň", "Týn nad Vltavou", "Vimperk", "Vodňany", "Sezimovo Ústí",
+        "Hluboká nad Vltavou",
+    ],
+    "Plzeňský kraj": [
+        "Plzeň", "Plzeň-město", "Plzeň-jih", "Plzeň-sever", "Domažlice", "Klatovy", "Rokycany",
+        "Tachov", "Blovice", "Horažďovice", "Horšovský Týn", "Kralovice", "Nepomuk", "Nýřany",
+        "Přeštice", "Stod", "Stříbro", "Sušice", "Dobřany",
+    ],
+    "Karlovarský kraj": [
+        "Karlovy Vary", "Cheb", "Sokolov", "Aš", "Mariánské Lázně", "Ostrov", "Chodov",
+        "Františkovy Lázně", "Nejdek",
+    ],
+    "Ústecký kraj": [
+        "Ústí nad Labem", "Ústí n. L.", "Děčín", "Chomutov", "Litoměřice", "Louny", "Most",
+        "Teplice", "Bílina", "Kadaň", "Litvínov", "Lovosice", "Podbořany", "Roudnice nad Labem",
+        "Rumburk", "Varnsdorf", "Žatec", "Jirkov", "Klášterec nad Ohří", "Krupka", "Šluknov",
+    ],
+    "Liberecký kraj": [
+        "Liberec", "Česká Lípa", "Jablonec nad Nisou", "Semily", "Frýdlant", "Jilemnice",
+        "Nový Bor", "Tanvald", "Turnov", "Železný Brod", "Hrádek nad Nisou",
+    ],
+    "Královéhradecký kraj": [
+        "Hradec Králové", "Jičín", "Náchod", "Rychnov nad Kněžnou", "Trutnov", "Broumov",
+        "Dobruška", "Dvůr Králové nad Labem", "Hořice", "Jaroměř", "Kostelec nad Orlicí",
+        "Nová Paka", "Nové Město nad Metují", "Nový Bydžov", "Vrchlabí", "Třebechovice pod Orebem",
+    ],
+    "Pardubický kraj": [
+        "Pardubice", "Chrudim", "Svitavy", "Ústí nad Orlicí", "Česká Třebová", "Hlinsko",
+        "Holice", "Králíky", "Lanškroun", "Litomyšl", "Moravská Třebová", "Polička", "Přelouč",
+        "Vysoké Mýto", "Žamberk", "Choceň",
+    ],
+    "Kraj Vysočina": [
+        "Vysočina", "Jihlava", "Havlíčkův Brod", "Pelhřimov", "Třebíč", "Žďár nad Sázavou",
+        "Bystřice nad Pernštejnem", "Chotěboř", "Humpolec", "Moravské Budějovice",
+        "Náměšť nad Oslavou", "Nové Město na Moravě", "Pacov", "Světlá nad Sázavou", "Telč",
+        "Velké Meziříčí",
+    ],
+    "Jihomoravský kraj": [
+        "Brno", "Brno-město", "Brno-venkov", "Blansko", "Břeclav", "Hodonín", "Vyškov", "Znojmo",
+        "Boskovice", "Bučovice", "Hustopeče", "Ivančice", "Kuřim", "Kyjov", "Mikulov",
+        "Moravský Krumlov", "Pohořelice", "Rosice", "Slavkov u Brna", "Šlapanice", "Tišnov",
+        "Veselí nad Moravou", "Židlochovice", "Modřice",
+    ],
+    "Olomoucký kraj": [
+        "Olomouc", "Jeseník", "Prostějov", "Přerov", "Šumperk", "Hranice", "Konice",
+        "Lipník nad Bečvou", "Litovel", "Mohelnice", "Šternberk", "Uničov", "Zábřeh",
+    ],
+    "Moravskoslezský kraj": [
+        "Ostrava", "Bruntál", "Frýdek-Místek", "Karviná", "Nový Jičín", "Opava", "Bílovec",
+        "Bohumín", "Český Těšín", "Frenštát pod Radhoštěm", "Frýdlant nad Ostravicí", "Havířov",
+        "Hlučín", "Jablunkov", "Kopřivnice", "Kravaře", "Krnov", "Odry", "Orlová", "Rýmařov",
+        "Třinec", "Vítkov", "Studénka", "Fulnek", "Petřvald",
+    ],
+    "Zlínský kraj": [
+        "Zlín", "Kroměříž", "Uherské Hradiště", "Vsetín", "Bystřice pod Hostýnem", "Holešov",
+        "Luhačovice", "Otrokovice", "Rožnov pod Radhoštěm", "Uherský Brod", "Valašské Klobouky",
+        "Valašské Meziříčí", "Vizovice", "Staré Město",
+    ],
+}
+
+# Samotné přídavné jméno kraje ("Jihomoravský", "Olomoucký")
+KRAJ_ADJECTIVES = {
+    "Středočeský kraj": "Středočeský", "Jihočeský kraj": "Jihočeský", "Plzeňský kraj": "Plzeňský",
+    "Karlovarský kraj": "Karlovarský", "Ústecký kraj": "Ústecký", "Liberecký kraj": "Liberecký",
+    "Královéhradecký kraj": "Královéhradecký", "Pardubický kraj": "Pardubický",
+    "Jihomoravský kraj": "Jihomoravský", "Olomoucký kraj": "Olomoucký",
+    "Moravskoslezský kraj": "Moravskoslezský", "Zlínský kraj": "Zlínský",
+}
+
+# Zkrácený název se přijme až od této délky (kratší prefixy jsou příliš nejednoznačné)
+MIN_PREFIX = 4
+# Tokeny, kterými nesmí začínat prefixové hledání ("kraj" -> "kraj vysocina")
+PREFIX_STOP_TOKENS = {"kraj", "okres", "nad", "pod", "na", "u", "mesto", "obec"}
+
+
+def fold_tokens(text):
+    """'Ústí n. L.' -> [('usti', ''), ('n', '.'), ('l', '.')] - tokeny a tečka za zkratkou"""
+    folded = unicodedata.normalize("NFKD", str(text)).encode("ascii", "ignore").decode("ascii")
+    return re.findall(r"([a-z0-9]+)(\.?)", folded.lower())
+
+
+def fold(text):
+    """'Ústí n. L.' -> 'usti n l'"""
+    return " ".join(token for token, _ in fold_tokens(text))
+
+
+def load_municipalities(path=MUNICIPALITIES_CSV):
+    """Doplňkový číselník obcí z CSV (obec, kraj) - např. z číselníku ČSÚ"""
+    if not os.path.exists(path):
+        return {}
+    extra = {}
+    with open(path, encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            extra.setdefault(row["kraj"], []).append(row["obec"])
+    return extra
+
+
+def build_index(municipalities=MUNICIPALITIES, extra=None):
+    """Předpočítá (hash název -> kraje, prefixový trie, max. počet tokenů názvu)
+
+    Stejný název obce ve více krajích ("Nové Město") zůstane nejednoznačný.
+    """
+    names = {}
+    sources = [municipalities, extra or {}]
+    for source in sources:
+        for kraj, obce in source.items():
+            for name in list(obce) + [kraj]:
+                names.setdefault(fold(name), set()).add(kraj)
+    for kraj, adjective in KRAJ_ADJECTIVES.items():
+        names.setdefault(fold(adjective), set()).add(kraj)
+
+    # Trie po znacích; každý uzel si pamatuje kraje všech názvů pod sebou
+    trie = {}
+    for name, krajs in names.items():
+        node = trie
+        for char in name:
+            node = node.setdefault(char, {})
+            node.setdefault("", set()).update(krajs)
+    return names, trie, max(len(name.split()) for name in names)
+
+
+@lru_cache(maxsize=1)
+def get_index():
+    return build_index(extra=load_municipalities())
+
+
+def prefix_krajs(trie, prefix):
+    """Kraje všech názvů, které začínají daným prefixem"""
+    node = trie
+    for char in prefix:
+        node = node.get(char)
+        if node is None:
+            return set()
+    return node.get("", set())
+
+
+@lru_cache(maxsize=65536)
+def resolve_region(location):
+    """Text lokality -> kraj, nebo None pokud ho nejde jednoznačně určit"""
+    if not location:
+        return None
+    names, trie, max_tokens = get_index()
+    matches = fold_tokens(location)
+    tokens = [token for token, _ in matches]
+    # Zkrácené tokeny: za tokenem je tečka, nebo je text na něm useknutý
+    abbreviated = [bool(dot) for _, dot in matches[:-1]] + [True]
+
+    # 1) Přesná shoda - nejdelší víceslovný název od nejlevější pozice ("Frýdlant nad Ostravicí")
+    for start in range(len(tokens)):
+        for end in range(min(len(tokens), start + max_tokens), start, -1):
+            krajs = names.get(" ".join(tokens[start:end]))
+            if krajs and len(krajs) == 1:
+                return next(iter(krajs))
+
+    # 2) Zkrácený název ("Hradec Král.", "Jihomoravsk") - prefix s jediným krajem
+    for start in range(len(tokens)):
+        if tokens[start] in PREFIX_STOP_TOKENS:
+            continue
+        for end in range(min(len(tokens), start + max_tokens), start, -1):
+            prefix = " ".join(tokens[start:end])
+            if not abbreviated[end - 1]:
+                continue
+            if len(prefix) < MIN_PREFIX:
+                break
+            krajs = prefix_krajs(trie, prefix)
+            if len(krajs) == 1:
+                return next(iter(krajs))
+    return None
+
+
+def resolve_regions(locations, default=UNKNOWN_REGION):
+    """Pole lokalit -> pole krajů (unikátní lokality se vyhodnotí jen jednou)"""
+    import pandas as pd
+
+    codes, uniques = pd.factorize(pd.Series(locations, dtype=object))
+    resolved = [resolve_region(loc) or default for loc in uniques] + [default]
+    return pd.Series(resolved, dtype=object).iloc[codes].reset_index(drop=True)
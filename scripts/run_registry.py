@@ -0,0 +1,384 @@
+"""
+Registr běhů pipeline a původ dat (lineage) v data/jobs.duckdb
+Každý běh run_pipeline.py dostane run_id, který kroky čtou z prostředí
+(PIPELINE_RUN_ID) a zapisují ke každému řádku job_listings, metrik a trendů.
+Registr ukládá:
+
+    pipeline_runs           běh: stav, začátek/konec, trvání, commit
+    pipeline_run_stages     kroky běhu: stav, trvání, počet řádků, chyba
+    pipeline_run_artifacts  výstupy běhu: otisky souborů, počty řádků tabulek
+                            a source_run_id = běh, který data skutečně vyrobil
+
+Metriky se v DuckDB ukládají pro každý běh zvlášť (historie), řady trendů jako snímky
+dnů přepočítaných v běhu (wage_trends_runs.snapshot_since), nabídky má Parquet archiv - návrat k dřívějšímu úspěšnému běhu (rollback) tak jen obnoví
+job_listings z archivu a CSV z historie, nic se nepřepočítává.
+"""
+import datetime
+import hashlib
+import json
+import os
+import subprocess
+import uuid
+
+REGISTRY_DB_PATH = "data/jobs.duckdb"
+RUN_ID_ENV = "PIPELINE_RUN_ID"
+
+# Soubory, jejichž otisk se ukládá s během
+ARTIFACTS = [
+    "data/job_listings.csv",
+    "data/wages_comparison.csv",
+    "data/wages_by_source.csv",
+    "data/wages_by_occupation.csv",
+    "data/wage_trends.csv",
+    "data/export/dashboard_views.json",
+]
+# Tabulky nesoucí run_id (metriky a trendy mají historii všech běhů, job_listings jen poslední scrape)
+RUN_TABLES = ["job_listings", "wages_comparison", "wages_by_source", "wages_by_occupation", "wage_trends_runs"]
+# Historie běhů: tabulka v DuckDB -> CSV, které z ní rollback obnoví
+METRIC_CSV = {
+    "wages_comparison": "data/wages_comparison.csv",
+    "wages_by_source": "data/wages_by_source.csv",
+    "wages_by_occupation": "data/wages_by_occupation.csv",
+    "wage_trends_runs": "data/wage_trends.csv",
+}
+# Pole výstupů, která se mění s každým zápisem a do otisku nepatří
+VOLATILE_KEYS = ["generated_at"]
+
+HASH_CHUNK = 1024 * 1024
+
+
+def new_run_id():
+    """Řaditelné ID běhu: čas startu + náhodná přípona"""
+    return f"{datetime.datetime.now():%Y%m%dT%H%M%S}-{uuid.uuid4().hex[:6]}"
+
+
+def current_run_id():
+    """run_id aktuálního běhu; krok spuštěný samostatně dostane vlastní ID procesu"""
+    if not os.environ.get(RUN_ID_ENV):
+        os.environ[RUN_ID_ENV] = new_run_id()
+    return os.environ[RUN_ID_ENV]
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(HASH_CHUNK), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def artifact_digest(path):
+    """Otisk obsahu výstupu: CSV bez ohledu na pořadí řádků, JSON bez času vygenerování
+
+    job_listings.csv obnovený z archivu má řádky v pořadí archivu a podklady dashboardu
+    nesou čas zápisu - se sha256 souboru by se obnovený výstup nikdy neshodoval.
+    """
+    if path.endswith(".csv"):
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            digest.update(f.readline())
+            for line in sorted(f):
+                digest.update(line)
+        return digest.hexdigest()
+    if path.endswith(".json"):
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        if isinstance(data, dict):
+            data = {k: v for k, v in data.items() if k not in VOLATILE_KEYS}
+        return hashlib.sha256(json.dumps(data, sort_keys=True).encode("utf-8")).hexdigest()
+    return file_sha256(path)
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, timeout=5).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def table_columns(con, table):
+    return [row[0] for row in con.execute(
+        "SELECT column_name FROM information_schema.columns WHERE table_name = ?", [table]).fetchall()]
+
+
+def ensure_tables(con):
+    con.execute("""
+        CREATE TABLE IF NOT EXISTS pipeline_runs (
+            run_id VARCHAR PRIMARY KEY,
+            started_at TIMESTAMP,
+            finished_at TIMESTAMP,
+            status VARCHAR,            -- running / success / failed / rolled_back / rollback
+            duration_s DOUBLE,
+            git_commit VARCHAR,
+            restored_run_id VARCHAR    -- u rollbacku: běh, na který se vracelo
+        )
+    """)
+    con.execute("""
+        CREATE TABLE IF NOT EXISTS pipeline_run_stages (
+            run_id VARCHAR,
+            stage VARCHAR,
+            description VARCHAR,
+            status VARCHAR,
+            started_at TIMESTAMP,
+            duration_s DOUBLE,
+            rows BIGINT,
+            error VARCHAR
+        )
+    """)
+    con.execute("""
+        CREATE TABLE IF NOT EXISTS pipeline_run_artifacts (
+            run_id VARCHAR,
+            artifact VARCHAR,          -- cesta k souboru nebo duckdb:<tabulka>
+            sha256 VARCHAR,            -- artifact_digest(): otisk obsahu
+            bytes BIGINT,
+            rows BIGINT,
+            source_run_id VARCHAR
+        )
+    """)
+
+
+def result_rows(result):
+    """Počet řádků z návratové hodnoty main() kroku (DataFrame, {dataset: řádky}), jinak None"""
+    if hasattr(result, "shape"):
+        return int(result.shape[0])
+    if isinstance(result, dict) and result and all(isinstance(v, int) for v in result.values()):
+        return sum(result.values())
+    return None
+
+
+class RunRecorder:
+    """Zápis jednoho běhu pipeline do registru; spojení se otevírá jen na chvíli mezi kroky"""
+
+    def __init__(self, db_path=REGISTRY_DB_PATH, run_id=None):
+        self.db_path = db_path
+        self.run_id = run_id or new_run_id()
+        self.started = datetime.datetime.now()
+        os.environ[RUN_ID_ENV] = self.run_id
+
+    def connect(self):
+        import duckdb
+
+        con = duckdb.connect(self.db_path)
+        ensure_tables(con)
+        return con
+
+    def start(self):
+        with self.connect() as con:
+            con.execute("INSERT INTO pipeline_runs (run_id, started_at, status, git_commit) VALUES (?, ?, 'running', ?)",
+                        [self.run_id, self.started, git_commit()])
+        return self.run_id
+
+    def stage(self, stage, description, status, started_at, duration_s, result=None, error=None):
+        with self.connect() as con:
+            con.execute("INSERT INTO pipeline_run_stages VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                        [self.run_id, stage, description, status, started_at, duration_s,
+                         result_rows(result), error])
+
+    def finish(self, status):
+        """Uloží otisky výstupů a stav běhu"""
+        finished = datetime.datetime.now()
+        with self.connect() as con:
+            record_artifacts(con, self.run_id)
+            con.execute("UPDATE pipeline_runs SET status = ?, finished_at = ?, duration_s = ? WHERE run_id = ?",
+                        [status, finished, (finished - self.started).total_seconds(), self.run_id])
+        return status
+
+
+def record_artifacts(con, run_id):
+    """Otisky výstupních souborů a počty řádků tabulek s run_id, který je vyrobil"""
+    con.execute("DELETE FROM pipeline_run_artifacts WHERE run_id = ?", [run_id])
+    for path in ARTIFACTS:
+        if not os.path.exists(path):
+            continue
+        rows = None
+        if path.endswith(".csv"):
+            rows = con.execute("SELECT COUNT(*) FROM read_csv_auto(?)", [path]).fetchone()[0]
+        con.execute("INSERT INTO pipeline_run_artifacts VALUES (?, ?, ?, ?, ?, ?)",
+                    [run_id, path, artifact_digest(path), os.path.getsize(path), rows, None])
+
+    for table in RUN_TABLES:
+        if "run_id" not in table_columns(con, table):
+            continue
+        # job_listings nese scrape, ze kterého metriky vznikly (scraping mohl v tomto běhu selhat)
+        if table == "job_listings":
+            source = con.execute("SELECT MAX(run_id) FROM job_listings").fetchone()[0]
+        else:
+            source = run_id
+        rows = con.execute(f"SELECT COUNT(*) FROM {table} WHERE run_id = ?", [source]).fetchone()[0]
+        con.execute("INSERT INTO pipeline_run_artifacts VALUES (?, ?, NULL, NULL, ?, ?)",
+                    [run_id, f"duckdb:{table}", rows, source])
+
+
+def append_run_rows(con, table, df, run_id):
+    """Připíše řádky běhu do tabulky s historií běhů (nové sloupce doplní, běh přepíše)"""
+    df = df.assign(run_id=run_id)
+    con.register("run_rows_df", df)
+    try:
+        con.execute(f"CREATE TABLE IF NOT EXISTS {table} AS SELECT * FROM run_rows_df LIMIT 0")
+        existing = set(table_columns(con, table))
+        for name, dtype, *_ in con.execute("DESCRIBE run_rows_df").fetchall():
+            if name not in existing:
+                con.execute(f'ALTER TABLE {table} ADD COLUMN "{name}" {dtype}')
+        con.execute(f"DELETE FROM {table} WHERE run_id = ?", [run_id])
+        con.execute(f"INSERT INTO {table} BY NAME SELECT * FROM run_rows_df")
+    finally:
+        con.unregister("run_rows_df")
+
+
+def latest_successful_run(con):
+    """Poslední úspěšný běh (dict) nebo None - pro aplikaci a inkrementální kroky"""
+    ensure_tables(con)
+    row = con.execute("""
+        SELECT run_id, started_at, finished_at, duration_s, git_commit
+        FROM pipeline_runs
+        WHERE status = 'success'
+        ORDER BY started_at DESC
+        LIMIT 1
+    """).fetchone()
+    if row is None:
+        return None
+    return dict(zip(["run_id", "started_at", "finished_at", "duration_s", "git_commit"], row))
+
+
+def artifact_hash(con, run_id, path):
+    """Otisk výstupu v daném běhu - shodný otisk vstupu = krok není třeba přepočítat"""
+    row = con.execute("SELECT sha256 FROM pipeline_run_artifacts WHERE run_id = ? AND artifact = ?",
+                      [run_id, path]).fetchone()
+    return row[0] if row else None
+
+
+def list_runs(con, limit=20):
+    ensure_tables(con)
+    return con.execute("""
+        SELECT r.run_id, r.status, r.started_at, ROUND(r.duration_s, 1) AS duration_s,
+               COUNT(s.stage) FILTER (WHERE s.status = 'ok') AS stages_ok,
+               COUNT(s.stage) FILTER (WHERE s.status != 'ok') AS stages_failed,
+               r.restored_run_id
+        FROM pipeline_runs r
+        LEFT JOIN pipeline_run_stages s USING (run_id)
+        GROUP BY ALL
+        ORDER BY r.started_at DESC
+        LIMIT ?
+    """, [limit]).fetchdf()
+
+
+def restore_trends(con, run_id):
+    """Přestaví wage_trends do stavu po běhu `run_id` ze snímků wage_trends_runs
+
+    Každý běh uložil jen dny od svého snapshot_since (NULL = celá historie), takže pro
+    každý den platí řádky posledního běhu do `run_id`, jehož snímek ten den pokrývá.
+    Vrací obnovené řady s run_id (stejně jako CSV trendů).
+    """
+    con.execute("ALTER TABLE wage_trends_runs ADD COLUMN IF NOT EXISTS snapshot_since TIMESTAMP")
+    con.execute("""
+        CREATE OR REPLACE TABLE wage_trends AS
+        WITH snapshots AS (
+            SELECT DISTINCT run_id, snapshot_since FROM wage_trends_runs WHERE run_id <= $run_id
+        )
+        SELECT * EXCLUDE (run_id, snapshot_since) FROM wage_trends_runs w
+        WHERE w.run_id = (SELECT MAX(s.run_id) FROM snapshots s
+                          WHERE s.snapshot_since IS NULL OR s.snapshot_since <= w.scrape_date)
+    """, {"run_id": run_id})
+    return con.execute("SELECT *, $run_id AS run_id FROM wage_trends ORDER BY region, scrape_date",
+                       {"run_id": run_id}).fetchdf()
+
+
+def rollback(run_id=None, db_path=REGISTRY_DB_PATH):
+    """Vrátí výstupy na úspěšný běh `run_id` (výchozí: předposlední úspěšný)
+
+    job_listings se obnoví z Parquet archivu podle run_id scrapu, CSV metrik a trendů
+    z historie v DuckDB (wage_trends ze snímku běhu, trend_daily se zahodí a příští
+    krok trendů ho přepočítá celý); export a podklady dashboardu se přegenerují.
+    Novější úspěšné běhy dostanou stav rolled_back, takže latest_successful_run()
+    vrátí cílový běh. Vrací seznam výstupů z ARTIFACTS, jejichž otisk nesedí s registrem
+    cílového běhu nebo které se obnovit nepodařilo.
+    """
+    import duckdb
+
+    import listing_archive
+
+    con = duckdb.connect(db_path)
+    try:
+        ensure_tables(con)
+        successful = [row[0] for row in con.execute(
+            "SELECT run_id FROM pipeline_runs WHERE status = 'success' ORDER BY started_at DESC").fetchall()]
+        if run_id is None:
+            if len(successful) < 2:
+                raise ValueError("Neni predchozi uspesny beh, na ktery se vratit")
+            run_id = successful[1]
+        elif run_id not in successful:
+            raise ValueError(f"Beh {run_id} neni mezi uspesnymi behy")
+
+        sources = dict(con.execute("""
+            SELECT artifact, source_run_id FROM pipeline_run_artifacts
+            WHERE run_id = ? AND artifact LIKE 'duckdb:%'
+        """, [run_id]).fetchall())
+
+        # Nabídky ze scrapu, ze kterého cílový běh počítal
+        scrape_run = sources.get("duckdb:job_listings")
+        if scrape_run and listing_archive.archive_exists():
+            history = f"({listing_archive.history_sql()})"
+            archived = [row[0] for row in con.execute(f"DESCRIBE SELECT * FROM {history}").fetchall()]
+            # Pořadí sloupců jako v job_listings (partition sloupce má archiv na konci)
+            columns = [c for c in table_columns(con, "job_listings") if c in archived] or \
+                [c for c in archived if c not in ("scrape_date", "archived_at")]
+            restored = con.execute(f"""
+                SELECT {', '.join(f'"{c}"' for c in columns)}
+                FROM {history}
+                WHERE run_id = ?
+            """, [scrape_run]).fetchdf()
+            if len(restored):
+                con.execute("CREATE OR REPLACE TABLE job_listings AS SELECT * FROM restored")
+                dedup = "WHERE NOT is_duplicate" if "is_duplicate" in restored.columns else ""
+                con.execute(f"COPY (SELECT * FROM job_listings {dedup}) TO 'data/job_listings.csv' (HEADER, DELIMITER ',')")
+                print(f"[ROLLBACK] job_listings: {len(restored)} nabidek ze scrapu {scrape_run}")
+
+        for table, csv_path in METRIC_CSV.items():
+            if "run_id" not in table_columns(con, table):
+                continue
+            source = sources.get(f"duckdb:{table}", run_id)
+            if table == "wage_trends_runs":
+                # Materializované řady zpět na cílový běh; denní agregace se přepočítá celá
+                trends = restore_trends(con, source)
+                con.execute("DROP TABLE IF EXISTS trend_daily")
+                trends.to_csv(csv_path, index=False)
+                print(f"[ROLLBACK] {csv_path}: {len(trends)} radku ze snimku do behu {source}")
+                continue
+            metrics = con.execute(f"SELECT * FROM {table} WHERE run_id = ?", [source]).fetchdf()
+            if not len(metrics):
+                continue
+            metrics.dropna(axis=1, how="all").to_csv(csv_path, index=False)
+            print(f"[ROLLBACK] {csv_path}: {len(metrics)} radku z behu {source}")
+    finally:
+        con.close()
+
+    # Export a podklady dashboardu z obnovených dat
+    import export_metrics
+
+    export_metrics.main()
+
+    now = datetime.datetime.now()
+    con = duckdb.connect(db_path)
+    try:
+        con.execute("""
+            UPDATE pipeline_runs SET status = 'rolled_back'
+            WHERE status = 'success' AND started_at > (SELECT started_at FROM pipeline_runs WHERE run_id = ?)
+        """, [run_id])
+        con.execute("""
+            INSERT INTO pipeline_runs (run_id, started_at, finished_at, status, duration_s, git_commit, restored_run_id)
+            VALUES (?, ?, ?, 'rollback', 0, ?, ?)
+        """, [new_run_id(), now, now, git_commit(), run_id])
+
+        recorded = dict(con.execute("""
+            SELECT artifact, sha256 FROM pipeline_run_artifacts
+            WHERE run_id = ? AND sha256 IS NOT NULL
+        """, [run_id]).fetchall())
+        # Výstup, který cílový běh měl a teď chybí nebo se liší (nebo který cílový běh neměl
+        # a zůstal po novějším běhu), je nekonzistentní
+        mismatched = [path for path in ARTIFACTS
+                      if (path in recorded) != os.path.exists(path)
+                      or (path in recorded and artifact_digest(path) != recorded[path])]
+    finally:
+        con.close()
+    return mismatched
@@ -0,0 +1,220 @@
+"""
+Dávková extrakce platů z textu
+Místo Python regexu volaného pro každý řetězec zvlášť se celé pole kandidátních
+textů zpracuje jedním průchodem DuckDB regexp_extract (RE2 v C++). Výsledkem
+je rozpětí (min/max), jednotka (hodinová/měsíční) a měna pro každý text.
+pandas str.extract volá pro každý řetězec Python re, takže proti smyčce nic
+nepřinese - dávka je jen v DuckDB.
+
+Normalizace převádí rozpětí a období na měsíční ekvivalent v Kč
+(normalize_salary pro jeden text přímo v crawleru, normalize_salaries pro pole).
+"""
+import re
+
+# Mezera včetně nezlomitelné a úzké - RE2 v DuckDB bere \s jen jako ASCII mezery,
+# Python re i Unicode; s výčtem se oba enginy shodnou na textech z HTML ("40&nbsp;000&nbsp;Kč")
+SPACE = r"[\s  ]"
+# Číslo s volitelnými oddělovači tisíců (mezera, nezlomitelná mezera, úzká mezera)
+NUMBER = r"\d{1,3}(?:[   ]\d{3})+|\d+"
+CURRENCY = r"Kč|CZK|EUR|€"
+
+# Jednotka období za "/" nebo "za" ("Kč/hod.", "Kč za hodinu", "CZK/MONTH")
+PERIOD_UNITS = {
+    "h": "hour", "hod": "hour", "hodina": "hour", "hodinu": "hour", "hour": "hour",
+    "den": "day", "day": "day",
+    "týd": "week", "týden": "week", "week": "week",
+    "měs": "month", "měsíc": "month", "month": "month",
+    "rok": "year", "roč": "year", "year": "year",
+}
+# Období bez oddělovače jen jako celé příslovce ("45 000 Kč měsíčně") - zkratka hned
+# za měnou by chytila začátek dalšího slova ("Kč Rokycany", "Kč Hodonín", "Kč denní směna")
+PERIOD_ADVERBS = {"hodinově": "hour", "denně": "day", "týdně": "week", "měsíčně": "month", "ročně": "year"}
+PERIOD_CODES = {**PERIOD_UNITS, **PERIOD_ADVERBS}
+# Konec slova pro oba enginy: \b je v RE2 jen ASCII (hranice by byla i uvnitř "měsíc")
+WORD_CHARS = "0-9a-záäčďéěíĺľňóôŕřšťúůýž"
+WORD_END = rf"(?:[^{WORD_CHARS}]|$)"
+
+
+def alternation(words):
+    """Slova -> alternativa regexu, delší dřív"""
+    return "|".join(sorted(words, key=len, reverse=True))
+
+
+# Společná gramatika pro DuckDB (RE2) i Python re - jen konstrukce, které umí obě
+SALARY_PATTERN = (
+    rf"(?i)(od|do)?{SPACE}*"
+    rf"({NUMBER}){SPACE}*(?:(?:{CURRENCY}){SPACE}*)?"
+    rf"(?:(?:-|–|—|až|do){SPACE}*({NUMBER}){SPACE}*)?"
+    rf"({CURRENCY})"
+    rf"(?:{SPACE}*(?:(?:/{SPACE}*|za{SPACE}+)({alternation(PERIOD_UNITS)})"
+    rf"|({alternation(PERIOD_ADVERBS)})){WORD_END})?"
+)
+SALARY_GROUPS = ["prefix", "first", "second", "currency", "period", "period_adverb"]
+
+SALARY_RE = re.compile(SALARY_PATTERN)
+
+CURRENCY_CODES = {"kč": "CZK", "czk": "CZK", "eur": "EUR", "€": "EUR"}
+
+# Přepočet na měsíc: 40 h týdně x 52 týdnů / 12 měsíců, 21,7 pracovních dní
+PERIOD_TO_MONTH = {"hour": 173.3, "day": 21.7, "week": 52 / 12, "month": 1.0, "year": 1 / 12}
+EUR_CZK = 25.0
+# Věrohodný měsíční ekvivalent (mimo rozsah jde o chybu parsování). Částka bez uvedeného
+# období je měsíční - hodinovou/denní mzdu bereme jen s obdobím v textu, jinak by se
+# z "Stravenky 120 Kč" nebo "příspěvek 500 Kč" stala mzda; pod rozsahem tak vypadnou.
+MONTHLY_RANGE = (10000, 500000)
+
+RESULT_COLUMNS = ["salary_min", "salary_max", "salary_period", "currency"]
+NORMALIZED_COLUMNS = RESULT_COLUMNS + ["salary_monthly"]
+
+
+def to_number(text):
+    return int(re.sub(r"\D", "", text)) if text else None
+
+
+def extract_salary(text):
+    """Jeden text -> (min, max, období, měna) nebo None (referenční per-string cesta)"""
+    m = SALARY_RE.search(str(text))
+    if not m:
+        return None
+    prefix, first, second, currency, period, adverb = m.groups()
+    period = period or adverb
+    first, second = to_number(first), to_number(second)
+    if prefix and prefix.lower() == "do" and second is None:
+        first, second = None, first
+    return (first, second, PERIOD_CODES.get(period.lower()) if period else None,
+            CURRENCY_CODES[currency.lower()])
+
+
+def normalize_salary(text):
+    """Jeden text -> dict s NORMALIZED_COLUMNS, None pokud plat nejde věrohodně určit"""
+    parsed = extract_salary(text)
+    if parsed is None:
+        return None
+    return normalize_amounts(*parsed)
+
+
+def normalize_amounts(low, high, period, currency):
+    """Rozpětí, období a měna (z textu nebo ze strukturovaných dat) -> dict s NORMALIZED_COLUMNS"""
+    amounts = [v for v in (low, high) if v is not None]
+    if not amounts or currency not in ("CZK", "EUR"):
+        return None
+    period = period or "month"
+    monthly = round(sum(amounts) / len(amounts) * PERIOD_TO_MONTH[period]
+                    * (EUR_CZK if currency == "EUR" else 1))
+    if not MONTHLY_RANGE[0] <= monthly <= MONTHLY_RANGE[1]:
+        return None
+    return {"salary_min": low, "salary_max": high, "salary_period": period,
+            "currency": currency, "salary_monthly": monthly}
+
+
+def extract_salaries_duckdb(texts, con=None):
+    """Pole textů -> DataFrame s RESULT_COLUMNS jedním regexp_extract průchodem v DuckDB"""
+    import duckdb
+    import pandas as pd
+
+    frame = pd.DataFrame({"text": pd.Series(texts, dtype=object)})
+    codes = sorted(set(PERIOD_CODES.values()))
+    period_cases = " ".join(
+        f"WHEN period IN ({', '.join(repr(w) for w, c in PERIOD_CODES.items() if c == code)}) THEN '{code}'"
+        for code in codes)
+    con = con or duckdb.connect()
+    con.register("salary_texts", frame)
+    try:
+        result = con.execute(f"""
+            WITH m AS (
+                SELECT regexp_extract(text, $pattern, {SALARY_GROUPS!r}) AS g
+                FROM salary_texts
+            ), parsed AS (
+                SELECT
+                    lower(g.prefix) AS prefix,
+                    TRY_CAST(replace(replace(replace(g.first, ' ', ''), chr(160), ''), chr(8239), '') AS BIGINT) AS first,
+                    TRY_CAST(replace(replace(replace(g.second, ' ', ''), chr(160), ''), chr(8239), '') AS BIGINT) AS second,
+                    lower(g.currency) AS currency,
+                    lower(coalesce(nullif(g.period, ''), g.period_adverb)) AS period
+                FROM m
+            )
+            SELECT
+                CASE WHEN prefix = 'do' AND second IS NULL THEN NULL ELSE first END AS salary_min,
+                CASE WHEN prefix = 'do' AND second IS NULL THEN first ELSE second END AS salary_max,
+                CASE {period_cases} END AS salary_period,
+                CASE WHEN currency IN ('kč', 'czk') THEN 'CZK'
+                     WHEN currency IN ('eur', '€') THEN 'EUR' END AS currency
+            FROM parsed
+        """, {"pattern": SALARY_PATTERN}).fetchdf()
+    finally:
+        con.unregister("salary_texts")
+    return result
+
+
+def extract_salaries(texts, dedupe=True):
+    """Dávková extrakce platů v DuckDB
+
+    Platové texty se na portálech mnohokrát opakují ("od 40 000 Kč"), proto se
+    s dedupe=True regex pouští jen na unikátní texty a výsledek se rozkopíruje.
+    """
+    import pandas as pd
+
+    if not dedupe:
+        return extract_salaries_duckdb(texts)
+
+    codes, uniques = pd.factorize(pd.Series(texts, dtype=object))
+    result = extract_salaries_duckdb(uniques.tolist())
+    # Kód -1 (chybějící text) ukáže na poslední, prázdný řádek
+    result = pd.concat([result, result.iloc[:0].reindex([len(result)])])
+    return result.iloc[codes].reset_index(drop=True)
+
+
+def normalize_salaries(texts):
+    """Pole textů -> DataFrame s NORMALIZED_COLUMNS (vektorově, stejná pravidla jako normalize_salary)"""
+    import numpy as np
+
+    result = extract_salaries(texts)
+    result[["salary_min", "salary_max"]] = result[["salary_min", "salary_max"]].astype("Int64")
+    amount = result["salary_min"].fillna(result["salary_max"])
+    result["salary_period"] = result["salary_period"].where(
+        result["salary_period"].notna() | amount.isna(), "month")
+
+    midpoint = result[["salary_min", "salary_max"]].astype("float64").mean(axis=1)
+    factor = (result["salary_period"].map(PERIOD_TO_MONTH).astype("float64")
+              * np.where(result["currency"] == "EUR", EUR_CZK, 1.0))
+    monthly = (midpoint * factor).round()
+    # Nevěrohodný plat vynuluje celý řádek - normalize_salary v tom případě vrací None
+    plausible = monthly.between(*MONTHLY_RANGE)
+    result["salary_monthly"] = monthly.astype("Int64")
+    return result.where(plausible)
+
+
+# Typy platových sloupců v job_listings (starší soubory archivu je nemusí mít)
+COLUMN_TYPES = {"salary_min": "INTEGER", "salary_max": "INTEGER", "salary_period": "VARCHAR",
+                "currency": "VARCHAR", "salary_monthly": "INTEGER", "salary_offer": "INTEGER"}
+
+
+def renormalize_table(con, table, text_column="salary_text"):
+    """Přepočítá platové sloupce uložených nabídek z jejich textu platu, vrací počet změněných řádků
+
+    Po změně pravidel normalizace (gramatika, období, rozsah) se historie nemusí stahovat
+    znovu - unikátní texty tabulky projdou dávkovým DuckDB enginem a výsledek se
+    připojí zpět přes UPDATE. salary_offer je měsíční ekvivalent, stejně jako v crawleru.
+    Řádky bez textu platu (jen strukturovaná data bez textu) zůstávají beze změny.
+    """
+    for column, column_type in COLUMN_TYPES.items():
+        con.execute(f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS {column} {column_type}")
+    texts = [row[0] for row in con.execute(
+        f"SELECT DISTINCT {text_column} FROM {table} WHERE {text_column} IS NOT NULL").fetchall()]
+    if not texts:
+        return 0
+
+    parsed = normalize_salaries(texts)
+    parsed.insert(0, "text", texts)
+    con.register("renormalized_salaries", parsed)
+    try:
+        changed = " OR ".join(f"{table}.{c} IS DISTINCT FROM r.{c}" for c in NORMALIZED_COLUMNS)
+        return con.execute(f"""
+            UPDATE {table}
+            SET {', '.join(f'{c} = r.{c}' for c in NORMALIZED_COLUMNS)}, salary_offer = r.salary_monthly
+            FROM renormalized_salaries r
+            WHERE {table}.{text_column} = r.text
+              AND ({changed} OR {table}.salary_offer IS DISTINCT FROM r.salary_monthly)
+        """).fetchone()[0]
+    finally:
+        con.unregister("renormalized_salaries")
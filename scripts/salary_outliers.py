@@ -0,0 +1,117 @@
+"""
+Odlehlé platové nabídky podle robustních statistik
+Pevný rozsah 15 000 - 200 000 Kč nezachytí telefonní čísla, odměny ani hodinovku
+přepočtenou z překlepu. Nabídka je odlehlá vůči své skupině kraj x portál x třída
+povolání (hlavní třída CZ-ISCO): modifikované z-skóre z mediánu a MAD, případně
+Tukeyho ploty z IQR. Počítá se na logaritmu platu - nabídky jsou zešikmené
+doprava a v logaritmu jsou zhruba symetrické.
+
+Statistiky všech skupin vzniknou jedním seskupeným průchodem DuckDB (GROUPING SETS:
+jemné skupiny + celý kraj jako záloha pro malé skupiny). Řádky se nemažou -
+ukládá se is_outlier a outlier_score a metriky se pak počítají s i bez nich.
+"""
+
+# Modifikované z-skóre (Iglewicz & Hoaglin): 0.6745 * (x - medián) / MAD
+MAD_SCALE = 0.6745
+MAD_THRESHOLD = 3.5
+# Tukeyho ploty: Q1 - k*IQR, Q3 + k*IQR
+IQR_K = 1.5
+# Menší skupina se posuzuje podle statistik celého kraje
+MIN_GROUP_SIZE = 8
+
+METHODS = ("mad", "iqr")
+
+
+def scores_sql(table="job_listings", method="mad", columns=None):
+    """SQL (row_id, outlier_score, is_outlier) pro každý řádek tabulky - jeden seskupený průchod
+
+    method="mad": |z| > MAD_THRESHOLD, při MAD = 0 (většina platů stejná) Tukeyho ploty;
+    method="iqr": jen Tukeyho ploty. `columns` = sloupce tabulky (pro starší schémata).
+    """
+    if method not in METHODS:
+        raise ValueError(f"Neznama metoda {method!r}, povolene: {', '.join(METHODS)}")
+    columns = set(columns or ())
+    title_class = "COALESCE(LEFT(isco_code, 1), '-')" if "isco_code" in columns else "'-'"
+    # Duplicity napříč portály by skupinu zkreslily - do statistik nejdou
+    in_stats = "NOT COALESCE(is_duplicate, FALSE)" if "is_duplicate" in columns else "TRUE"
+
+    tukey = f"(log_salary < q1 - {IQR_K} * (q3 - q1) OR log_salary > q3 + {IQR_K} * (q3 - q1))"
+    if method == "mad":
+        rule = f"""CASE WHEN mad > 0 THEN abs({MAD_SCALE} * (log_salary - med) / mad) > {MAD_THRESHOLD}
+                        WHEN q3 > q1 THEN {tukey}
+                        ELSE FALSE END"""
+    else:
+        rule = f"CASE WHEN q3 > q1 THEN {tukey} ELSE FALSE END"
+
+    return f"""
+        WITH listings AS (
+            SELECT rowid AS row_id, region, source, {title_class} AS title_class,
+                   ln(salary_offer) AS log_salary, {in_stats} AS in_stats
+            FROM {table}
+            WHERE salary_offer > 0
+        ),
+        stats AS (
+            SELECT region, source, title_class, GROUPING(source) AS coarse,
+                   COUNT(*) AS n,
+                   MEDIAN(log_salary) AS med,
+                   MAD(log_salary) AS mad,
+                   QUANTILE_CONT(log_salary, 0.25) AS q1,
+                   QUANTILE_CONT(log_salary, 0.75) AS q3
+            FROM listings
+            WHERE in_stats
+            GROUP BY GROUPING SETS ((region, source, title_class), (region))
+        ),
+        chosen AS (
+            -- Jemná skupina, pokud je dost velká, jinak celý kraj
+            SELECT f.region, f.source, f.title_class,
+                   CASE WHEN f.n >= {MIN_GROUP_SIZE} THEN f.med ELSE r.med END AS med,
+                   CASE WHEN f.n >= {MIN_GROUP_SIZE} THEN f.mad ELSE r.mad END AS mad,
+                   CASE WHEN f.n >= {MIN_GROUP_SIZE} THEN f.q1 ELSE r.q1 END AS q1,
+                   CASE WHEN f.n >= {MIN_GROUP_SIZE} THEN f.q3 ELSE r.q3 END AS q3,
+                   GREATEST(f.n, r.n) >= {MIN_GROUP_SIZE} AS enough
+            FROM stats f
+            JOIN stats r ON r.coarse = 1 AND r.region IS NOT DISTINCT FROM f.region
+            WHERE f.coarse = 0
+        )
+        SELECT l.row_id,
+               CASE WHEN c.mad > 0 THEN {MAD_SCALE} * (l.log_salary - c.med) / c.mad END AS outlier_score,
+               COALESCE(c.enough AND {rule}, FALSE) AS is_outlier
+        FROM listings l
+        LEFT JOIN chosen c
+            ON c.region IS NOT DISTINCT FROM l.region
+           AND c.source IS NOT DISTINCT FROM l.source
+           AND c.title_class = l.title_class
+    """
+
+
+def table_columns(con, table):
+    return [row[0] for row in con.execute(f"DESCRIBE {table}").fetchall()]
+
+
+def flag_outliers(con, table="job_listings", method="mad"):
+    """Uloží is_outlier a outlier_score do tabulky (sloupce doplní), vrací počet odlehlých"""
+    columns = table_columns(con, table)
+    if "is_outlier" not in columns:
+        con.execute(f"ALTER TABLE {table} ADD COLUMN is_outlier BOOLEAN DEFAULT FALSE")
+    if "outlier_score" not in columns:
+        con.execute(f"ALTER TABLE {table} ADD COLUMN outlier_score DOUBLE")
+    con.execute(f"""
+        UPDATE {table} AS t
+        SET is_outlier = s.is_outlier, outlier_score = s.outlier_score
+        FROM ({scores_sql(table, method, columns)}) AS s
+        WHERE t.rowid = s.row_id
+    """)
+    return con.execute(f"SELECT COUNT(*) FROM {table} WHERE is_outlier").fetchone()[0]
+
+
+def select_with_flags(con, table="job_listings", where="", method="mad"):
+    """SELECT tabulky včetně is_outlier - u starší tabulky bez uložených příznaků je dopočítá"""
+    columns = table_columns(con, table)
+    if "is_outlier" in columns:
+        return f"SELECT * FROM {table} {where}"
+    return f"""
+        SELECT t.*, COALESCE(s.is_outlier, FALSE) AS is_outlier, s.outlier_score
+        FROM {table} t
+        LEFT JOIN ({scores_sql(table, method, columns)}) s ON t.rowid = s.row_id
+        {where}
+    """
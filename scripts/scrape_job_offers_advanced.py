@@ -4,33 +4,22 @@ Scrapuje všechny dostupné pracovní pozice z českých portálů
 """
 import asyncio
 import aiohttp
-import requests
 import re
 import time
-from bs4 import BeautifulSoup
 import pandas as pd
 import duckdb
-from concurrent.futures import ThreadPoolExecutor, as_completed
-
-regions = {
-    "praha": "Praha",
-    "stredocesky": "Středočeský kraj",
-    "jihocesky": "Jihočeský kraj",
-    "plzensky": "Plzeňský kraj",
-    "karlovarsky": "Karlovarský kraj",
-    "ustecky": "Ústecký kraj",
-    "liberecky": "Liberecký kraj",
-    "kralovehradecky": "Královéhradecký kraj",
-    "pardubicky": "Pardubický kraj",
-    "vysocina": "Kraj Vysočina",
-    "jihomoravsky": "Jihomoravský kraj",
-    "olomoucky": "Olomoucký kraj",
-    "moravskoslezsky": "Moravskoslezský kraj",
-    "zlinsky": "Zlínský kraj",
-}
+from crawl_runtime import CrawlRuntime
+from detail_enrichment import ENRICH_BUDGET, enrich_listings
+from job_titles import classify_titles
+from listing_archive import archive_listings, register_views
+from listing_dedup import deduplicate
+from salary_outliers import flag_outliers
+from portal_adapters import PORTAL_ADAPTERS, regions
+from run_registry import current_run_id
+from salary_extract import NORMALIZED_COLUMNS
 
 def extract_salary_from_text(text):
-    """Extrahuje plat z textu"""
+    """Extrahuje plat z textu (jen první číslo - crawler používá normalize_salary)"""
     m = re.search(r"(\d[\d\s]+)", str(text))
     if m:
         salary_str = m.group(1).replace(" ", "").replace("\xa0", "")
@@ -42,252 +31,27 @@ def extract_salary_from_text(text):
             pass
     return None
 
-def scrape_prace_cz(slug, region, max_pages=10):
-    """Scrape jeden region z prace.cz - všechny stránky včetně job titles"""
-    results = []
-    headers = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'}
-    
-    for page in range(1, max_pages + 1):
-        try:
-            url = f"https://www.prace.cz/nabidky/?region={slug}&page={page}"
-            r = requests.get(url, timeout=10, headers=headers)
-            soup = BeautifulSoup(r.text, "html.parser")
+def parallel_scrape(runtime=None, adapters=None, enrich_budget=ENRICH_BUDGET):
+    """Paralelní scraping všech zdrojů na sdíleném crawl runtime
 
-            page_results = 0
-            
-            # Vytvoříme mapu job title -> link pro pozdější spojení
-            job_titles_map = {}
-            job_links = soup.find_all('a', href=re.compile(r'/nabidka/'))
-            for link in job_links:
-                title = link.get_text(strip=True)
-                if title:
-                    job_titles_map[id(link.find_parent())] = title
-            
-            # Scrape platy (původní metoda)
-            for s in soup.find_all(string=re.compile(r"\d{2,}\s*(?:Kč|CZK)", re.I)):
-                salary = extract_salary_from_text(s)
-                if salary:
-                    # Zkus najít job title
-                    job_title = None
-                    parent = s.find_parent()
-                    if parent and id(parent) in job_titles_map:
-                        job_title = job_titles_map[id(parent)]
-                    
-                    results.append({
-                        "region": region,
-                        "salary_offer": salary,
-                        "job_title": job_title[:200] if job_title else None,
-                        "source": "prace.cz",
-                        "page": page
-                    })
-                    page_results += 1
-            
-            # Pokud na stránce není žádná nabídka, končíme
-            if page_results == 0:
-                break
-                
-            time.sleep(0.5)  # Menší pauza mezi stránkami
-            
-        except Exception as e:
-            print(f"  [!] prace.cz/{slug}/page{page}: {e}")
-            break
-    
-    return results
+    enrich_budget > 0 zapne doplnění chybějícího platu/kraje z detailních stránek.
+    """
+    runtime = runtime or CrawlRuntime()
+    adapters = adapters or list(PORTAL_ADAPTERS.values())
 
-def scrape_jobs_cz(slug, region, max_pages=10):
-    """Scrape jeden region z jobs.cz - všechny stránky včetně job titles"""
-    results = []
-    headers = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'}
-    
-    for page in range(1, max_pages + 1):
-        try:
-            # Jobs.cz používá jiný pagination parametr
-            url = f"https://www.jobs.cz/prace/?locality%5B%5D={slug}&page={page}"
-            r = requests.get(url, timeout=10, headers=headers)
-            soup = BeautifulSoup(r.text, "html.parser")
-            
-            page_results = 0
-            
-            # Najdeme všechny pracovní nabídky
-            job_cards = soup.find_all(['article', 'div'], class_=re.compile(r'offer|job|listing|search', re.I))
-            
-            if not job_cards:
-                # Fallback
-                for s in soup.find_all(string=re.compile(r"\d{2,}\s*(?:Kč|CZK)", re.I)):
-                    salary = extract_salary_from_text(s)
-                    if salary:
-                        results.append({
-                            "region": region,
-                            "salary_offer": salary,
-                            "job_title": None,
-                            "source": "jobs.cz",
-                            "page": page
-                        })
-                        page_results += 1
-            else:
-                for card in job_cards:
-                    # Hledej titulek
-                    title_elem = card.find(['h2', 'h3', 'a'], class_=re.compile(r'title|name|position', re.I))
-                    job_title = title_elem.get_text(strip=True) if title_elem else None
-                    
-                    # Hledej plat
-                    salary = None
-                    for s in card.find_all(string=re.compile(r"\d{2,}\s*(?:Kč|CZK)", re.I)):
-                        salary = extract_salary_from_text(s)
-                        if salary:
-                            break
-                    
-                    if salary:
-                        results.append({
-                            "region": region,
-                            "salary_offer": salary,
-                            "job_title": job_title[:200] if job_title else None,
-                            "source": "jobs.cz",
-                            "page": page
-                        })
-                        page_results += 1
-            
-            # Pokud na stránce není žádná nabídka, končíme
-            if page_results == 0:
-                break
-                
-            time.sleep(0.5)
-            
-        except Exception as e:
-            print(f"  [!] jobs.cz/{slug}/page{page}: {e}")
-            break
-    
-    return results
+    print(f"[CRAWL] Scrapuji {len(adapters)} portalu: {', '.join(a.name for a in adapters)}")
+    all_results = runtime.run(adapters)
 
-def scrape_generic_portal(domain, max_pages=5):
-    """Scrape obecný portál - více stránek včetně job titles"""
-    results = []
-    headers = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'}
-    
-    for page in range(1, max_pages + 1):
-        try:
-            # Různé portály mají různé pagination struktury
-            if page == 1:
-                url = f"https://www.{domain}/prace"
-            else:
-                url = f"https://www.{domain}/prace?page={page}"
-                
-            r = requests.get(url, timeout=10, headers=headers)
-            soup = BeautifulSoup(r.text, "html.parser")
-            
-            page_results = 0
-            
-            # Pokus o strukturovaný scraping
-            job_cards = soup.find_all(['article', 'div'], class_=re.compile(r'offer|job|listing', re.I))
-            
-            if not job_cards:
-                # Fallback
-                for text in soup.find_all(string=re.compile(r"\d{2,}\s*(?:Kč|CZK)", re.I)):
-                    salary = extract_salary_from_text(text)
-                    if salary:
-                        results.append({
-                            "region": "Neznamy",
-                            "salary_offer": salary,
-                            "job_title": None,
-                            "source": domain,
-                            "page": page
-                        })
-                        page_results += 1
-            else:
-                for card in job_cards:
-                    # Hledej titulek
-                    title_elem = card.find(['h2', 'h3', 'a'], class_=re.compile(r'title|name|position', re.I))
-                    job_title = title_elem.get_text(strip=True) if title_elem else None
-                    
-                    # Hledej plat
-                    salary = None
-                    for text in card.find_all(string=re.compile(r"\d{2,}\s*(?:Kč|CZK)", re.I)):
-                        salary = extract_salary_from_text(text)
-                        if salary:
-                            break
-                    
-                    if salary:
-                        results.append({
-                            "region": "Neznamy",
-                            "salary_offer": salary,
-                            "job_title": job_title[:200] if job_title else None,
-                            "source": domain,
-                            "page": page
-                        })
-                        page_results += 1
-            
-            if page_results == 0:
-                break
-                
-            time.sleep(1)
-            
-        except Exception as e:
-            if page == 1:  # Logovat jen chybu na první stránce
-                print(f"  [!] {domain}: {e}")
-            break
-    
-    return results
+    if enrich_budget:
+        stats = enrich_listings(all_results, runtime, budget=enrich_budget)
+        print(f"\n[DETAIL] {stats['candidates']} kandidatu, {stats['cache_hits']} z cache, "
+              f"{stats['fetched']} stazeno, {stats['failed']} chyb, {stats['skipped']} mimo rozpocet "
+              f"-> doplneno {stats['enriched']} nabidek")
+    runtime.metrics.report()
+    runtime.write_report()
 
-def parallel_scrape():
-    """Paralelní scraping všech zdrojů"""
-    all_results = []
-    
-    print("[1/3] Scrapuji prace.cz (paralelne - az 10 stranek na kraj)...")
-    with ThreadPoolExecutor(max_workers=5) as executor:
-        futures = {executor.submit(scrape_prace_cz, slug, region, 10): region 
-                   for slug, region in regions.items()}
-        
-        completed = 0
-        total = len(futures)
-        for future in as_completed(futures):
-            region = futures[future]
-            completed += 1
-            try:
-                results = future.result()
-                if results:
-                    all_results.extend(results)
-                    print(f"  [{completed}/{total}] {region}: {len(results)} nabidek")
-            except Exception as e:
-                print(f"  [{completed}/{total}] [!] {region}: {e}")
-    
-    print(f"\n[2/3] Scrapuji jobs.cz (paralelne - az 10 stranek na kraj)...")
-    with ThreadPoolExecutor(max_workers=5) as executor:
-        futures = {executor.submit(scrape_jobs_cz, slug, region, 10): region 
-                   for slug, region in regions.items()}
-        
-        completed = 0
-        total = len(futures)
-        for future in as_completed(futures):
-            region = futures[future]
-            completed += 1
-            try:
-                results = future.result()
-                if results:
-                    all_results.extend(results)
-                    print(f"  [{completed}/{total}] {region}: {len(results)} nabidek")
-            except Exception as e:
-                print(f"  [{completed}/{total}] [!] {region}: {e}")
-    
-    print(f"\n[3/3] Scrapuji ostatni portaly (az 5 stranek)...")
-    other_portals = ["profesia.cz", "startupjobs.cz", "dobraprace.cz"]
-    with ThreadPoolExecutor(max_workers=3) as executor:
-        futures = {executor.submit(scrape_generic_portal, domain, 5): domain 
-                   for domain in other_portals}
-        
-        completed = 0
-        total = len(futures)
-        for future in as_completed(futures):
-            domain = futures[future]
-            completed += 1
-            try:
-                results = future.result()
-                if results:
-                    all_results.extend(results)
-                    print(f"  [{completed}/{total}] {domain}: {len(results)} nabidek")
-            except Exception as e:
-                print(f"  [{completed}/{total}] [!] {domain}: {e}")
-    
-    return all_results
+    # Nabídky, kterým plat chybí i po doplnění, do výsledků nepatří
+    return [r for r in all_results if r["salary_offer"] is not None]
 
 def save_to_duckdb(data):
     """Uloží data do DuckDB pro rychlé zpracování"""
@@ -299,9 +63,20 @@ def save_to_duckdb(data):
     
     # Vytvoř DataFrame
     df = pd.DataFrame(data)
+    for column in ("location", "employer", "detail_url"):
+        if column not in df.columns:
+            df[column] = None
     
     # DuckDB zpracování
     con = duckdb.connect('data/jobs.duckdb')
+
+    # Stejná nabídka z více portálů se počítá jen jednou (MinHash/LSH proti uloženým podpisům)
+    df = deduplicate(df, con)
+    print(f"[DEDUP] {int(df['is_duplicate'].sum())} duplicitnich nabidek napric portaly")
+
+    # Normalizovaný název a kód CZ-ISCO (jen pro unikátní názvy)
+    df[["title_norm", "isco_code"]] = classify_titles(df["job_title"]).to_numpy()
+    print(f"[ISCO] {int(df['isco_code'].notna().sum())} nabidek zarazeno do CZ-ISCO")
     
     # Vytvoř tabulku (drop a znovu vytvoř pro změnu schématu)
     con.execute("DROP TABLE IF EXISTS job_listings")
@@ -312,13 +87,43 @@ def save_to_duckdb(data):
             job_title VARCHAR,
             source VARCHAR,
             page INTEGER,
-            scraped_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            scraped_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            salary_text VARCHAR,
+            location VARCHAR,
+            employer VARCHAR,
+            detail_url VARCHAR,
+            salary_min INTEGER,
+            salary_max INTEGER,
+            salary_period VARCHAR,
+            currency VARCHAR,
+            salary_monthly INTEGER,
+            cluster_id BIGINT,
+            is_duplicate BOOLEAN DEFAULT FALSE,
+            title_norm VARCHAR,
+            isco_code VARCHAR,
+            is_outlier BOOLEAN DEFAULT FALSE,
+            outlier_score DOUBLE,
+            run_id VARCHAR
         )
     """)
     
     # Vložit data
     con.execute("DELETE FROM job_listings")  # Clear old data
-    con.execute("INSERT INTO job_listings (region, salary_offer, job_title, source, page) SELECT region, salary_offer, job_title, source, page FROM df")
+    columns = ", ".join(["region", "salary_offer", "job_title", "source", "page", "salary_text", "location",
+                         "employer", "detail_url"]
+                        + NORMALIZED_COLUMNS + ["cluster_id", "is_duplicate", "title_norm", "isco_code"])
+    # run_id běhu pipeline - podle něj se dohledá, které metriky z tohoto scrapu vznikly
+    con.execute(f"INSERT INTO job_listings ({columns}, run_id) SELECT {columns}, $run_id FROM df",
+                {"run_id": current_run_id()})
+
+    # Odlehlé platy (MAD v kraji x portálu x třídě povolání) - jen příznak, řádky zůstávají
+    outliers = flag_outliers(con)
+    print(f"[OUTLIER] {outliers} odlehlych nabidek oznaceno")
+
+    # Historie: běh se připíše do Parquet archivu (scrape_date/source)
+    archived = archive_listings(con)
+    register_views(con)
+    print(f"[ARCHIV] {archived} nabidek pripsano do data/listings_archive")
     
     # Statistiky
     stats = con.execute("""
@@ -329,6 +134,7 @@ def save_to_duckdb(data):
             MIN(salary_offer) as min_salary,
             MAX(salary_offer) as max_salary
         FROM job_listings
+        WHERE NOT is_duplicate
         GROUP BY source
         ORDER BY count DESC
     """).fetchdf()
@@ -336,17 +142,18 @@ def save_to_duckdb(data):
     print("\n[Statistiky podle zdroje]")
     print(stats.to_string(index=False))
     
-    # Export do CSV
-    con.execute("COPY job_listings TO 'data/job_listings.csv' (HEADER, DELIMITER ',')") 
+    # Export do CSV (jen unikátní nabídky - CSV jde do Supabase)
+    con.execute("COPY (SELECT * FROM job_listings WHERE NOT is_duplicate) TO 'data/job_listings.csv' (HEADER, DELIMITER ',')")
     
     con.close()
     print(f"\n[OK] Data ulozena do:")
     print("  - data/jobs.duckdb")
     print("  - data/job_listings.csv")
+    print("  - data/listings_archive/")
     
     return df
 
-if __name__ == "__main__":
+def main():
     print("="*60)
     print("CzechPayGap - Vylepšený scraper s DuckDB")
     print("="*60)
@@ -379,3 +186,7 @@ if __name__ == "__main__":
         df = pd.DataFrame(test_data)
         df.to_csv("data/job_listings.csv", index=False)
         print(f"[OK] Vytvoren testovaci dataset: {len(df)} radku")
+    return df
+
+if __name__ == "__main__":
+    main()
@@ -46,6 +46,17 @@ CREATE TABLE IF NOT EXISTS job_listings (
     created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
 );
 
+-- Strukturovaný plat (rozpětí, období, měsíční ekvivalent) - i pro existující tabulky
+ALTER TABLE job_listings ADD COLUMN IF NOT EXISTS job_title TEXT;
+ALTER TABLE job_listings ADD COLUMN IF NOT EXISTS salary_min INTEGER;
+ALTER TABLE job_listings ADD COLUMN IF NOT EXISTS salary_max INTEGER;
+ALTER TABLE job_listings ADD COLUMN IF NOT EXISTS salary_period TEXT;
+ALTER TABLE job_listings ADD COLUMN IF NOT EXISTS currency TEXT;
+ALTER TABLE job_listings ADD COLUMN IF NOT EXISTS salary_monthly INTEGER;
+
+-- Příznak odlehlého platu (MAD v kraji x portálu x třídě povolání) - řádky se nemažou
+ALTER TABLE job_listings ADD COLUMN IF NOT EXISTS is_outlier BOOLEAN DEFAULT FALSE;
+
 -- Tabulka: wages_by_source (agregace podle zdroje)
 CREATE TABLE IF NOT EXISTS wages_by_source (
     id BIGSERIAL PRIMARY KEY,
@@ -73,8 +84,33 @@ CREATE TABLE IF NOT EXISTS wages_comparison (
     updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
 );
 
+-- Bootstrap intervaly spolehlivosti (95 %) - i pro existující tabulky
+ALTER TABLE wages_comparison ADD COLUMN IF NOT EXISTS avg_offer_ci_low DECIMAL(10, 2);
+ALTER TABLE wages_comparison ADD COLUMN IF NOT EXISTS avg_offer_ci_high DECIMAL(10, 2);
+ALTER TABLE wages_comparison ADD COLUMN IF NOT EXISTS median_offer_ci_low DECIMAL(10, 2);
+ALTER TABLE wages_comparison ADD COLUMN IF NOT EXISTS median_offer_ci_high DECIMAL(10, 2);
+ALTER TABLE wages_comparison ADD COLUMN IF NOT EXISTS pay_gap_pct_ci_low DECIMAL(5, 2);
+ALTER TABLE wages_comparison ADD COLUMN IF NOT EXISTS pay_gap_pct_ci_high DECIMAL(5, 2);
+ALTER TABLE wages_by_source ADD COLUMN IF NOT EXISTS avg_offer_ci_low DECIMAL(10, 2);
+ALTER TABLE wages_by_source ADD COLUMN IF NOT EXISTS avg_offer_ci_high DECIMAL(10, 2);
+ALTER TABLE wages_by_source ADD COLUMN IF NOT EXISTS median_offer_ci_low DECIMAL(10, 2);
+ALTER TABLE wages_by_source ADD COLUMN IF NOT EXISTS median_offer_ci_high DECIMAL(10, 2);
+
+-- Metriky ze všech nabídek včetně odlehlých (hlavní sloupce jsou bez nich)
+ALTER TABLE wages_comparison ADD COLUMN IF NOT EXISTS avg_offer_all DECIMAL(10, 2);
+ALTER TABLE wages_comparison ADD COLUMN IF NOT EXISTS median_offer_all DECIMAL(10, 2);
+ALTER TABLE wages_comparison ADD COLUMN IF NOT EXISTS min_offer_all INTEGER;
+ALTER TABLE wages_comparison ADD COLUMN IF NOT EXISTS max_offer_all INTEGER;
+ALTER TABLE wages_comparison ADD COLUMN IF NOT EXISTS outliers INTEGER;
+
+-- Běh pipeline, který řádek vyrobil (registr pipeline_runs v data/jobs.duckdb)
+ALTER TABLE job_listings ADD COLUMN IF NOT EXISTS run_id TEXT;
+ALTER TABLE wages_comparison ADD COLUMN IF NOT EXISTS run_id TEXT;
+ALTER TABLE wages_by_source ADD COLUMN IF NOT EXISTS run_id TEXT;
+
 -- Indexy pro rychlejší dotazy
 CREATE INDEX IF NOT EXISTS idx_job_listings_region ON job_listings(region);
 CREATE INDEX IF NOT EXISTS idx_job_listings_source ON job_listings(source);
 CREATE INDEX IF NOT EXISTS idx_wages_comparison_region ON wages_comparison(region);
 CREATE INDEX IF NOT EXISTS idx_wages_by_source_region_source ON wages_by_source(region, source);
+CREATE INDEX IF NOT EXISTS idx_job_listings_run_id ON job_listings(run_id);